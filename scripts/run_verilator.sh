@@ -16,20 +16,7 @@ echo "=========================================="
 mkdir -p sim_verilator
 cd sim_verilator
 
-# Verilator compilation with warning suppression
-echo "Compiling with Verilator..."
-verilator --cc --trace --exe \
-    -Wno-IMPLICIT \
-    -Wno-WIDTH \
-    -Wno-UNSIGNED \
-    -Wno-CMPCONST \
-    -Wno-CASEINCOMPLETE \
-    -I../rtl/core \
-    -I../rtl/memory \
-    -I../rtl/debug \
-    -I../rtl/top \
-    --top-module simple_arm_top \
-    ../rtl/core/alu.v \
+SOURCES="../rtl/core/alu.v \
     ../rtl/core/fetch_unit.v \
     ../rtl/core/decode_unit.v \
     ../rtl/core/execute_unit.v \
@@ -39,15 +26,39 @@ verilator --cc --trace --exe \
     ../verification/testbench/verilator_sram_stub.v \
     ../rtl/debug/jtag_controller.v \
     ../rtl/top/simple_arm_top.v \
-    ../verification/testbench/verilator_tb.cpp
+    ../verification/testbench/verilator_tb.cpp"
+
+FLAGS="--cc --trace --exe \
+    -Wno-IMPLICIT \
+    -Wno-WIDTH \
+    -Wno-UNSIGNED \
+    -Wno-CMPCONST \
+    -Wno-CASEINCOMPLETE \
+    -I../rtl/core \
+    -I../rtl/memory \
+    -I../rtl/debug \
+    -I../rtl/top \
+    --top-module simple_arm_top"
+
+# Skip recompilation when sources, flags and tool version are unchanged
+BUILD_HASH=$( (cat $SOURCES; echo "$FLAGS"; verilator --version) | sha256sum | cut -d' ' -f1)
+
+if [ -x obj_dir/Vsimple_arm_top ] && [ "$(cat .build_hash 2>/dev/null)" = "$BUILD_HASH" ]; then
+    echo "Model up to date (${BUILD_HASH:0:16}), skipping compilation"
+else
+    # Verilator compilation with warning suppression
+    echo "Compiling with Verilator..."
+    verilator $FLAGS $SOURCES
 
-# Build the executable
-echo "Building simulation..."
-make -j$(nproc) -C obj_dir -f Vsimple_arm_top.mk Vsimple_arm_top
+    # Build the executable
+    echo "Building simulation..."
+    make -j$(nproc) -C obj_dir -f Vsimple_arm_top.mk Vsimple_arm_top
+    echo "$BUILD_HASH" > .build_hash
+fi
 
 # Run the simulation
 echo "Running simulation..."
-./obj_dir/Vsimple_arm_top
+./obj_dir/Vsimple_arm_top +wave_file=simple_arm_trace.vcd
 
 echo "=========================================="
 echo "Simulation complete!"
@@ -10,10 +10,65 @@ import sys
 import logging
 import argparse
 from pathlib import Path
-from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple, Union
+import math
 import yaml
 import json
-from file_handlers import FileHandler, GDSFileHandler
+import numpy as np
+from file_handlers import FileHandler, GDSFileHandler, LEFFileHandler
+from task_graph import TaskGraph
+from signoff_reports import SignoffStore, parse_drc_report
+from gds_analysis import GDSAnalyzer
+
+def plan_drc_tiles(bbox: List[float], target_tiles: int, halo: float,
+                   min_tile: float) -> List[Dict]:
+    """Split a bounding box in microns into about ``target_tiles`` square-ish tiles.
+
+    Tiles are never smaller than ``min_tile`` or four halos across. Each
+    tile has a ``core`` it owns and a ``window``, the core grown by
+    ``halo``. Cores on the outer edge extend to infinity so nothing
+    reported slightly outside the box is lost.
+    """
+    width = max(bbox[2] - bbox[0], 1e-3)
+    height = max(bbox[3] - bbox[1], 1e-3)
+    edge = max(math.sqrt(width * height / max(target_tiles, 1)), min_tile, 4 * halo)
+    nx = max(1, math.ceil(width / edge))
+    ny = max(1, math.ceil(height / edge))
+    xs = np.linspace(bbox[0], bbox[2], nx + 1)
+    ys = np.linspace(bbox[1], bbox[3], ny + 1)
+
+    tiles = []
+    for j in range(ny):
+        for i in range(nx):
+            core = [float(xs[i]) if i else -math.inf, float(ys[j]) if j else -math.inf,
+                    float(xs[i + 1]) if i < nx - 1 else math.inf,
+                    float(ys[j + 1]) if j < ny - 1 else math.inf]
+            window = [round(float(xs[i]) - halo, 3), round(float(ys[j]) - halo, 3),
+                      round(float(xs[i + 1]) + halo, 3), round(float(ys[j + 1]) + halo, 3)]
+            tiles.append({'name': f"tile_{i}_{j}", 'core': core, 'window': window})
+    return tiles
+
+def tile_owns(tile: Dict, box: List[float]) -> bool:
+    """Whether the center of ``box`` lies in the tile's half-open core."""
+    cx = (box[0] + box[2]) / 2
+    cy = (box[1] + box[3]) / 2
+    x0, y0, x1, y1 = tile['core']
+    return x0 <= cx < x1 and y0 <= cy < y1
+
+_DRC_SEPARATOR = '-' * 40
+
+def write_drc_report(report: Union[str, Path], top_cell: str, violations: Dict[str, List[List[float]]]):
+    """Write violations in the same layout as the Magic DRC report."""
+    with open(report, 'w', buffering=1 << 20) as f:
+        f.write(f"{top_cell}\n{_DRC_SEPARATOR}\n")
+        total = 0
+        for rule, boxes in violations.items():
+            f.write(f"{rule}\n{_DRC_SEPARATOR}\n")
+            f.writelines(f" {b[0]:.3f} {b[1]:.3f} {b[2]:.3f} {b[3]:.3f}\n" for b in boxes)
+            f.write(f"{_DRC_SEPARATOR}\n")
+            total += len(boxes)
+        f.write(f"COUNT: {total}\n")
 
 class GDSCreator:
     """Create final GDS by merging core and SRAM."""
@@ -24,6 +79,7 @@ class GDSCreator:
         self.config = self._load_config()
         self.file_handler = FileHandler(self.config.get('output_dir', '.'))
         self.gds_handler = GDSFileHandler(self.config.get('output_dir', '.'))
+        self.lef_handler = LEFFileHandler(self.config.get('output_dir', '.'))
         self.setup_logging()
 
     def setup_logging(self):
@@ -58,12 +114,14 @@ class GDSCreator:
     def validate_inputs(self) -> bool:
         """Validate input files and required tools."""
         try:
-            # Check required tools
+            # Check required tools, resolved once and cached across runs
             required_tools = ['klayout', 'magic', 'netgen']
             for tool in required_tools:
-                if not self.file_handler.check_tool_exists(tool):
+                tool_path = self.file_handler.resolve_tool(tool)
+                if tool_path is None:
                     self.logger.error(f"Required tool not found: {tool}")
                     return False
+                self.logger.debug(f"Using {tool} at {tool_path}")
             
             # Check input files
             required_files = {
@@ -83,12 +141,37 @@ class GDSCreator:
                     self.logger.error(f"Invalid GDS file: {file_path}")
                     return False
             
+            # The SRAM abstract must describe cells that exist in its layout
+            if self.config.get('sram_lef'):
+                return self.validate_sram_lef(self.config['sram_lef'], self.config['sram_gds'])
+            
             return True
             
         except Exception as e:
             self.logger.error(f"Error validating inputs: {str(e)}")
             return False
 
+    def validate_sram_lef(self, lef_file: Union[str, Path], gds_file: Union[str, Path]) -> bool:
+        """Check every LEF macro has a matching cell and size in the SRAM GDS."""
+        if not self.lef_handler.validate_lef(lef_file):
+            self.logger.error(f"Invalid LEF file: {lef_file}")
+            return False
+
+        macros = self.lef_handler.get_index(lef_file)['macros']
+        report = GDSAnalyzer(self.gds_handler).analyze(gds_file)
+        for name, macro in macros.items():
+            cell = report['cells'].get(macro['foreign'] or name)
+            if cell is None:
+                self.logger.error(f"LEF macro {name} has no cell in {gds_file}")
+                return False
+            if cell['bbox_um']:
+                x0, y0, x1, y1 = cell['bbox_um']
+                width, height = macro['size']
+                if abs((x1 - x0) - width) > 0.01 or abs((y1 - y0) - height) > 0.01:
+                    self.logger.warning(f"LEF size {width} x {height} um of {name} differs from "
+                                        f"GDS extent {x1 - x0:.3f} x {y1 - y0:.3f} um")
+        return True
+
     def prepare_gds_merge(self) -> bool:
         """Prepare files for GDS merge."""
         try:
@@ -143,56 +226,205 @@ main_layout.write(output_file)
             
             output_file = output_dir / 'simple_arm_merged.gds'
             
-            return self.gds_handler.merge_gds_files(input_files, output_file)
+            return self.gds_handler.merge_gds_files(
+                input_files,
+                output_file,
+                method=self.config.get('merge_method', 'native'),
+                top_cell=self.config.get('top_cell')
+            )
             
         except Exception as e:
             self.logger.error(f"Error merging GDS files: {str(e)}")
             return False
 
+    def top_cell(self, gds_file: Path) -> str:
+        """Configured top cell, or the single top cell of ``gds_file``."""
+        if self.config.get('top_cell'):
+            return self.config['top_cell']
+        top_cells = self.gds_handler.get_top_cells(gds_file)
+        if len(top_cells) != 1:
+            raise ValueError(f"{gds_file} has top cells {top_cells}, set top_cell in the config")
+        return top_cells[0]
+
+    def _drc_script(self, gds_file: Path, top_cell: str,
+                    checks: List[Tuple[Path, Optional[List[float]]]]) -> str:
+        """Magic DRC script writing one rule header followed by its boxes in microns.
+
+        The layout is read once, then every ``(report, window)`` of ``checks``
+        is checked and written in turn. A ``window`` in microns limits the
+        check and the listing to that area; None checks the whole top cell.
+        """
+        steps = []
+        for report, window in checks:
+            if window is None:
+                steps.append("select top cell")
+            else:
+                steps.append(f"box values {window[0]}um {window[1]}um {window[2]}um {window[3]}um")
+            steps.append(f"drc check\ndrc catchup\nwrite_drc_report {report}")
+        areas = "\n".join(steps)
+        return f"""
+proc write_drc_report {{report}} {{
+    set oscale [cif scale out]
+    set fout [open $report w]
+    puts $fout "{top_cell}"
+    puts $fout "----------------------------------------"
+    foreach {{errtype coordlist}} [drc listall why] {{
+        puts $fout $errtype
+        puts $fout "----------------------------------------"
+        foreach coord $coordlist {{
+            set bllx [expr {{$oscale * [lindex $coord 0]}}]
+            set blly [expr {{$oscale * [lindex $coord 1]}}]
+            set burx [expr {{$oscale * [lindex $coord 2]}}]
+            set bury [expr {{$oscale * [lindex $coord 3]}}]
+            puts $fout [format " %.3f %.3f %.3f %.3f" $bllx $blly $burx $bury]
+        }}
+        puts $fout "----------------------------------------"
+    }}
+    puts $fout "COUNT: [drc list count total]"
+    close $fout
+}}
+drc off
+gds read {gds_file}
+load {top_cell}
+drc euclidean on
+drc style drc(full)
+{areas}
+quit -noprompt
+"""
+
+    def _magic_command(self, script_file: Path) -> List:
+        return ['magic', '-dnull', '-noconsole', '-rcfile', self.config['magic_rc'], script_file]
+
     def run_drc(self, gds_file: Path) -> bool:
         """Run DRC on merged GDS."""
         try:
+            if self.config.get('drc_mode', 'full') == 'tiled':
+                return self.run_tiled_drc(gds_file)
+
             output_dir = Path(self.config['output_dir'])
-            
-            # Create Magic DRC script
-            drc_script = f"""
-drc style drc(full)
-drc euclidean on
-drc count total
-load {gds_file}
-select top cell
-drc check
-drc catchup
-drc stats
-drc why
-save {output_dir}/drc.log
-quit -noprompt
-"""
-            
+            drc_script = self._drc_script(gds_file, self.top_cell(gds_file), [(output_dir / 'drc.log', None)])
             drc_script_file = output_dir / 'run_drc.tcl'
             self.file_handler.write_file(drc_script, drc_script_file)
             
             # Run Magic DRC
-            return self.file_handler.execute_command([
-                'magic',
-                '-dnull',
-                '-noconsole',
-                '-rcfile', self.config['magic_rc'],
-                drc_script_file
-            ])
+            return self.file_handler.execute_command(
+                self._magic_command(drc_script_file),
+                timeout=self.config.get('command_timeout'), name='drc')
             
         except Exception as e:
             self.logger.error(f"Error running DRC: {str(e)}")
             return False
 
+    def drc_peak_mb(self) -> Optional[float]:
+        """Largest peak RSS of an earlier Magic DRC run, from the command profile."""
+        peaks = []
+        try:
+            with open(self.file_handler.command_profile, 'r') as f:
+                for line in f:
+                    entry = json.loads(line)
+                    if str(entry.get('name', '')).startswith('drc') and entry.get('max_rss_mb'):
+                        peaks.append(entry['max_rss_mb'])
+        except (OSError, ValueError):
+            pass
+        return max(peaks) if peaks else None
+
+    def run_tiled_drc(self, gds_file: Path) -> bool:
+        """Run DRC as overlapping windows over the top cell on parallel Magic processes.
+
+        Each tile checks its window, its core plus a halo on every side. A
+        violation belongs to the tile whose core contains its center, so one
+        found by several windows is kept once; the halo must exceed the
+        largest rule interaction distance. The kept violations are merged
+        into drc.log and drc_violations.json.
+
+        Every Magic process holds the whole layout, so each reads it once
+        and then checks ``drc_tiles_per_job`` windows in turn; peak memory
+        is the number of processes times one full DRC run. More processes
+        finish sooner but cost that much more memory. With ``drc_memory_mb``
+        set, the process count is capped so that many earlier DRC peaks,
+        taken from the command profile, fit the budget.
+        """
+        try:
+            output_dir = Path(self.config['output_dir'])
+            top_cell = self.top_cell(gds_file)
+            bbox = GDSAnalyzer(self.gds_handler).analyze(gds_file)['cells'][top_cell]['bbox_um']
+            if bbox is None:
+                self.logger.error(f"Top cell {top_cell} is empty, nothing to check")
+                return False
+
+            jobs = self.config.get('drc_jobs') or os.cpu_count() or 1
+            budget = self.config.get('drc_memory_mb')
+            peak = self.drc_peak_mb() if budget else None
+            if peak:
+                jobs = max(1, min(jobs, int(budget // peak)))
+                self.logger.info(f"DRC peaked at {peak:.0f} MB before, running {jobs} processes "
+                                 f"within {budget} MB")
+            tiles = plan_drc_tiles(bbox, jobs * self.config.get('drc_tiles_per_job', 4),
+                                   self.config.get('drc_halo_um', 10.0),
+                                   self.config.get('drc_min_tile_um', 100.0))
+            jobs = min(jobs, len(tiles))
+            self.logger.info(f"Tiled DRC of {top_cell}: {len(tiles)} windows on {jobs} processes")
+
+            tile_dir = output_dir / 'drc_tiles'
+            tile_dir.mkdir(parents=True, exist_ok=True)
+            # Neighbouring windows stay on one process
+            size = math.ceil(len(tiles) / jobs)
+            batches = [tiles[i:i + size] for i in range(0, len(tiles), size)]
+            with ThreadPoolExecutor(max_workers=len(batches), thread_name_prefix='drc') as pool:
+                futures = {}
+                for worker, batch in enumerate(batches):
+                    script_file = tile_dir / f"drc_worker_{worker}.tcl"
+                    self.file_handler.write_file(
+                        self._drc_script(gds_file, top_cell,
+                                         [(tile_dir / f"{tile['name']}.log", tile['window']) for tile in batch]),
+                        script_file)
+                    futures[worker] = pool.submit(
+                        self.file_handler.execute_command, self._magic_command(script_file),
+                        None, self.config.get('command_timeout'), f"drc_worker_{worker}")
+                failed = [tile['name'] for worker, future in futures.items() if not future.result()
+                          for tile in batches[worker]]
+            if failed:
+                self.logger.error(f"DRC failed in {len(failed)} tiles: {', '.join(failed)}")
+                return False
+
+            violations: Dict[str, List[List[float]]] = {}
+            seen = set()
+            found = 0
+            for tile in tiles:
+                for _, rule, box in parse_drc_report(tile_dir / f"{tile['name']}.log"):
+                    found += 1
+                    if not tile_owns(tile, box) or (rule, tuple(box)) in seen:
+                        continue
+                    seen.add((rule, tuple(box)))
+                    violations.setdefault(rule, []).append(box)
+
+            write_drc_report(output_dir / 'drc.log', top_cell, violations)
+            total = sum(len(boxes) for boxes in violations.values())
+            self.file_handler.save_json({
+                'top_cell': top_cell,
+                'bbox_um': bbox,
+                'tiles': tiles,
+                'count': total,
+                'violations': violations,
+            }, output_dir / 'drc_violations.json')
+            self.logger.info(f"Tiled DRC found {total} violations in {len(violations)} rules "
+                             f"({found - total} duplicates from overlapping windows dropped)")
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"Error running tiled DRC: {str(e)}")
+            return False
+
     def run_lvs(self, gds_file: Path) -> bool:
         """Run LVS on merged GDS."""
         try:
             output_dir = Path(self.config['output_dir'])
             
             # Extract netlist from GDS
+            top_cell = self.top_cell(gds_file)
             extract_script = f"""
-load {gds_file}
+gds read {gds_file}
+load {top_cell}
 extract all
 ext2spice hierarchy on
 ext2spice scale off
@@ -201,7 +433,7 @@ ext2spice rthresh 0
 ext2spice blackbox on
 ext2spice subcircuit top on
 ext2spice global off
-ext2spice
+ext2spice -o {output_dir}/simple_arm_merged.spice
 quit -noprompt
 """
             
@@ -215,62 +447,227 @@ quit -noprompt
                 '-noconsole',
                 '-rcfile', self.config['magic_rc'],
                 extract_script_file
-            ]):
+            ], timeout=self.config.get('command_timeout'), name='extract'):
                 return False
             
             # Run Netgen LVS
             return self.file_handler.execute_command([
                 'netgen',
                 '-batch', 'lvs',
-                f"{output_dir}/simple_arm_merged.spice",
-                self.config['reference_netlist'],
+                f"{output_dir}/simple_arm_merged.spice {top_cell}",
+                f"{self.config['reference_netlist']} {top_cell}",
                 self.config['netgen_setup'],
-                '-o', f"{output_dir}/lvs_report.txt"
-            ])
+                f"{output_dir}/lvs_report.txt"
+            ], timeout=self.config.get('command_timeout'), name='lvs')
             
         except Exception as e:
             self.logger.error(f"Error running LVS: {str(e)}")
             return False
 
-    def create_final_gds(self) -> bool:
-        """Create final GDS with cell abstracts."""
+    def index_signoff_reports(self) -> bool:
+        """Index the DRC and LVS reports into signoff.db and summarize them.
+
+        With ``signoff_baseline`` set to the signoff.db of an earlier run,
+        the violations and mismatches added and fixed since are written to
+        signoff_diff.json as well.
+        """
         try:
             output_dir = Path(self.config['output_dir'])
-            merged_gds = output_dir / 'simple_arm_merged.gds'
-            
-            # Create final GDS script
-            final_script = f"""
-load {merged_gds}
-flatten top_cell
-select top_cell
+            with SignoffStore(output_dir / 'signoff.db', self.config.get('drc_bin_um', 50.0)) as store:
+                if self.config.get('run_drc', True):
+                    store.load_drc(output_dir / 'drc.log')
+                if self.config.get('run_lvs', True):
+                    store.load_lvs(output_dir / 'lvs_report.txt')
+
+                summary = store.summary()
+                for rule, count in summary['drc']['by_rule'].items():
+                    self.logger.info(f"DRC {rule}: {count}")
+                self.logger.info(f"DRC violations: {summary['drc']['count']}, "
+                                 f"LVS: {summary['lvs']['result'] or 'no result'} {summary['lvs']['by_kind']}")
+                if not self.file_handler.save_json(summary, output_dir / 'signoff_summary.json'):
+                    return False
+
+                baseline = self.config.get('signoff_baseline')
+                if baseline:
+                    diff = store.diff(baseline)
+                    self.logger.info(f"Since {baseline}: {sum(diff['drc']['new'].values())} new and "
+                                     f"{sum(diff['drc']['fixed'].values())} fixed DRC violations, "
+                                     f"{len(diff['lvs']['new'])} new and {len(diff['lvs']['fixed'])} "
+                                     f"fixed LVS mismatches")
+                    return self.file_handler.save_json(diff, output_dir / 'signoff_diff.json')
+            return True
+
+        except Exception as e:
+            self.logger.error(f"Error indexing signoff reports: {str(e)}")
+            return False
+
+    def _final_gds_script(self, merged_gds: Path, top_cell: str, output_gds: Path, mode: str) -> str:
+        """Magic script writing the final GDS, either keeping or flattening the hierarchy."""
+        if mode == 'hierarchical':
+            # Read-only cells are written back from their original GDS data, so
+            # the SRAM macro and standard cells stay instances and are never
+            # rebuilt in Magic's database
+            return f"""
+drc off
+gds readonly true
+gds rescale false
+gds read {merged_gds}
+load {top_cell}
+gds write {output_gds}
+quit -noprompt
+"""
+        if mode == 'flatten':
+            return f"""
+drc off
+gds read {merged_gds}
+load {top_cell}
+flatten {top_cell}_flat
+load {top_cell}_flat
+cellname delete {top_cell}
+cellname rename {top_cell}_flat {top_cell}
+select top cell
 expand
 extract all
-writeall force {output_dir}/simple_arm_final.gds
+gds write {output_gds}
 quit -noprompt
 """
-            
-            final_script_file = output_dir / 'create_final.tcl'
-            self.file_handler.write_file(final_script, final_script_file)
-            
-            # Run Magic
-            success = self.file_handler.execute_command([
-                'magic',
-                '-dnull',
-                '-noconsole',
-                '-rcfile', self.config['magic_rc'],
-                final_script_file
-            ])
+        raise ValueError(f"Unknown final GDS mode {mode}, expected hierarchical or flatten")
+
+    def write_final_gds(self, output_gds: Path, mode: str, name: str = 'final_gds') -> bool:
+        """Write the merged layout to ``output_gds`` with Magic in the given mode."""
+        output_dir = Path(self.config['output_dir'])
+        merged_gds = output_dir / 'simple_arm_merged.gds'
+        script_file = output_gds.parent / f'create_final_{mode}.tcl'
+        self.file_handler.write_file(
+            self._final_gds_script(merged_gds, self.top_cell(merged_gds), output_gds, mode), script_file)
+        return self.file_handler.execute_command(
+            self._magic_command(script_file), timeout=self.config.get('command_timeout'), name=name)
+
+    def create_final_gds(self) -> bool:
+        """Create final GDS, hierarchical unless ``final_gds_mode`` is flatten."""
+        try:
+            output_dir = Path(self.config['output_dir'])
+            mode = self.config.get('final_gds_mode', 'hierarchical')
+            success = self.write_final_gds(output_dir / 'simple_arm_final.gds', mode)
 
             if success:
-                self.logger.info("Final GDS creation completed successfully")
+                self.logger.info(f"Final GDS creation completed successfully ({mode})")
             return success
             
         except Exception as e:
             self.logger.error(f"Error creating final GDS: {str(e)}")
             return False
 
+    def compare_final_gds(self) -> bool:
+        """Write the final GDS both ways and compare runtime, peak memory and size.
+
+        Outputs go to final_compare/ and the comparison to
+        final_gds_comparison.json, leaving simple_arm_final.gds alone.
+        """
+        try:
+            output_dir = Path(self.config['output_dir'])
+            compare_dir = output_dir / 'final_compare'
+            compare_dir.mkdir(parents=True, exist_ok=True)
+
+            results = {}
+            for mode in ('hierarchical', 'flatten'):
+                output_gds = compare_dir / f'simple_arm_final_{mode}.gds'
+                name = f'final_gds_{mode}'
+                success = self.write_final_gds(output_gds, mode, name)
+                profile = next((entry for entry in reversed(self.file_handler.command_profiles)
+                                if entry['name'] == name), {})
+                result = {
+                    'success': success,
+                    'gds': str(output_gds),
+                    'wall_s': profile.get('wall_s'),
+                    'cpu_s': round(profile['user_s'] + profile['sys_s'], 3) if profile else None,
+                    'max_rss_mb': profile.get('max_rss_mb'),
+                    'size_bytes': None,
+                    'cells': None,
+                    'polygons': None,
+                }
+                if success and output_gds.exists():
+                    report = GDSAnalyzer(self.gds_handler).analyze(output_gds)
+                    result['size_bytes'] = output_gds.stat().st_size
+                    result['cells'] = len(report['cells'])
+                    result['polygons'] = sum(cell['polygons'] for cell in report['cells'].values())
+                results[mode] = result
+
+            comparison = {'modes': results}
+            hier, flat = results['hierarchical'], results['flatten']
+            ratios = {}
+            for key in ('wall_s', 'max_rss_mb', 'size_bytes'):
+                if hier[key] and flat[key]:
+                    ratios[key] = round(flat[key] / hier[key], 2)
+            comparison['flatten_over_hierarchical'] = ratios
+            if not self.file_handler.save_json(comparison, output_dir / 'final_gds_comparison.json'):
+                return False
+
+            self.logger.info(f"{'mode':14} {'time s':>8} {'peak MB':>8} {'bytes':>12} {'cells':>7} {'polygons':>10}")
+            for mode, result in results.items():
+                values = [result[key] for key in ('wall_s', 'max_rss_mb', 'size_bytes', 'cells', 'polygons')]
+                self.logger.info(f"{mode:14} " + ' '.join(
+                    f"{'-' if v is None else v:>{w}}" for v, w in zip(values, (8, 8, 12, 7, 10))))
+            self.logger.info(f"Flattening costs {ratios} times the hierarchical run")
+            return hier['success'] and flat['success']
+
+        except Exception as e:
+            self.logger.error(f"Error comparing final GDS modes: {str(e)}")
+            return False
+
+    def build_pipeline(self) -> TaskGraph:
+        """Stage graph of the flow: merge, then DRC and LVS side by side, then final GDS."""
+        output_dir = Path(self.config['output_dir'])
+        merged_gds = output_dir / 'simple_arm_merged.gds'
+        input_gds = [self.config['core_gds'], self.config['sram_gds']] + list(self.config.get('additional_gds', []))
+        magic_params = {'magic_rc': self.config['magic_rc'], 'magic': self.file_handler.resolve_tool('magic')}
+
+        graph = TaskGraph(output_dir / '.flow_state.json',
+                          jobs=self.config.get('stage_jobs', 2),
+                          digest=self.file_handler.artifacts.digest)
+        graph.add('prepare_merge', self.prepare_gds_merge,
+                  outputs=[output_dir / 'merge_gds.rb'])
+        graph.add('merge', self.merge_gds_files, deps=['prepare_merge'],
+                  inputs=input_gds, outputs=[merged_gds],
+                  params={'merge_method': self.config.get('merge_method', 'native'),
+                          'top_cell': self.config.get('top_cell'),
+                          'klayout': self.file_handler.resolve_tool('klayout')})
+
+        checks = []
+        if self.config.get('run_drc', True):
+            graph.add('drc', self.run_drc, merged_gds, deps=['merge'],
+                      inputs=[merged_gds, self.config['magic_rc']],
+                      outputs=[output_dir / 'drc.log'],
+                      params=dict(magic_params, **{key: self.config.get(key) for key in (
+                          'drc_mode', 'drc_jobs', 'drc_tiles_per_job', 'drc_halo_um', 'drc_min_tile_um',
+                          'drc_memory_mb')}))
+            checks.append('drc')
+        if self.config.get('run_lvs', True):
+            graph.add('lvs', self.run_lvs, merged_gds, deps=['merge'],
+                      inputs=[merged_gds, self.config['magic_rc'],
+                              self.config['reference_netlist'], self.config['netgen_setup']],
+                      outputs=[output_dir / 'lvs_report.txt'],
+                      params=dict(magic_params, netgen=self.file_handler.resolve_tool('netgen')))
+            checks.append('lvs')
+
+        if checks:
+            reports = [output_dir / name for name, task in (('drc.log', 'drc'), ('lvs_report.txt', 'lvs'))
+                       if task in checks]
+            baseline = self.config.get('signoff_baseline')
+            graph.add('signoff', self.index_signoff_reports, deps=checks,
+                      inputs=reports + ([Path(baseline)] if baseline else []),
+                      outputs=[output_dir / 'signoff_summary.json'],
+                      params={'drc_bin_um': self.config.get('drc_bin_um', 50.0), 'baseline': baseline})
+
+        # Only sign off a final GDS whose merged layout passed the enabled checks
+        graph.add('final', self.create_final_gds, deps=['merge'] + checks,
+                  inputs=[merged_gds, self.config['magic_rc']],
+                  outputs=[output_dir / 'simple_arm_final.gds'],
+                  params=dict(magic_params, final_gds_mode=self.config.get('final_gds_mode', 'hierarchical')))
+        return graph
+
     def run(self) -> bool:
-        """Run complete GDS creation flow."""
+        """Run complete GDS creation flow, skipping stages that are up to date."""
         try:
             self.logger.info("Starting GDS creation")
             
@@ -282,27 +679,13 @@ quit -noprompt
             output_dir = Path(self.config['output_dir'])
             output_dir.mkdir(parents=True, exist_ok=True)
             
-            # Prepare GDS merge
-            if not self.prepare_gds_merge():
-                return False
-                
-            # Merge GDS files
-            if not self.merge_gds_files():
-                return False
-                
-            # Run DRC on merged GDS
-            merged_gds = output_dir / 'simple_arm_merged.gds'
-            if self.config.get('run_drc', True):
-                if not self.run_drc(merged_gds):
-                    return False
-                    
-            # Run LVS on merged GDS
-            if self.config.get('run_lvs', True):
-                if not self.run_lvs(merged_gds):
-                    return False
-                    
-            # Create final GDS
-            if not self.create_final_gds():
+            graph = self.build_pipeline()
+            if self.config.get('force', False):
+                for task in graph.tasks.values():
+                    task.always_run = True
+            status = graph.run()
+            self.logger.info("Stages: " + ", ".join(f"{name} {state}" for name, state in status.items()))
+            if not graph.succeeded(status):
                 return False
                 
             self.logger.info("GDS creation completed successfully")
@@ -313,34 +696,19 @@ quit -noprompt
             return False
 
     def generate_reports(self) -> bool:
-        """Generate summary reports."""
+        """Generate area and hierarchy reports straight from the final GDS."""
         try:
             output_dir = Path(self.config['output_dir'])
             final_gds = output_dir / 'simple_arm_final.gds'
-            
-            # Generate area report
-            area_script = f"""
-load {final_gds}
-box
-puts "Total cell area: [box area]"
-quit -noprompt
-"""
-            area_script_file = output_dir / 'area_report.tcl'
-            self.file_handler.write_file(area_script, area_script_file)
-            self.file_handler.execute_command(['magic', '-dnull', '-noconsole', area_script_file])
-            
-            # Generate hierarchy report
-            hier_script = f"""
-load {final_gds}
-expand
-puts "Cell hierarchy:"
-cellname list
-quit -noprompt
-"""
-            hier_script_file = output_dir / 'hierarchy_report.tcl'
-            self.file_handler.write_file(hier_script, hier_script_file)
-            self.file_handler.execute_command(['magic', '-dnull', '-noconsole', hier_script_file])
-            
+
+            report = GDSAnalyzer(self.gds_handler).analyze(final_gds)
+            if not self.file_handler.save_json(report, output_dir / 'gds_report.json'):
+                return False
+
+            for top, info in report['top_cells'].items():
+                self.logger.info(f"Top cell {top}: bbox {info['bbox_um']} um, area {info['area_um2']:.2f} um^2")
+            self.logger.info(f"{len(report['cells'])} cells, {len(report['layers'])} layers, "
+                             f"report written to {output_dir / 'gds_report.json'}")
             return True
             
         except Exception as e:
@@ -352,8 +720,17 @@ def main():
     parser.add_argument("--config", required=True, help="Configuration file (JSON or YAML)")
     parser.add_argument("--output-dir", help="Output directory")
     parser.add_argument("--skip-drc", action="store_true", help="Skip DRC checks")
+    parser.add_argument("--drc-mode", choices=["full", "tiled"], help="Check the whole layout at once or in parallel tiles")
+    parser.add_argument("--drc-jobs", type=int, help="Parallel Magic processes for tiled DRC")
+    parser.add_argument("--signoff-baseline", help="signoff.db of an earlier run to diff DRC/LVS results against")
     parser.add_argument("--skip-lvs", action="store_true", help="Skip LVS checks")
     parser.add_argument("--no-reports", action="store_true", help="Skip report generation")
+    parser.add_argument("--merge-method", choices=["native", "klayout"], help="GDS merge implementation")
+    parser.add_argument("--final-mode", choices=["hierarchical", "flatten"],
+                        help="Keep the SRAM and standard cells as instances or flatten the final GDS")
+    parser.add_argument("--compare-final", action="store_true",
+                        help="Also write the final GDS both ways and compare time, memory and size")
+    parser.add_argument("--force", action="store_true", help="Rerun every stage even if up to date")
     
     args = parser.parse_args()
     
@@ -365,8 +742,20 @@ def main():
         creator.config['output_dir'] = args.output_dir
     if args.skip_drc:
         creator.config['run_drc'] = False
+    if args.drc_mode:
+        creator.config['drc_mode'] = args.drc_mode
+    if args.drc_jobs:
+        creator.config['drc_jobs'] = args.drc_jobs
+    if args.signoff_baseline:
+        creator.config['signoff_baseline'] = args.signoff_baseline
     if args.skip_lvs:
         creator.config['run_lvs'] = False
+    if args.merge_method:
+        creator.config['merge_method'] = args.merge_method
+    if args.force:
+        creator.config['force'] = True
+    if args.final_mode:
+        creator.config['final_gds_mode'] = args.final_mode
     
     # Run GDS creation
     success = creator.run()
@@ -374,6 +763,8 @@ def main():
     # Generate reports
     if success and not args.no_reports:
         creator.generate_reports()
+    if success and args.compare_final:
+        success = creator.compare_final_gds()
     
     sys.exit(0 if success else 1)
 
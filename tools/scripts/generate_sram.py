@@ -9,21 +9,38 @@ import os
 import sys
 import argparse
 import logging
+import re
+import csv
+import time
 import shutil
+import itertools
+import multiprocessing
+import hashlib
+import subprocess
+import math
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, Union
 import yaml
 import json
+import numpy as np
 from datetime import datetime
-from file_handlers import FileHandler, LEFFileHandler
+from file_handlers import FileHandler, GDSFileHandler, LEFFileHandler, ArtifactStore, user_cache_dir
+from task_graph import TaskGraph
+from gds_analysis import GDSAnalyzer
 
 class SRAMGenerator:
     """Generate SRAM using OpenRAM."""
     
-    def __init__(self, config_file: str):
-        """Initialize with configuration file."""
+    def __init__(self, config_file: str, overrides: Optional[Dict] = None):
+        """Initialize with configuration file.
+
+        ``overrides`` replace file settings before anything uses them, so
+        an ``output_dir`` given here also holds the artifacts and logs.
+        """
         self.config_file = config_file
         self.config = self._load_config()
+        self.config.update(overrides or {})
         self.file_handler = FileHandler(self.config.get('output_dir', '.'))
         self.lef_handler = LEFFileHandler(self.config.get('output_dir', '.'))
         self.setup_logging()
@@ -108,6 +125,24 @@ class SRAMGenerator:
 
         return True
 
+    def openram_parameters(self) -> Dict:
+        """Normalized parameters that determine the OpenRAM outputs."""
+        return {
+            'process': str(self.config['process']),
+            'voltage': float(self.config['voltage']),
+            'temp': float(self.config['temp']),
+            'num_words': int(self.config['num_words']),
+            'word_size': int(self.config['word_size']),
+            'num_banks': int(self.config['num_banks']),
+            'custom_cells': list(self.config.get('custom_cells', [])),
+            'check_lvsdrc': bool(self.config.get('check_lvsdrc', True)),
+            'frequency': float(self.config.get('frequency', 100e6)),
+            'process_corners': sorted({c['process'] for c in self.pvt_corners()}),
+            'supply_voltages': sorted({c['voltage'] for c in self.pvt_corners()}),
+            'temperatures': sorted({c['temp'] for c in self.pvt_corners()}),
+            'output_name': self.config.get('ram_name', 'sky130_sram_8kx32')
+        }
+
     def generate_openram_config(self) -> Optional[Path]:
         """Generate OpenRAM configuration file."""
         try:
@@ -115,9 +150,9 @@ class SRAMGenerator:
 ### OpenRAM SRAM Configuration ###
 # Technology parameters
 tech_name = "{process}"
-process_corners = ["TT"]
-supply_voltages = {voltage}
-temperatures = {temp}
+process_corners = {process_corners}
+supply_voltages = {supply_voltages}
+temperatures = {temperatures}
 
 # SRAM organization parameters
 num_words = {num_words}
@@ -153,18 +188,7 @@ output_datasheet = True
 output_name = "{output_name}"
             """
             
-            config = config_template.format(
-                process=self.config['process'],
-                voltage=self.config['voltage'],
-                temp=self.config['temp'],
-                num_words=self.config['num_words'],
-                word_size=self.config['word_size'],
-                num_banks=self.config['num_banks'],
-                custom_cells=self.config.get('custom_cells', []),
-                check_lvsdrc=self.config.get('check_lvsdrc', True),
-                frequency=self.config.get('frequency', 100e6),
-                output_name=self.config.get('ram_name', 'sky130_sram_8kx32')
-            )
+            config = config_template.format(**self.openram_parameters())
             
             output_dir = Path(self.config['output_dir'])
             config_file = output_dir / 'openram_config.py'
@@ -192,106 +216,222 @@ output_name = "{output_name}"
             if self.config.get('num_threads'):
                 command.extend(['-t', str(self.config['num_threads'])])
             
-            return self.file_handler.execute_command(command)
+            return self.file_handler.execute_command(command, timeout=self.config.get('command_timeout'),
+                                                     name='openram')
             
         except Exception as e:
             self.logger.error(f"Error running OpenRAM: {str(e)}")
             return False
 
+    def openram_version(self) -> str:
+        """Identify the OpenRAM installation: git revision, VERSION file or script stamp."""
+        openram_home = Path(os.environ['OPENRAM_HOME'])
+        try:
+            result = subprocess.run(['git', '-C', str(openram_home), 'rev-parse', 'HEAD'],
+                                    capture_output=True, text=True, timeout=30)
+            if result.returncode == 0:
+                return result.stdout.strip()
+        except (OSError, subprocess.TimeoutExpired):
+            pass
+        for version_file in (openram_home / 'VERSION', openram_home.parent / 'VERSION'):
+            if version_file.exists():
+                return version_file.read_text().strip()
+        stat = (openram_home / 'openram.py').stat()
+        return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+    def openram_cache_key(self) -> str:
+        """Hash of the normalized SRAM parameters, technology and OpenRAM version."""
+        digest = hashlib.sha256()
+        digest.update(json.dumps(self.openram_parameters(), sort_keys=True).encode())
+        digest.update(os.environ['OPENRAM_TECH'].encode())
+        digest.update(self.openram_version().encode())
+        return digest.hexdigest()[:24]
+
+    def _openram_cache(self) -> ArtifactStore:
+        cache_dir = Path(self.config.get('openram_cache_dir', user_cache_dir() / 'openram'))
+        return ArtifactStore(cache_dir, int(self.config.get('openram_cache_limit_gb', 50) * (1 << 30)))
+
+    def restore_openram_outputs(self, key: str) -> bool:
+        """Restore a previous OpenRAM run with the same key into sram_output/."""
+        try:
+            store = self._openram_cache()
+            manifest_file = store.root / 'runs' / f'{key}.json'
+            if not manifest_file.exists():
+                return False
+            with open(manifest_file, 'r') as f:
+                manifest = json.load(f)
+            if not all(store.object_path(digest).exists() for digest in manifest['files'].values()):
+                self.logger.info(f"OpenRAM cache entry {key} was partly evicted")
+                return False
+
+            output_dir = Path(self.config['output_dir']) / 'sram_output'
+            for file_name, digest in manifest['files'].items():
+                store.materialize(digest, output_dir / file_name)
+            self.logger.info(f"Restored {len(manifest['files'])} OpenRAM outputs from cache entry {key}")
+            return True
+
+        except Exception as e:
+            self.logger.warning(f"Could not restore OpenRAM outputs from cache: {str(e)}")
+            return False
+
+    def save_openram_outputs(self, key: str, since: float) -> bool:
+        """Store the files OpenRAM wrote to sram_output/ after ``since`` under ``key``."""
+        try:
+            store = self._openram_cache()
+            output_dir = Path(self.config['output_dir']) / 'sram_output'
+            files = {path.name: store.put(path)
+                     for path in sorted(output_dir.iterdir())
+                     if path.is_file() and path.stat().st_mtime >= since}
+
+            manifest_file = store.root / 'runs' / f'{key}.json'
+            manifest_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = manifest_file.with_suffix('.tmp')
+            with open(tmp_file, 'w') as f:
+                json.dump({'parameters': self.openram_parameters(), 'files': files}, f, indent=2)
+            tmp_file.replace(manifest_file)
+            self.logger.info(f"Cached {len(files)} OpenRAM outputs as {key}")
+            return True
+
+        except Exception as e:
+            self.logger.warning(f"Could not cache OpenRAM outputs: {str(e)}")
+            return False
+
     def generate_views(self) -> bool:
-        """Generate various views (Verilog, LEF, Liberty) from GDS."""
+        """Generate various views (Verilog, LEF, Liberty) from GDS.
+
+        Views are tasks of a dependency graph: the Python views run alongside
+        the Magic ones, a failing view fails the flow, and views whose inputs
+        and settings are unchanged since the last run are skipped.
+        """
         try:
             output_dir = Path(self.config['output_dir']) / 'sram_output'
             ram_name = self.config.get('ram_name', 'sky130_sram_8kx32')
-            
-            # Generate LEF
-            lef_script = f"""
-lef write {output_dir}/{ram_name}.lef -hide_empty_pins
-            """
-            self._run_magic_script(lef_script, "generate_lef.tcl")
-            
-            # Generate Liberty timing file
-            self._generate_liberty_file(output_dir, ram_name)
-            
-            # Generate Verilog model
-            self._generate_verilog_model(output_dir, ram_name)
-            
-            # Generate CDL netlist
-            self._generate_cdl(output_dir, ram_name)
-            
-            return True
+            gds_file = output_dir / f'{ram_name}.gds'
+            magic_params = {'magic_rc': self.config['magic_rc'],
+                            'magic': self.file_handler.resolve_tool('magic')}
+            timing_params = {key: self.config.get(key) for key in ('temp', 'voltage', 'num_words', 'word_size')}
+
+            graph = TaskGraph(output_dir / '.views_state.json',
+                              jobs=self.config.get('view_jobs', 4),
+                              digest=self.file_handler.artifacts.digest)
+            graph.add('lef', self._generate_lef, output_dir, ram_name,
+                      inputs=[gds_file], outputs=[output_dir / f'{ram_name}.lef'],
+                      params=magic_params)
+            liberty_params = dict(timing_params, corners=self.pvt_corners(), **{
+                key: self.config.get(key) for key in ('num_banks', 'liberty_slews', 'liberty_loads', 'liberty_model')})
+            characterized = self.characterized_liberty(output_dir, ram_name)
+            graph.add('liberty', self._generate_liberty_file, output_dir, ram_name,
+                      inputs=[characterized] if characterized is not None else [],
+                      outputs=self.liberty_files(output_dir, ram_name),
+                      params=liberty_params)
+            graph.add('verilog', self._generate_verilog_model, output_dir, ram_name,
+                      outputs=[output_dir / f'{ram_name}.v'],
+                      params=timing_params)
+            graph.add('cdl', self._generate_cdl, output_dir, ram_name,
+                      inputs=[gds_file], outputs=[output_dir / f'{ram_name}.cdl'],
+                      params=magic_params)
+
+            status = graph.run()
+            self.logger.info("View generation: " + ", ".join(f"{name} {state}" for name, state in status.items()))
+            return graph.succeeded(status)
             
         except Exception as e:
             self.logger.error(f"Error generating views: {str(e)}")
             return False
 
-    def _generate_liberty_file(self, output_dir: Path, ram_name: str):
-        """Generate Liberty timing file."""
-        liberty_template = """
-library({ram_name}) {{
-    delay_model : "table_lookup";
-    time_unit : "1ns";
-    voltage_unit : "1V";
-    current_unit : "1mA";
-    resistance_unit : "1kohm";
-    capacitive_load_unit(1,pf);
-    
-    nom_process : 1.0;
-    nom_temperature : {temp};
-    nom_voltage : {voltage};
-    
-    operating_conditions(typical) {{
-        process : 1.0;
-        temperature : {temp};
-        voltage : {voltage};
-    }}
-    
-    cell({ram_name}) {{
-        memory() {{
-            type : ram;
-            address_width : {addr_width};
-            word_width : {word_size};
-        }}
-        
-        interface_timing : true;
-        pin(clk0) {{
-            direction : input;
-            clock : true;
-            max_transition : 0.15;
-        }}
-        
-        pin(csb0) {{
-            direction : input;
-            timing() {{
-                related_pin : "clk0";
-                timing_type : setup_rising;
-                rise_constraint(scalar) {{
-                    values("0.200");
-                }}
-                fall_constraint(scalar) {{
-                    values("0.200");
-                }}
-            }}
-        }}
-        
-        // Additional timing constraints...
-    }}
-}}
+    def _generate_lef(self, output_dir: Path, ram_name: str) -> bool:
+        """Generate the LEF abstract with Magic."""
+        lef_script = f"""
+gds read {output_dir}/{ram_name}.gds
+load {ram_name}
+lef write {output_dir}/{ram_name}.lef -hide_empty_pins
+quit -noprompt
         """
-        
-        addr_width = self.config['num_words'].bit_length() - 1
-        liberty_content = liberty_template.format(
-            ram_name=ram_name,
-            temp=self.config['temp'],
-            voltage=self.config['voltage'],
-            addr_width=addr_width,
-            word_size=self.config['word_size']
-        )
-        
-        liberty_file = output_dir / f'{ram_name}.lib'
-        self.file_handler.write_file(liberty_content, liberty_file)
+        # Magic rewrites the file in place, and the old one may be a cache hardlink
+        (output_dir / f'{ram_name}.lef').unlink(missing_ok=True)
+        return self._run_magic_script(lef_script, "generate_lef.tcl")
+
+    def pvt_corners(self) -> List[Dict]:
+        """Process/voltage/temperature grid to characterize, nominal corner first.
+
+        ``process_corners``, ``supply_voltages`` and ``temperatures`` default
+        to the single nominal corner of ``voltage`` and ``temp``.
+        """
+        nominal = {'process': 'TT', 'voltage': float(self.config['voltage']),
+                   'temp': float(self.config['temp'])}
+        corners = [nominal]
+        for process, voltage, temp in itertools.product(
+                self.config.get('process_corners', ['TT']),
+                self.config.get('supply_voltages', [nominal['voltage']]),
+                self.config.get('temperatures', [nominal['temp']])):
+            corner = {'process': str(process).upper(), 'voltage': float(voltage), 'temp': float(temp)}
+            if corner not in corners:
+                corners.append(corner)
+        return corners
+
+    def liberty_files(self, output_dir: Path, ram_name: str) -> List[Path]:
+        """The nominal ``<ram>.lib`` followed by one ``<ram>_nldm_<corner>.lib`` per corner.
+
+        The ``nldm`` tag keeps the modelled views apart from the
+        ``<ram>_<corner>.lib`` files OpenRAM writes when it characterizes.
+        """
+        return [output_dir / f'{ram_name}.lib'] + [output_dir / f'{ram_name}_nldm_{corner_name(c)}.lib'
+                                                    for c in self.pvt_corners()]
+
+    def characterized_liberty(self, output_dir: Path, ram_name: str) -> Optional[Path]:
+        """OpenRAM's own Liberty file for the nominal corner, if it wrote one."""
+        path = output_dir / f'{ram_name}_{corner_name(self.pvt_corners()[0])}.lib'
+        return path if path.exists() else None
 
-    def _generate_verilog_model(self, output_dir: Path, ram_name: str):
+    def _generate_liberty_file(self, output_dir: Path, ram_name: str) -> bool:
+        """Generate NLDM Liberty timing files for every PVT corner.
+
+        Tables for all corners come from one vectorized evaluation of the
+        timing model; the files are then written in parallel on up to
+        ``liberty_jobs`` processes, one per CPU by default, and in-process
+        when ``liberty_jobs`` is 1. The nominal
+        ``<ram>.lib`` is OpenRAM's characterized file when one exists.
+        """
+        corners = self.pvt_corners()
+        slews = np.asarray(self.config.get('liberty_slews', LIBERTY_SLEWS), dtype=np.float64)
+        loads = np.asarray(self.config.get('liberty_loads', LIBERTY_LOADS), dtype=np.float64)
+        model = dict(LIBERTY_MODEL, **self.config.get('liberty_model', {}))
+        cell = {
+            'name': ram_name,
+            'num_words': int(self.config['num_words']),
+            'word_size': int(self.config['word_size']),
+            'addr_width': int(self.config['num_words']).bit_length() - 1,
+        }
+
+        tables = nldm_tables(corners, cell['num_words'], cell['word_size'], int(self.config['num_banks']),
+                             float(self.config['voltage']), slews, loads, model)
+        files = self.liberty_files(output_dir, ram_name)
+        jobs = [(str(path), cell, corner, {name: table[index] for name, table in tables.items()},
+                 slews, loads, model)
+                for path, (index, corner) in zip(files, [(0, corners[0])] + list(enumerate(corners)))]
+
+        characterized = self.characterized_liberty(output_dir, ram_name)
+        if characterized is not None:
+            self.logger.info(f"Using OpenRAM's characterized {characterized.name} as {files[0].name}")
+            tmp_file = files[0].with_name(f'{files[0].name}.{os.getpid()}.tmp')
+            shutil.copyfile(characterized, tmp_file)
+            tmp_file.replace(files[0])
+            jobs = jobs[1:]
+
+        workers = min(len(jobs), self.config.get('liberty_jobs') or os.cpu_count() or 1)
+        if workers > 1:
+            context = multiprocessing.get_context(
+                "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                written = list(pool.map(write_liberty_corner, *zip(*jobs)))
+        else:
+            written = [write_liberty_corner(*job) for job in jobs]
+
+        self.logger.info(f"Wrote {len(corners)} Liberty corners: "
+                         f"{', '.join(corner_name(c) for c in corners)}")
+        return all(written)
+
+    def _generate_verilog_model(self, output_dir: Path, ram_name: str) -> bool:
         """Generate Verilog behavioral model."""
         verilog_template = """
 module {ram_name} (
@@ -330,19 +470,22 @@ endmodule
         )
         
         verilog_file = output_dir / f'{ram_name}.v'
-        self.file_handler.write_file(verilog_content, verilog_file)
+        return self.file_handler.write_file(verilog_content, verilog_file)
 
-    def _generate_cdl(self, output_dir: Path, ram_name: str):
+    def _generate_cdl(self, output_dir: Path, ram_name: str) -> bool:
         """Generate CDL netlist."""
         cdl_script = f"""
+gds read {output_dir}/{ram_name}.gds
+load {ram_name}
 ext2spice hierarchy on
 ext2spice format ngspice
 ext2spice subcircuit top on
 ext2spice global off
 extract all
-ext2spice
+ext2spice -o {output_dir}/{ram_name}.cdl
+quit -noprompt
         """
-        self._run_magic_script(cdl_script, "generate_cdl.tcl")
+        return self._run_magic_script(cdl_script, "generate_cdl.tcl")
 
     def _run_magic_script(self, script_content: str, script_name: str) -> bool:
         """Run Magic script."""
@@ -357,7 +500,7 @@ ext2spice
                 '-noconsole',
                 '-rcfile', self.config['magic_rc'],
                 script_file
-            ])
+            ], timeout=self.config.get('command_timeout'), name=script_file.stem)
             
         except Exception as e:
             self.logger.error(f"Error running Magic script: {str(e)}")
@@ -382,6 +525,32 @@ ext2spice
                 self.logger.error(f"Missing required output file: {file_name}")
                 return False
         
+        return self.verify_lef(output_dir / f'{ram_name}.lef', ram_name)
+
+    def verify_lef(self, lef_file: Path, ram_name: str) -> bool:
+        """Check the generated LEF defines the SRAM macro with its full data bus."""
+        if not self.lef_handler.validate_lef(lef_file):
+            return False
+
+        macro = self.lef_handler.get_macro(lef_file, ram_name)
+        if macro is None:
+            self.logger.error(f"LEF {lef_file} does not define MACRO {ram_name}")
+            return False
+
+        pins = macro['pins']
+        missing = [name for name, pin in pins.items() if not pin['ports']]
+        if missing:
+            self.logger.error(f"Pins without geometry in {ram_name}: {', '.join(sorted(missing))}")
+            return False
+
+        word_size = self.config.get('word_size')
+        data_pins = sum(1 for name in pins if name.startswith('din0['))
+        if word_size and data_pins and data_pins != word_size:
+            self.logger.error(f"{ram_name} has {data_pins} data input pins, expected {word_size}")
+            return False
+
+        width, height = macro['size']
+        self.logger.info(f"LEF macro {ram_name}: {width} x {height} um, {len(pins)} pins")
         return True
 
     def run(self) -> bool:
@@ -402,9 +571,15 @@ ext2spice
             if not config_file:
                 return False
             
-            # Run OpenRAM
-            if not self.run_openram(config_file):
-                return False
+            # Run OpenRAM unless an identical run is cached
+            use_cache = self.config.get('openram_cache', True)
+            cache_key = self.openram_cache_key() if use_cache else None
+            if not (use_cache and self.restore_openram_outputs(cache_key)):
+                started = time.time() - 1
+                if not self.run_openram(config_file):
+                    return False
+                if use_cache:
+                    self.save_openram_outputs(cache_key, started)
             
             # Generate views
             if not self.generate_views():
@@ -421,6 +596,439 @@ ext2spice
             self.logger.error(f"Error in SRAM generation: {str(e)}")
             return False
 
+# NLDM table indices: input transition in ns and output load in pF
+LIBERTY_SLEWS = [0.01, 0.025, 0.05, 0.1, 0.2, 0.4, 0.8]
+LIBERTY_LOADS = [0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05]
+
+# Delay multipliers of the process corners relative to TT
+PROCESS_DERATE = {'TT': 1.0, 'SS': 1.3, 'FF': 0.78, 'SF': 1.05, 'FS': 1.05}
+
+# Coefficients of the analytical SRAM timing model, in ns, pF and kohm at
+# TT and nominal voltage and 25C; override them with liberty_model
+LIBERTY_MODEL = {
+    'vth': 0.45,             # threshold voltage of the alpha-power delay law
+    'alpha': 1.3,            # velocity saturation index
+    'temp_coeff': 0.0012,    # delay increase per degree C
+    'access': 0.6,           # clock to output through the array, before decoding
+    'decode_per_bit': 0.04,  # added per address bit
+    'bitline_per_kword': 0.05,  # added per 1024 words in a bank
+    'clock_slew_gain': 0.3,  # share of the clock transition seen at the output
+    'drive_kohm': 2.0,       # output driver resistance
+    'fall_ratio': 0.9,       # fall to rise delay ratio
+    'transition': 0.02,      # unloaded output transition
+    'setup': 0.15,
+    'hold': 0.05,
+    'clock_cap': 0.02,
+    'input_cap': 0.005,
+    'min_pulse': 0.4,
+}
+
+def corner_name(corner: Dict) -> str:
+    """OpenRAM-style corner name such as ``TT_1p8V_25C``."""
+    name = f"{corner['process']}_{corner['voltage']:g}V_{corner['temp']:g}C"
+    return name.replace('.', 'p').replace('-', 'm')
+
+def nldm_tables(corners: List[Dict], num_words: int, word_size: int, num_banks: int,
+                nominal_voltage: float, slews: np.ndarray, loads: np.ndarray,
+                model: Dict) -> Dict[str, np.ndarray]:
+    """Evaluate the timing model for all corners at once.
+
+    Delay and transition tables are indexed ``[corner, input slew, load]``,
+    setup and hold tables ``[corner, clock slew, data slew]`` and scalars
+    ``[corner]``. Every delay scales with the corner's process derate, an
+    alpha-power voltage law and a linear temperature term.
+    """
+    process = np.array([PROCESS_DERATE.get(c['process'], 1.0) for c in corners])
+    voltage = np.array([c['voltage'] for c in corners])
+    temp = np.array([c['temp'] for c in corners])
+
+    def speed(v):
+        return v / (v - model['vth']) ** model['alpha']
+
+    derate = process * speed(voltage) / speed(nominal_voltage) * (1 + model['temp_coeff'] * (temp - 25.0))
+    d = derate[:, None, None]
+    slew = slews[None, :, None]
+    load = loads[None, None, :]
+    data_slew = slews[None, None, :]
+
+    words_per_bank = num_words / max(num_banks, 1)
+    access = (model['access'] + model['decode_per_bit'] * math.log2(num_words) +
+              model['bitline_per_kword'] * words_per_bank / 1024)
+    cell_rise = d * (access + model['clock_slew_gain'] * slew) + d * model['drive_kohm'] * load
+    rise_transition = d * (model['transition'] + 2.2 * model['drive_kohm'] * load) + 0.1 * slew
+
+    # Wider words load the internal data path and shift the capture window
+    width = 1 + word_size / 256
+    setup = d * (model['setup'] * width + 0.5 * data_slew - 0.2 * slew)
+    hold = d * (model['hold'] + 0.3 * slew - 0.2 * data_slew)
+
+    return {
+        'cell_rise': cell_rise,
+        'cell_fall': cell_rise * model['fall_ratio'],
+        'rise_transition': rise_transition,
+        'fall_transition': rise_transition * model['fall_ratio'],
+        'setup': np.maximum(setup, 0.0),
+        'hold': hold,
+        'min_pulse_width': derate * model['min_pulse'] * width,
+    }
+
+def _liberty_values(table: np.ndarray, indent: str) -> str:
+    """``values(...)`` statement of a table, one quoted row per line."""
+    rows = ['"' + ', '.join(row) + '"' for row in np.char.mod('%.4f', np.atleast_2d(table))]
+    separator = ', \\\n' + indent + '       '
+    return 'values(' + separator.join(rows) + ');'
+
+def render_liberty(cell: Dict, corner: Dict, tables: Dict[str, np.ndarray],
+                   slews: np.ndarray, loads: np.ndarray, model: Dict) -> str:
+    """Liberty text of one corner, with bus-level NLDM timing for every pin."""
+    def index(values: np.ndarray) -> str:
+        return '"' + ', '.join(f"{v:g}" for v in values) + '"'
+
+    out: List[str] = []
+    write = out.append
+    name = cell['name']
+    ind = ' ' * 20
+
+    def constraints(related: str):
+        for check in ('setup', 'hold'):
+            write(f"""            timing() {{
+                related_pin : "{related}";
+                timing_type : {check}_rising;
+                rise_constraint(sram_constraint) {{
+                    {_liberty_values(tables[check], ind)}
+                }}
+                fall_constraint(sram_constraint) {{
+                    {_liberty_values(tables[check], ind)}
+                }}
+            }}
+""")
+
+    write(f"""library({name}_nldm_{corner_name(corner)}) {{
+    delay_model : "table_lookup";
+    time_unit : "1ns";
+    voltage_unit : "1V";
+    current_unit : "1mA";
+    resistance_unit : "1kohm";
+    capacitive_load_unit(1,pf);
+    leakage_power_unit : "1uW";
+
+    nom_process : {PROCESS_DERATE.get(corner['process'], 1.0)};
+    nom_temperature : {corner['temp']:g};
+    nom_voltage : {corner['voltage']:g};
+
+    operating_conditions({corner_name(corner)}) {{
+        process : {PROCESS_DERATE.get(corner['process'], 1.0)};
+        temperature : {corner['temp']:g};
+        voltage : {corner['voltage']:g};
+    }}
+    default_operating_conditions : {corner_name(corner)};
+
+    lu_table_template(sram_delay) {{
+        variable_1 : input_net_transition;
+        variable_2 : total_output_net_capacitance;
+        index_1({index(slews)});
+        index_2({index(loads)});
+    }}
+
+    lu_table_template(sram_constraint) {{
+        variable_1 : related_pin_transition;
+        variable_2 : constrained_pin_transition;
+        index_1({index(slews)});
+        index_2({index(slews)});
+    }}
+
+    type(addr_bus) {{
+        base_type : array;
+        data_type : bit;
+        bit_width : {cell['addr_width']};
+        bit_from : {cell['addr_width'] - 1};
+        bit_to : 0;
+        downto : true;
+    }}
+
+    type(data_bus) {{
+        base_type : array;
+        data_type : bit;
+        bit_width : {cell['word_size']};
+        bit_from : {cell['word_size'] - 1};
+        bit_to : 0;
+        downto : true;
+    }}
+
+    cell({name}) {{
+        memory() {{
+            type : ram;
+            address_width : {cell['addr_width']};
+            word_width : {cell['word_size']};
+        }}
+
+        interface_timing : true;
+        pin(clk0) {{
+            direction : input;
+            clock : true;
+            capacitance : {model['clock_cap']};
+            max_transition : {slews[-1]:g};
+            timing() {{
+                related_pin : "clk0";
+                timing_type : min_pulse_width;
+                rise_constraint(scalar) {{
+                    values("{tables['min_pulse_width']:.4f}");
+                }}
+                fall_constraint(scalar) {{
+                    values("{tables['min_pulse_width']:.4f}");
+                }}
+            }}
+        }}
+""")
+    for pin in ('csb0', 'web0'):
+        write(f"""
+        pin({pin}) {{
+            direction : input;
+            capacitance : {model['input_cap']};
+""")
+        constraints('clk0')
+        write("        }\n")
+    for bus, bus_type in (('addr0', 'addr_bus'), ('din0', 'data_bus')):
+        write(f"""
+        bus({bus}) {{
+            bus_type : {bus_type};
+            direction : input;
+            capacitance : {model['input_cap']};
+""")
+        constraints('clk0')
+        write("        }\n")
+
+    write(f"""
+        bus(dout0) {{
+            bus_type : data_bus;
+            direction : output;
+            max_capacitance : {loads[-1]:g};
+            timing() {{
+                related_pin : "clk0";
+                timing_type : rising_edge;
+""")
+    for table in ('cell_rise', 'cell_fall', 'rise_transition', 'fall_transition'):
+        write(f"""                {table}(sram_delay) {{
+                    {_liberty_values(tables[table], ind)}
+                }}
+""")
+    write("""            }
+        }
+    }
+}
+""")
+    return ''.join(out)
+
+def write_liberty_corner(path: str, cell: Dict, corner: Dict, tables: Dict[str, np.ndarray],
+                         slews: np.ndarray, loads: np.ndarray, model: Dict) -> bool:
+    """Render one corner and write it in a single buffered, atomic write."""
+    text = render_liberty(cell, corner, tables, slews, loads, model)
+    path = Path(path)
+    tmp_file = path.with_name(f".{path.name}.{os.getpid()}")
+    with open(tmp_file, 'w', buffering=1 << 20) as f:
+        f.write(text)
+    os.replace(tmp_file, path)
+    return True
+
+_LIBERTY_TOKENS = re.compile(
+    r'timing_type\s*:\s*"?(\w+)"?'
+    r'|(\w+)\s*\([^)]*\)\s*\{'
+    r'|\}'
+    r'|\bvalues\s*\(([^;]*)\)\s*;'
+    r'|\barea\s*:\s*([-\d.eE+]+)')
+
+def liberty_metrics(lib_file: Path) -> Dict:
+    """Worst delay and constraint values and the area of a Liberty file.
+
+    Delays are the largest ``cell_rise``/``cell_fall`` table entries, setup
+    and hold the largest constraint entries of setup and hold arcs.
+    """
+    metrics = {'lib_area': None, 'max_delay_ns': None, 'max_setup_ns': None, 'max_hold_ns': None}
+    groups: List[str] = []
+    timing_type = None
+    with open(lib_file, 'r', errors='replace') as f:
+        content = f.read()
+
+    for match in _LIBERTY_TOKENS.finditer(content):
+        timing, group, values, area = match.groups()
+        if timing:
+            # An attribute of the enclosing timing() group
+            timing_type = timing
+        elif group:
+            groups.append(group)
+            if group == 'timing':
+                timing_type = None
+        elif match.group(0) == '}':
+            if groups:
+                groups.pop()
+        elif area:
+            metrics['lib_area'] = float(area)
+        elif values is not None and groups:
+            if groups[-1] in ('cell_rise', 'cell_fall'):
+                key = 'max_delay_ns'
+            elif groups[-1] in ('rise_constraint', 'fall_constraint') and timing_type:
+                key = 'max_hold_ns' if timing_type.startswith('hold') else 'max_setup_ns'
+            else:
+                continue
+            numbers = [float(v) for v in re.findall(r'-?\d+\.?\d*(?:[eE][-+]?\d+)?', values)]
+            if metrics[key] is not None:
+                numbers.append(metrics[key])
+            if numbers:
+                metrics[key] = max(numbers)
+    return metrics
+
+def collect_sram_metrics(output_dir: Path, ram_name: str) -> Dict:
+    """Area from the GDS, pin count from the LEF and timing from the Liberty view."""
+    sram_dir = output_dir / 'sram_output'
+    metrics: Dict = {'area_um2': None, 'width_um': None, 'height_um': None, 'pins': None}
+
+    report = GDSAnalyzer(GDSFileHandler(sram_dir)).analyze(sram_dir / f'{ram_name}.gds')
+    cell = report['cells'].get(ram_name)
+    bbox = cell['bbox_um'] if cell else None
+    if bbox:
+        metrics['width_um'] = round(bbox[2] - bbox[0], 3)
+        metrics['height_um'] = round(bbox[3] - bbox[1], 3)
+        metrics['area_um2'] = round(metrics['width_um'] * metrics['height_um'], 3)
+
+    macro = LEFFileHandler(sram_dir).get_macro(sram_dir / f'{ram_name}.lef', ram_name)
+    if macro is not None:
+        metrics['pins'] = len(macro['pins'])
+
+    metrics.update(liberty_metrics(sram_dir / f'{ram_name}.lib'))
+    return metrics
+
+def run_sweep_point(config_file: str, overrides: Dict, output_dir: str) -> Dict:
+    """Generate one sweep point in its own output directory and measure it."""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[logging.FileHandler(output_dir / 'sweep_point.log')],
+        force=True
+    )
+
+    result = {'point': output_dir.name, 'parameters': overrides, 'success': False}
+    start = time.time()
+    try:
+        generator = SRAMGenerator(config_file, dict(overrides, output_dir=str(output_dir),
+                                                    log_dir=str(output_dir / 'logs')))
+        result['success'] = generator.run()
+        # Pool workers exit without running atexit handlers
+        generator.file_handler.artifacts.flush()
+        if result['success']:
+            ram_name = generator.config.get('ram_name', 'sky130_sram_8kx32')
+            result.update(collect_sram_metrics(output_dir, ram_name))
+    except Exception as e:
+        result['success'] = False
+        result['error'] = str(e)
+    result['duration'] = round(time.time() - start, 1)
+    return result
+
+# Metrics collected for every sweep point, usable for ranking
+SWEEP_METRICS = ['area_um2', 'width_um', 'height_um', 'pins', 'lib_area',
+                 'max_delay_ns', 'max_setup_ns', 'max_hold_ns']
+
+class SRAMSweep:
+    """Generate the SRAM over a grid of parameters on a bounded process pool.
+
+    Every point runs the normal ``SRAMGenerator`` flow in
+    ``<output_dir>/sweep/<point>``. Results are ranked by ``rank_by``
+    metrics, smallest first; prefix a metric with ``-`` to prefer large
+    values. Failed points sort last.
+    """
+
+    def __init__(self, config_file: str, parameters: Dict[str, List], output_dir: Union[str, Path],
+                 jobs: int = 2, rank_by: Optional[List[str]] = None):
+        self.config_file = config_file
+        self.parameters = parameters
+        self.output_dir = Path(output_dir) / 'sweep'
+        self.jobs = max(1, jobs)
+        self.rank_by = rank_by or ['area_um2', 'max_delay_ns']
+        self.logger = logging.getLogger(__name__)
+
+        unknown = [m for m in self.rank_by if m.lstrip('-') not in SWEEP_METRICS]
+        if unknown:
+            raise ValueError(f"Unknown ranking metrics: {', '.join(unknown)}")
+
+    def points(self) -> List[Dict]:
+        names = list(self.parameters)
+        return [dict(zip(names, values))
+                for values in itertools.product(*(self.parameters[name] for name in names))]
+
+    @staticmethod
+    def point_name(point: Dict) -> str:
+        return '_'.join(f"{name}-{value}" for name, value in point.items())
+
+    def run(self) -> List[Dict]:
+        """Run every point and return the ranked results."""
+        points = self.points()
+        self.logger.info(f"Sweeping {len(points)} SRAM configurations with {self.jobs} workers")
+        # Start workers from a clean process rather than forking this one
+        context = multiprocessing.get_context(
+            "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn")
+        results = []
+        with ProcessPoolExecutor(max_workers=self.jobs, mp_context=context) as pool:
+            futures = {pool.submit(run_sweep_point, self.config_file, point,
+                                   str(self.output_dir / self.point_name(point))): point
+                       for point in points}
+            for future in as_completed(futures):
+                point = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {'point': self.point_name(point), 'parameters': point,
+                              'success': False, 'error': str(e)}
+                status = "done" if result['success'] else "FAILED"
+                results.append(result)
+                self.logger.info(f"Sweep point {result['point']} {status} ({len(results)}/{len(points)})")
+        return self.rank(results)
+
+    def rank(self, results: List[Dict]) -> List[Dict]:
+        def key(result: Dict):
+            values = []
+            for metric in self.rank_by:
+                sign = -1 if metric.startswith('-') else 1
+                value = result.get(metric.lstrip('-'))
+                values.append((value is None, sign * value if value is not None else 0))
+            return (not result['success'], values)
+
+        ranked = sorted(results, key=key)
+        for rank, result in enumerate(ranked, 1):
+            result['rank'] = rank if result['success'] else None
+        return ranked
+
+    def write_results(self, results: List[Dict]) -> Path:
+        """Write the ranked table as JSON and CSV and log it."""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.output_dir / 'sweep_results.json', 'w') as f:
+            json.dump(results, f, indent=2)
+
+        columns = ['rank', 'point'] + list(self.parameters) + SWEEP_METRICS + ['duration']
+        table_file = self.output_dir / 'sweep_results.csv'
+        with open(table_file, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            for result in results:
+                row = dict(result, **result['parameters'])
+                writer.writerow(['' if row.get(c) is None else row[c] for c in columns])
+
+        self.logger.info(f"{'rank':>4}  {'point':40} " + ' '.join(f"{m:>12}" for m in SWEEP_METRICS))
+        for result in results:
+            values = ' '.join(f"{'-' if result.get(m) is None else result[m]:>12}" for m in SWEEP_METRICS)
+            self.logger.info(f"{result['rank'] or '-':>4}  {result['point']:40} {values}")
+        return table_file
+
+def parse_sweep(specs: List[str]) -> Dict[str, List]:
+    """Turn ``name=v1,v2`` options into a parameter grid, typing values like YAML."""
+    parameters: Dict[str, List] = {}
+    for spec in specs:
+        name, _, values = spec.partition('=')
+        if not name.strip() or not values:
+            raise ValueError(f"Invalid sweep parameter '{spec}', expected name=v1,v2,...")
+        parameters[name.strip()] = [yaml.safe_load(value) for value in values.split(',')]
+    return parameters
+
 def main():
     parser = argparse.ArgumentParser(description="Generate SRAM using OpenRAM")
     parser.add_argument("--config", required=True, help="Configuration file (JSON or YAML)")
@@ -432,6 +1040,13 @@ def main():
     parser.add_argument("--voltage", type=float, help="Override operating voltage")
     parser.add_argument("--frequency", type=float, help="Override operating frequency")
     parser.add_argument("--temp", type=float, help="Override operating temperature")
+    parser.add_argument("--no-cache", action="store_true", help="Always rerun OpenRAM")
+    parser.add_argument("--sweep", action="append", metavar="NAME=V1,V2",
+                        help="Sweep a parameter over values; repeat for a grid")
+    parser.add_argument("-j", "--jobs", type=int, default=2, help="Concurrent sweep points")
+    parser.add_argument("--rank-by", default="area_um2,max_delay_ns",
+                        help=f"Comma-separated sweep ranking metrics, '-' prefix for largest first "
+                             f"({', '.join(SWEEP_METRICS)})")
     parser.add_argument("--debug", action="store_true", help="Enable debug output")
     
     args = parser.parse_args()
@@ -461,6 +1076,23 @@ def main():
             generator.config['frequency'] = args.frequency
         if args.temp:
             generator.config['temp'] = args.temp
+        if args.no_cache:
+            generator.config['openram_cache'] = False
+        
+        if args.sweep:
+            # Sweep points apply the same overrides on top of the config file
+            overrides = {k: v for k, v in generator.config.items() if k != 'output_dir'}
+            config_file = Path(generator.config.get('output_dir', '.')) / 'sweep_config.json'
+            config_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(config_file, 'w') as f:
+                json.dump(overrides, f, indent=2)
+
+            sweep = SRAMSweep(str(config_file), parse_sweep(args.sweep),
+                              generator.config.get('output_dir', '.'), args.jobs,
+                              [m.strip() for m in args.rank_by.split(',') if m.strip()])
+            results = sweep.run()
+            sweep.write_results(results)
+            sys.exit(0 if any(r['success'] for r in results) else 1)
         
         # Run SRAM generation
         success = generator.run()
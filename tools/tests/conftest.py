@@ -0,0 +1,13 @@
+# -----------------------------------------------------------------------------
+# File: conftest.py
+# Project: SimpleARM - A Simplified ARM Cortex-M0 Processor Core
+# Purpose: Make the tool modules importable the way the scripts import them
+# -----------------------------------------------------------------------------
+
+import sys
+from pathlib import Path
+
+TOOLS_DIR = Path(__file__).resolve().parents[1]
+for path in (TOOLS_DIR / 'utils', TOOLS_DIR / 'scripts'):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
@@ -0,0 +1,74 @@
+# -----------------------------------------------------------------------------
+# File: test_artifact_store.py
+# Project: SimpleARM - A Simplified ARM Cortex-M0 Processor Core
+# Purpose: Tests for the content-addressed artifact store
+# -----------------------------------------------------------------------------
+
+import json
+import os
+import stat
+
+from file_handlers import ArtifactStore, FileHandler
+
+def test_digest_index_keeps_updates_of_every_writer(tmp_path):
+    files = []
+    for name in ('a.gds', 'b.gds'):
+        files.append(tmp_path / name)
+        files[-1].write_bytes(name.encode())
+    # Two flows sharing one store, both started before either saved
+    first = ArtifactStore(tmp_path / 'store')
+    second = ArtifactStore(tmp_path / 'store')
+
+    first.digest(files[0])
+    second.digest(files[1])
+    first.flush()
+    second.flush()
+
+    index = json.loads((tmp_path / 'store' / 'digests.json').read_text())
+    assert sorted(index) == sorted(str(path.resolve()) for path in files)
+    assert not [p for p in (tmp_path / 'store').iterdir() if p.name.startswith('.digests')]
+
+def test_digest_index_is_written_in_batches(tmp_path):
+    store = ArtifactStore(tmp_path / 'store')
+    for i in range(20):
+        (tmp_path / f'{i}.gds').write_bytes(bytes([i]))
+        store.digest(tmp_path / f'{i}.gds')
+    assert not (tmp_path / 'store' / 'digests.json').exists()
+
+    store.flush()
+
+    assert len(json.loads((tmp_path / 'store' / 'digests.json').read_text())) == 20
+
+def test_copies_are_writable_unless_linked(tmp_path):
+    handler = FileHandler(tmp_path)
+    src = tmp_path / 'cell.spice'
+    src.write_text('* original\n')
+
+    assert handler.copy_file(src, tmp_path / 'linked.spice', link=True)
+    assert handler.copy_file(src, tmp_path / 'edited.spice')
+
+    obj = handler.artifacts.object_path(handler.artifacts.digest(src))
+    linked = tmp_path / 'linked.spice'
+    assert os.path.samefile(linked, obj)
+    assert stat.S_IMODE(linked.stat().st_mode) == 0o444
+
+    edited = tmp_path / 'edited.spice'
+    assert not os.path.samefile(edited, obj)
+    with open(edited, 'a') as f:
+        f.write('* edited in place\n')
+    assert obj.read_text() == '* original\n'
+    assert linked.read_text() == '* original\n'
+
+def test_plain_copy_replaces_an_earlier_link(tmp_path):
+    handler = FileHandler(tmp_path)
+    src = tmp_path / 'cell.spice'
+    src.write_text('* original\n')
+    dst = tmp_path / 'out.spice'
+
+    handler.copy_file(src, dst, link=True)
+    handler.copy_file(src, dst)
+
+    obj = handler.artifacts.object_path(handler.artifacts.digest(src))
+    assert not os.path.samefile(dst, obj)
+    assert stat.S_IMODE(obj.stat().st_mode) == 0o444
+    assert stat.S_IMODE(dst.stat().st_mode) == stat.S_IMODE(src.stat().st_mode)
@@ -0,0 +1,29 @@
+# -----------------------------------------------------------------------------
+# File: test_cached_index.py
+# Project: SimpleARM - A Simplified ARM Cortex-M0 Processor Core
+# Purpose: Tests for the on-disk cache of parsed file indexes
+# -----------------------------------------------------------------------------
+
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from file_handlers import FileHandler
+
+def test_parallel_stages_can_index_the_same_file(tmp_path):
+    handler = FileHandler(tmp_path)
+    gds = tmp_path / 'merged.gds'
+    gds.write_bytes(b'\0' * 64)
+    cache_file = tmp_path / 'merged.gds.index.json'
+    both_built = threading.Barrier(2)
+
+    def build(path):
+        both_built.wait(timeout=10)
+        return {'cells': {f'cell_{i}': i for i in range(2000)}}
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        indexes = list(pool.map(lambda _: handler.cached_index(gds, cache_file, 1, build), range(2)))
+
+    assert indexes[0]['cells'] == indexes[1]['cells']
+    assert json.loads(cache_file.read_text())['cells'] == indexes[0]['cells']
+    assert [p.name for p in tmp_path.iterdir() if 'index' in p.name] == [cache_file.name]
@@ -0,0 +1,60 @@
+# -----------------------------------------------------------------------------
+# File: test_gds_merge.py
+# Project: SimpleARM - A Simplified ARM Cortex-M0 Processor Core
+# Purpose: Regression tests for the native GDS merge
+# -----------------------------------------------------------------------------
+
+import struct
+
+from file_handlers import GDSFileHandler, gds_real8_bytes, gds_record
+
+def _box(layer, x0, y0, x1, y1):
+    return (gds_record(0x08, 0) + gds_record(0x0D, 2, struct.pack('>h', layer)) +
+            gds_record(0x0E, 2, struct.pack('>h', 0)) +
+            gds_record(0x10, 3, struct.pack('>10i', x0, y0, x1, y0, x1, y1, x0, y1, x0, y0)) +
+            gds_record(0x11, 0))
+
+def _sref(name):
+    return (gds_record(0x0A, 0) + gds_record(0x12, 6, name.encode('ascii')) +
+            gds_record(0x10, 3, struct.pack('>2i', 0, 0)) + gds_record(0x11, 0))
+
+def _cell(name, body):
+    return gds_record(0x05, 2, bytes(24)) + gds_record(0x06, 6, name.encode('ascii')) + body + gds_record(0x07, 0)
+
+def _library(path, name, cells):
+    path.write_bytes(
+        gds_record(0x00, 2, struct.pack('>h', 600)) + gds_record(0x01, 2, bytes(24)) +
+        gds_record(0x02, 6, name.encode('ascii')) +
+        gds_record(0x03, 5, gds_real8_bytes(1e-3) + gds_real8_bytes(1e-9)) +
+        b''.join(cells) + gds_record(0x04, 0))
+    return path
+
+def _merge(tmp_path, core_cells, sram_cells):
+    handler = GDSFileHandler(tmp_path)
+    core = _library(tmp_path / 'core.gds', 'core', core_cells)
+    sram = _library(tmp_path / 'sram.gds', 'sram', sram_cells)
+    merged = tmp_path / 'merged.gds'
+    assert handler.merge_gds_files([core, sram], merged)
+    return handler.get_index(merged, use_cache=False)
+
+def test_same_parent_with_different_child_is_renamed(tmp_path):
+    index = _merge(tmp_path,
+                   [_cell('B', _box(1, 0, 0, 10, 10)), _cell('A', _sref('B')), _cell('core_top', _sref('A'))],
+                   [_cell('B', _box(2, 0, 0, 20, 20)), _cell('A', _sref('B')), _cell('sram_top', _sref('A'))])
+    cells = index['cells']
+
+    assert index['top_cells'] == ['core_top']
+    assert set(cells) == {'A', 'B', 'core_top', 'A_sram', 'B_sram', 'sram_top'}
+    assert cells['A']['references'] == {'B': 1}
+    assert cells['A_sram']['references'] == {'B_sram': 1}
+    assert cells['sram_top']['references'] == {'A_sram': 1}
+    assert cells['B_sram']['layers'] == {'2/0': 1}
+
+def test_identical_subtree_is_shared(tmp_path):
+    shared = [_cell('B', _box(1, 0, 0, 10, 10)), _cell('A', _sref('B'))]
+    index = _merge(tmp_path, shared + [_cell('core_top', _sref('A'))],
+                   shared + [_cell('sram_top', _sref('A'))])
+
+    assert index['top_cells'] == ['core_top']
+    assert set(index['cells']) == {'A', 'B', 'core_top', 'sram_top'}
+    assert index['cells']['sram_top']['references'] == {'A': 1}
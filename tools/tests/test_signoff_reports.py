@@ -0,0 +1,21 @@
+# -----------------------------------------------------------------------------
+# File: test_signoff_reports.py
+# Project: SimpleARM - A Simplified ARM Cortex-M0 Processor Core
+# Purpose: Tests for the indexed signoff report store
+# -----------------------------------------------------------------------------
+
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+from signoff_reports import SignoffStore
+
+def test_store_rebuilt_from_old_schema_is_usable_from_other_threads(tmp_path):
+    db_file = tmp_path / 'signoff.db'
+    old = sqlite3.connect(str(db_file))
+    old.execute("PRAGMA user_version = 999")
+    old.close()
+
+    with SignoffStore(db_file) as store:
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            assert pool.submit(store.drc_count).result() == 0
+        assert store.conn.execute("PRAGMA synchronous").fetchone()[0] == 0
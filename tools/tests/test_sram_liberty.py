@@ -0,0 +1,60 @@
+# -----------------------------------------------------------------------------
+# File: test_sram_liberty.py
+# Project: SimpleARM - A Simplified ARM Cortex-M0 Processor Core
+# Purpose: Tests for the multi-corner Liberty views of the SRAM generator
+# -----------------------------------------------------------------------------
+
+import json
+
+import pytest
+
+from generate_sram import SRAMGenerator
+
+@pytest.fixture
+def generator(tmp_path, monkeypatch):
+    (tmp_path / 'openram' / 'compiler').mkdir(parents=True)
+    monkeypatch.setenv('OPENRAM_HOME', str(tmp_path / 'openram'))
+    monkeypatch.setenv('OPENRAM_TECH', str(tmp_path / 'openram'))
+    config_file = tmp_path / 'sram.json'
+    config_file.write_text(json.dumps({
+        'output_dir': str(tmp_path / 'out'), 'log_dir': str(tmp_path / 'logs'),
+        'word_size': 32, 'num_words': 256, 'num_banks': 1, 'voltage': 1.8, 'temp': 25.0,
+        'process_corners': ['TT', 'SS'], 'temperatures': [25, 100]}))
+    return SRAMGenerator(str(config_file))
+
+def test_corner_views_leave_openram_files_alone(generator, tmp_path):
+    output_dir = tmp_path / 'sram_output'
+    output_dir.mkdir()
+    characterized = output_dir / 'ram_TT_1p8V_25C.lib'
+    characterized.write_text('library(ram_TT_1p8V_25C) { /* characterized */ }\n')
+
+    assert generator._generate_liberty_file(output_dir, 'ram')
+
+    files = generator.liberty_files(output_dir, 'ram')
+    assert len(files) == 5 and all(path.exists() for path in files)
+    assert characterized.read_text().endswith('/* characterized */ }\n')
+    assert (output_dir / 'ram.lib').read_text() == characterized.read_text()
+    assert 'library(ram_nldm_SS_1p8V_100C)' in (output_dir / 'ram_nldm_SS_1p8V_100C.lib').read_text()
+
+def test_nominal_view_is_modelled_without_openram_file(generator, tmp_path):
+    output_dir = tmp_path / 'sram_output'
+    output_dir.mkdir()
+
+    assert generator._generate_liberty_file(output_dir, 'ram')
+
+    assert 'library(ram_nldm_TT_1p8V_25C)' in (output_dir / 'ram.lib').read_text()
+
+def test_corners_written_on_a_pool_match_serial_output(generator, tmp_path):
+    serial_dir = tmp_path / 'serial'
+    pooled_dir = tmp_path / 'pooled'
+    serial_dir.mkdir()
+    pooled_dir.mkdir()
+
+    generator.config['liberty_jobs'] = 1
+    assert generator._generate_liberty_file(serial_dir, 'ram')
+    generator.config['liberty_jobs'] = 2
+    assert generator._generate_liberty_file(pooled_dir, 'ram')
+
+    for serial, pooled in zip(generator.liberty_files(serial_dir, 'ram'),
+                              generator.liberty_files(pooled_dir, 'ram')):
+        assert serial.read_text() == pooled.read_text()
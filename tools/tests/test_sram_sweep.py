@@ -0,0 +1,27 @@
+# -----------------------------------------------------------------------------
+# File: test_sram_sweep.py
+# Project: SimpleARM - A Simplified ARM Cortex-M0 Processor Core
+# Purpose: Tests for running SRAM sweep points in their own directories
+# -----------------------------------------------------------------------------
+
+import json
+
+from generate_sram import SRAMGenerator
+
+def test_overrides_place_handlers_in_the_point_directory(tmp_path, monkeypatch):
+    (tmp_path / 'openram' / 'compiler').mkdir(parents=True)
+    monkeypatch.setenv('OPENRAM_HOME', str(tmp_path / 'openram'))
+    monkeypatch.setenv('OPENRAM_TECH', str(tmp_path / 'openram'))
+    monkeypatch.chdir(tmp_path)
+    config_file = tmp_path / 'sram.json'
+    config_file.write_text(json.dumps({'word_size': 32, 'num_words': 256}))
+    point = tmp_path / 'sweep' / 'p0'
+
+    generator = SRAMGenerator(str(config_file), {'word_size': 64, 'output_dir': str(point),
+                                                 'log_dir': str(point / 'logs')})
+
+    assert generator.config['word_size'] == 64
+    assert generator.file_handler.artifacts.root == point / '.artifacts'
+    assert generator.file_handler.command_log_dir == point / 'logs' / 'commands'
+    assert generator.lef_handler.base_dir == point
+    assert not (tmp_path / '.artifacts').exists()
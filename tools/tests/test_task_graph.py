@@ -0,0 +1,35 @@
+# -----------------------------------------------------------------------------
+# File: test_task_graph.py
+# Project: SimpleARM - A Simplified ARM Cortex-M0 Processor Core
+# Purpose: Tests for task fingerprints and up-to-date checks
+# -----------------------------------------------------------------------------
+
+import subprocess
+import sys
+from pathlib import Path
+
+from task_graph import DONE, SKIPPED, TaskGraph, code_digest
+
+def _with_comprehension(path: str) -> bool:
+    Path(path).write_text(''.join(str(i) for i in [n * 2 for n in range(3)]))
+    return True
+
+def test_code_digest_is_stable_across_processes():
+    script = ("import sys; sys.path[:0] = sys.argv[1:]; "
+              "from test_task_graph import _with_comprehension; "
+              "from task_graph import code_digest; print(code_digest(_with_comprehension))")
+    paths = [str(Path(__file__).parent), *sys.path]
+    digests = {subprocess.run([sys.executable, '-c', script, *paths], capture_output=True,
+                              text=True, check=True).stdout.strip() for _ in range(2)}
+    assert digests == {code_digest(_with_comprehension)}
+
+def test_task_with_comprehension_is_skipped_on_rerun(tmp_path):
+    output = tmp_path / 'out.txt'
+
+    def run():
+        graph = TaskGraph(tmp_path / 'state.json', jobs=1)
+        graph.add('write', _with_comprehension, str(output), outputs=[output])
+        return graph.run()
+
+    assert run() == {'write': DONE}
+    assert run() == {'write': SKIPPED}
@@ -7,21 +7,362 @@
 
 import os
 import sys
+import re
 import json
+import mmap
+import time
+import signal
+import hashlib
+import itertools
+import threading
+import array
+import atexit
+import struct
 import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Union, Optional
+from typing import Dict, Iterator, List, Tuple, Union, Optional
 import subprocess
 import shutil
 
+# Linux ioctl that clones a file's extents (btrfs, XFS, ...)
+_FICLONE = 0x40049409
+
+# Default size limit of the artifact store under an output directory
+ARTIFACT_STORE_LIMIT = 20 << 30
+
+# Seconds between writes of the artifact store's digest index
+DIGEST_SAVE_INTERVAL = 5.0
+
+def hash_file(path: Union[str, Path], chunk_size: int = 1 << 20) -> str:
+    """Streaming SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        buffer = bytearray(chunk_size)
+        view = memoryview(buffer)
+        while True:
+            size = f.readinto(buffer)
+            if not size:
+                break
+            digest.update(view[:size])
+    return digest.hexdigest()
+
+def reflink_file(src: Union[str, Path], dst: Union[str, Path]) -> bool:
+    """Copy-on-write clone ``src`` to ``dst`` where the filesystem supports it."""
+    try:
+        import fcntl
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+        return True
+    except (OSError, ImportError):
+        Path(dst).unlink(missing_ok=True)
+        return False
+
+def clone_file(src: Union[str, Path], dst: Union[str, Path]) -> str:
+    """Create ``dst`` with the contents of ``src`` as cheaply as possible.
+
+    Tries a hardlink, then a reflink, then a plain copy, and returns which
+    one was used.
+    """
+    try:
+        os.link(src, dst)
+        return 'hardlink'
+    except OSError:
+        pass
+    if reflink_file(src, dst):
+        return 'reflink'
+    shutil.copyfile(src, dst)
+    return 'copy'
+
+class ArtifactStore:
+    """Content-addressed store of build artifacts under an output directory.
+
+    Objects live in ``objects/<2 hex>/<sha256>`` and are materialized into
+    the output tree as hardlinks where possible, so identical GDS or SPICE
+    files take their space only once. Objects are made read-only because a
+    hardlinked copy shares its data with the store; writers must replace a
+    materialized file rather than modify it in place. File digests are
+    remembered by (size, mtime, inode) so unchanged files are not rehashed;
+    the index is written at most every ``DIGEST_SAVE_INTERVAL`` seconds and
+    on ``flush()``, which also runs at exit.
+    The store is trimmed to ``max_bytes`` by evicting least recently used
+    objects.
+    """
+
+    def __init__(self, root: Union[str, Path], max_bytes: int = ARTIFACT_STORE_LIMIT):
+        self.root = Path(root)
+        self.objects = self.root / 'objects'
+        self.objects.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._digests_file = self.root / 'digests.json'
+        self._digests: Dict[str, List] = self._load_digests()
+        self._updated: Dict[str, List] = {}
+        self._saved_at = time.monotonic()
+        atexit.register(self.flush)
+
+    def object_path(self, digest: str) -> Path:
+        return self.objects / digest[:2] / digest
+
+    def digest(self, path: Union[str, Path]) -> str:
+        """Content digest of ``path``, reusing the last one while the file is unchanged."""
+        path = Path(path).resolve()
+        stat = path.stat()
+        key = [stat.st_size, stat.st_mtime_ns, stat.st_ino]
+        with self._lock:
+            cached = self._digests.get(str(path))
+        if cached is not None and cached[:3] == key:
+            return cached[3]
+
+        digest = hash_file(path)
+        with self._lock:
+            self._digests[str(path)] = key + [digest]
+            self._updated[str(path)] = key + [digest]
+            if time.monotonic() - self._saved_at >= DIGEST_SAVE_INTERVAL:
+                self._save_digests()
+        return digest
+
+    def flush(self):
+        """Write digests computed since the last save to the index."""
+        with self._lock:
+            if self._updated:
+                self._save_digests()
+
+    def _load_digests(self) -> Dict[str, List]:
+        try:
+            with open(self._digests_file, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_digests(self):
+        # Caller holds the lock. Other processes may share the store, so our
+        # own updates are merged into the index on disk instead of replacing
+        # it, each writer through its own temporary file. An entry lost to a
+        # racing writer only costs a rehash: every entry is checked against
+        # the file's stat before use. Entries for files that are gone are dropped.
+        merged = self._load_digests()
+        merged.update(self._updated)
+        self._digests = {p: v for p, v in merged.items() if os.path.exists(p)}
+        tmp_file = self._digests_file.with_name(
+            f".{self._digests_file.name}.{os.getpid()}.{threading.get_ident()}")
+        with open(tmp_file, 'w') as f:
+            json.dump(self._digests, f)
+        tmp_file.replace(self._digests_file)
+        self._updated = {}
+        self._saved_at = time.monotonic()
+
+    def put(self, path: Union[str, Path]) -> str:
+        """Add a file to the store and return its digest."""
+        def write(tmp_obj: Path):
+            # Never link the source itself: the flow may still modify it
+            if not reflink_file(path, tmp_obj):
+                shutil.copyfile(path, tmp_obj)
+
+        return self._publish(self.digest(path), write)
+
+    def put_bytes(self, data: bytes) -> str:
+        """Add in-memory content to the store and return its digest."""
+        return self._publish(hashlib.sha256(data).hexdigest(), lambda tmp_obj: tmp_obj.write_bytes(data))
+
+    def _publish(self, digest: str, write) -> str:
+        obj = self.object_path(digest)
+        if obj.exists():
+            os.utime(obj)
+            return digest
+
+        obj.parent.mkdir(exist_ok=True)
+        tmp_obj = obj.with_name(f".{digest}.{os.getpid()}.{threading.get_ident()}")
+        try:
+            write(tmp_obj)
+            os.chmod(tmp_obj, 0o444)
+            os.replace(tmp_obj, obj)
+        finally:
+            tmp_obj.unlink(missing_ok=True)
+        self.evict()
+        return digest
+
+    def materialize(self, digest: str, dst: Union[str, Path]) -> bool:
+        """Place the object ``digest`` at ``dst``.
+
+        Returns False when ``dst`` already had that content and was left alone.
+        """
+        obj = self.object_path(digest)
+        dst = Path(dst)
+        if dst.exists():
+            if os.path.samefile(obj, dst):
+                return False
+            if dst.stat().st_size == obj.stat().st_size and self.digest(dst) == digest:
+                return False
+
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        tmp_dst = dst.with_name(f".{dst.name}.{os.getpid()}.{threading.get_ident()}")
+        try:
+            method = clone_file(obj, tmp_dst)
+            if method != 'hardlink':
+                os.chmod(tmp_dst, 0o644)
+            os.replace(tmp_dst, dst)
+        finally:
+            tmp_dst.unlink(missing_ok=True)
+        os.utime(obj)
+        return True
+
+    def usage(self) -> int:
+        return sum(obj.stat().st_size for obj in self.objects.glob('*/*'))
+
+    def evict(self):
+        """Remove least recently used objects until the store fits ``max_bytes``."""
+        with self._lock:
+            entries = []
+            for obj in self.objects.glob('*/*'):
+                if obj.name.startswith('.'):
+                    continue
+                stat = obj.stat()
+                entries.append((stat.st_mtime, stat.st_size, obj))
+            total = sum(size for _, size, _ in entries)
+            if total <= self.max_bytes:
+                return
+            entries.sort()
+            for _, size, obj in entries:
+                if total <= self.max_bytes:
+                    break
+                # Materialized hardlinks keep their data; only the store entry goes
+                obj.unlink(missing_ok=True)
+                total -= size
+                self.logger.info(f"Evicted artifact {obj.name[:12]} ({size} bytes)")
+
+# Bump when the layout of the toolchain cache changes
+TOOL_CACHE_VERSION = 1
+
+def user_cache_dir() -> Path:
+    """Per-user cache directory shared by all flows."""
+    cache_home = os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache'
+    return Path(cache_home) / 'simplearm'
+
+def default_tool_cache() -> Path:
+    """Per-user toolchain cache, overridable with SIMPLEARM_TOOL_CACHE."""
+    if os.environ.get('SIMPLEARM_TOOL_CACHE'):
+        return Path(os.environ['SIMPLEARM_TOOL_CACHE'])
+    return user_cache_dir() / 'toolchain.json'
+
+class ToolRegistry:
+    """Resolved paths and versions of external tools, cached across runs.
+
+    A tool is looked up on PATH and probed with ``--version`` once. The
+    result is kept on disk together with the PATH it was resolved under and
+    the binary's size and mtime, so later runs reuse it without spawning
+    anything until PATH changes or the tool is reinstalled.
+    """
+
+    def __init__(self, cache_file: Optional[Union[str, Path]] = None):
+        self.cache_file = Path(cache_file) if cache_file else default_tool_cache()
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._tools: Dict[str, Dict] = {}
+        try:
+            with open(self.cache_file, 'r') as f:
+                cache = json.load(f)
+            if cache.get('version') == TOOL_CACHE_VERSION:
+                self._tools = cache.get('tools', {})
+        except (OSError, ValueError):
+            pass
+
+    def lookup(self, tool_name: str) -> Optional[Dict]:
+        """Cached entry for ``tool_name``, resolving and probing it if stale."""
+        search_path = os.environ.get('PATH', os.defpath)
+        with self._lock:
+            entry = self._tools.get(tool_name)
+            if entry is not None and entry['search_path'] == search_path and self._current(entry):
+                return entry
+
+            path = shutil.which(tool_name, path=search_path)
+            if path is None:
+                return None
+            path = os.path.realpath(path)
+            stat = os.stat(path)
+            if entry is None or entry['path'] != path or not self._current(entry):
+                entry = {'path': path, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+                entry.update(self._probe(path))
+            entry['search_path'] = search_path
+            self._tools[tool_name] = entry
+            self._save()
+            return entry
+
+    def _current(self, entry: Dict) -> bool:
+        try:
+            stat = os.stat(entry['path'])
+        except OSError:
+            return False
+        return stat.st_size == entry['size'] and stat.st_mtime_ns == entry['mtime_ns']
+
+    def _probe(self, path: str) -> Dict:
+        try:
+            result = subprocess.run([path, '--version'], capture_output=True, text=True,
+                                    errors='replace', timeout=60)
+            output = (result.stdout or result.stderr).strip()
+            return {'usable': result.returncode == 0,
+                    'version': output.splitlines()[0] if output else None}
+        except (OSError, subprocess.TimeoutExpired) as e:
+            self.logger.debug(f"Probing {path} failed: {str(e)}")
+            return {'usable': False, 'version': None}
+
+    def _save(self):
+        # Caller holds the lock
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.cache_file.with_name(f".{self.cache_file.name}.{os.getpid()}")
+            with open(tmp_file, 'w') as f:
+                json.dump({'version': TOOL_CACHE_VERSION, 'tools': self._tools}, f, indent=2)
+            tmp_file.replace(self.cache_file)
+        except OSError as e:
+            self.logger.debug(f"Could not save toolchain cache {self.cache_file}: {str(e)}")
+
+    def resolve(self, tool_name: str) -> Optional[str]:
+        """Absolute path of a usable ``tool_name``, or None."""
+        entry = self.lookup(tool_name)
+        return entry['path'] if entry and entry['usable'] else None
+
+    def version(self, tool_name: str) -> Optional[str]:
+        entry = self.lookup(tool_name)
+        return entry['version'] if entry else None
+
+_tool_registry: Optional[ToolRegistry] = None
+
+def get_tool_registry() -> ToolRegistry:
+    """Process-wide toolchain registry shared by all file handlers."""
+    global _tool_registry
+    if _tool_registry is None:
+        _tool_registry = ToolRegistry()
+    return _tool_registry
+
 class FileHandler:
     """Utility class for handling file operations."""
     
-    def __init__(self, base_dir: Union[str, Path]):
+    def __init__(self, base_dir: Union[str, Path], artifact_limit: int = ARTIFACT_STORE_LIMIT):
         """Initialize with base directory."""
         self.base_dir = Path(base_dir)
+        self.artifact_limit = artifact_limit
+        self._artifacts: Optional[ArtifactStore] = None
+        self.command_log_dir = self.base_dir / 'logs' / 'commands'
+        self.command_profile = self.base_dir / 'logs' / 'command_profile.jsonl'
+        self.command_profiles: List[Dict] = []
+        self.max_parallel_commands = os.cpu_count() or 1
+        self._commands_lock = threading.Lock()
+        self._running: Dict[int, Tuple[subprocess.Popen, Dict]] = {}
+        self._cancelled = threading.Event()
+        self._command_seq = itertools.count(1)
+        self._executor: Optional[ThreadPoolExecutor] = None
         self.setup_logging()
 
+    @property
+    def artifacts(self) -> ArtifactStore:
+        """Artifact store in ``<base_dir>/.artifacts``, created on first use."""
+        if self._artifacts is None:
+            self._artifacts = ArtifactStore(self.base_dir / '.artifacts', self.artifact_limit)
+        return self._artifacts
+
     def setup_logging(self):
         """Setup logging configuration."""
         logging.basicConfig(
@@ -36,8 +377,14 @@ class FileHandler:
         dir_path.mkdir(parents=True, exist_ok=True)
         return dir_path
 
-    def copy_file(self, src: Union[str, Path], dst: Union[str, Path], must_exist: bool = True) -> bool:
-        """Copy file from source to destination."""
+    def copy_file(self, src: Union[str, Path], dst: Union[str, Path], must_exist: bool = True,
+                  link: bool = False) -> bool:
+        """Copy file from source to destination.
+
+        The destination is a normal writable copy. With ``link`` it is
+        instead a read-only hardlink into the artifact store, sharing space
+        with identical files; such a file must be replaced, not edited in place.
+        """
         try:
             src_path = Path(src)
             dst_path = Path(dst)
@@ -47,9 +394,21 @@ class FileHandler:
                     self.logger.error(f"Source file does not exist: {src_path}")
                     return False
                 return True
-                
-            dst_path.parent.mkdir(parents=True, exist_ok=True)
-            shutil.copy2(src_path, dst_path)
+
+            if link:
+                digest = self.artifacts.put(src_path)
+                if not self.artifacts.materialize(digest, dst_path):
+                    self.logger.info(f"{dst_path} is up to date with {src_path}")
+                    return True
+            else:
+                # Replace rather than overwrite: dst may be a link into the store
+                dst_path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_dst = dst_path.with_name(f".{dst_path.name}.{os.getpid()}.{threading.get_ident()}")
+                try:
+                    shutil.copy2(src_path, tmp_dst)
+                    os.replace(tmp_dst, dst_path)
+                finally:
+                    tmp_dst.unlink(missing_ok=True)
             self.logger.info(f"Copied {src_path} to {dst_path}")
             return True
             
@@ -86,35 +445,162 @@ class FileHandler:
             return None
 
     def write_file(self, content: str, file_path: Union[str, Path]) -> bool:
-        """Write content to file."""
+        """Write content to file, leaving it untouched if the content is unchanged."""
         try:
-            with open(self.base_dir / file_path, 'w') as f:
-                f.write(content)
+            path = self.base_dir / file_path
+            data = content.encode()
+            if path.exists() and path.stat().st_size == len(data):
+                if self.artifacts.digest(path) == hashlib.sha256(data).hexdigest():
+                    self.logger.debug(f"{path} is unchanged")
+                    return True
+
+            # Replace rather than truncate: the old file may be a store hardlink
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}")
+            try:
+                tmp_path.write_bytes(data)
+                os.replace(tmp_path, path)
+            finally:
+                tmp_path.unlink(missing_ok=True)
             return True
         except Exception as e:
             self.logger.error(f"Error writing file {file_path}: {str(e)}")
             return False
 
-    def execute_command(self, command: List[str], cwd: Optional[Union[str, Path]] = None) -> bool:
-        """Execute shell command."""
-        try:
-            result = subprocess.run(
-                command,
-                cwd=cwd or self.base_dir,
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            self.logger.info(f"Command executed successfully: {' '.join(command)}")
-            return True
-        except subprocess.CalledProcessError as e:
-            self.logger.error(f"Command failed: {' '.join(command)}")
-            self.logger.error(f"Error output: {e.stderr}")
+    def execute_command(self, command: List[str], cwd: Optional[Union[str, Path]] = None,
+                        timeout: Optional[float] = None, name: Optional[str] = None) -> bool:
+        """Execute shell command, streaming its output to a per-command log.
+
+        The command runs in its own process group so a timeout or
+        ``cancel_commands`` stops its whole tree. Wall time, CPU time and peak
+        RSS are appended to the command profile.
+        """
+        command = [str(arg) for arg in command]
+        name = name or Path(command[0]).name
+        if os.sep not in command[0]:
+            command[0] = self.resolve_tool(command[0]) or command[0]
+        proc = None
+        try:
+            if self._cancelled.is_set():
+                self.logger.error(f"Command cancelled before start: {' '.join(command)}")
+                return False
+
+            self.command_log_dir.mkdir(parents=True, exist_ok=True)
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            log_file = self.command_log_dir / f"{name}_{timestamp}_{next(self._command_seq)}.log"
+            outcome = {'status': None}
+
+            start = time.time()
+            with open(log_file, 'wb') as log:
+                proc = subprocess.Popen(
+                    command,
+                    cwd=cwd or self.base_dir,
+                    stdin=subprocess.DEVNULL,
+                    stdout=log,
+                    stderr=subprocess.STDOUT,
+                    start_new_session=True
+                )
+            with self._commands_lock:
+                self._running[proc.pid] = (proc, outcome)
+
+            watchdog = None
+            if timeout:
+                watchdog = threading.Timer(timeout, self._kill_command, args=(proc, outcome, 'timeout'))
+                watchdog.daemon = True
+                watchdog.start()
+            try:
+                # wait4 reaps the child and reports its resource usage in one call
+                _, wait_status, usage = os.wait4(proc.pid, 0)
+            finally:
+                if watchdog is not None:
+                    watchdog.cancel()
+                with self._commands_lock:
+                    self._running.pop(proc.pid, None)
+            proc.returncode = os.waitstatus_to_exitcode(wait_status)
+            wall_time = time.time() - start
+
+            status = outcome['status'] or ('ok' if proc.returncode == 0 else 'failed')
+            # ru_maxrss is in kilobytes on Linux and bytes on macOS
+            rss_scale = 1 << 20 if sys.platform == 'darwin' else 1 << 10
+            self._record_profile({
+                'name': name,
+                'command': command,
+                'cwd': str(cwd or self.base_dir),
+                'log': str(log_file),
+                'start': start,
+                'status': status,
+                'returncode': proc.returncode,
+                'wall_s': round(wall_time, 3),
+                'user_s': round(usage.ru_utime, 3),
+                'sys_s': round(usage.ru_stime, 3),
+                'max_rss_mb': round(usage.ru_maxrss / rss_scale, 1),
+            })
+
+            if status == 'ok':
+                self.logger.info(f"Command executed successfully in {wall_time:.1f}s "
+                                 f"({usage.ru_utime + usage.ru_stime:.1f}s CPU, "
+                                 f"{usage.ru_maxrss / rss_scale:.0f} MB peak): {' '.join(command)}")
+                return True
+            self.logger.error(f"Command {status} (exit {proc.returncode}): {' '.join(command)}")
+            self.logger.error(f"Error output (see {log_file}):\n{self._log_tail(log_file)}")
             return False
+
+        except KeyboardInterrupt:
+            if proc is not None and proc.returncode is None:
+                self._kill_command(proc, {'status': None}, 'cancelled')
+                proc.wait()
+            raise
         except Exception as e:
             self.logger.error(f"Error executing command: {str(e)}")
             return False
 
+    def _kill_command(self, proc: subprocess.Popen, outcome: Dict, status: str):
+        if outcome['status'] is None:
+            outcome['status'] = status
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+    def _log_tail(self, log_file: Path, lines: int = 20, max_bytes: int = 64 << 10) -> str:
+        """Last lines of a command log, read from its end."""
+        with open(log_file, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - max_bytes))
+            tail = f.read().decode('utf-8', errors='replace')
+        return '\n'.join(tail.splitlines()[-lines:])
+
+    def _record_profile(self, entry: Dict):
+        with self._commands_lock:
+            self.command_profiles.append(entry)
+            self.command_profile.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.command_profile, 'a') as f:
+                f.write(json.dumps(entry) + '\n')
+
+    def submit_command(self, command: List[str], cwd: Optional[Union[str, Path]] = None,
+                       timeout: Optional[float] = None, name: Optional[str] = None) -> Future:
+        """Run ``execute_command`` on the command pool and return its future."""
+        with self._commands_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_parallel_commands,
+                                                    thread_name_prefix='command')
+        return self._executor.submit(self.execute_command, command, cwd, timeout, name)
+
+    def execute_commands(self, commands: Dict[str, List[str]], cwd: Optional[Union[str, Path]] = None,
+                         timeout: Optional[float] = None) -> Dict[str, bool]:
+        """Run independent named commands concurrently and return each one's success."""
+        futures = {name: self.submit_command(command, cwd, timeout, name)
+                   for name, command in commands.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+    def cancel_commands(self):
+        """Kill every running command and refuse to start new ones."""
+        self._cancelled.set()
+        with self._commands_lock:
+            running = list(self._running.values())
+        for proc, outcome in running:
+            self._kill_command(proc, outcome, 'cancelled')
+
     def find_files(self, pattern: str, directory: Optional[Union[str, Path]] = None) -> List[Path]:
         """Find files matching pattern in directory."""
         search_dir = self.base_dir / (directory or '')
@@ -122,25 +608,33 @@ class FileHandler:
 
     def check_tool_exists(self, tool_name: str) -> bool:
         """Check if a command-line tool exists."""
+        return self.resolve_tool(tool_name) is not None
+
+    def resolve_tool(self, tool_name: str) -> Optional[str]:
+        """Absolute path of a tool from the toolchain registry."""
         try:
-            subprocess.run([tool_name, '--version'],
-                         capture_output=True,
-                         check=True)
-            return True
-        except:
-            return False
+            return get_tool_registry().resolve(tool_name)
+        except Exception as e:
+            self.logger.error(f"Error resolving tool {tool_name}: {str(e)}")
+            return None
 
     def create_backup(self, file_path: Union[str, Path]) -> bool:
         """Create backup of file with timestamp."""
         try:
-            from datetime import datetime
             src_path = Path(file_path)
             if not src_path.exists():
                 return False
             
+            # Backups are links to one stored copy; skip one identical to the last
+            digest = self.artifacts.put(src_path)
+            backups = sorted(src_path.parent.glob(f"{src_path.stem}.*.bak"))
+            if backups and self.artifacts.digest(backups[-1]) == digest:
+                self.logger.info(f"{src_path} unchanged since backup {backups[-1]}")
+                return True
+
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             backup_path = src_path.with_suffix(f'.{timestamp}.bak')
-            shutil.copy2(src_path, backup_path)
+            self.artifacts.materialize(digest, backup_path)
             self.logger.info(f"Created backup: {backup_path}")
             return True
             
@@ -148,6 +642,43 @@ class FileHandler:
             self.logger.error(f"Error creating backup of {file_path}: {str(e)}")
             return False
 
+    def cached_index(self, file_path: Union[str, Path], cache_file: Path, version: int,
+                     build, use_cache: bool = True) -> Dict:
+        """Return ``build(file_path)``, cached in ``cache_file`` while the file is unchanged.
+
+        The cache is keyed by ``version`` and the file's size and mtime. Errors
+        raised by ``build`` propagate to the caller.
+        """
+        path = Path(file_path)
+        stat = path.stat()
+
+        if use_cache and cache_file.exists():
+            try:
+                with open(cache_file, 'r') as f:
+                    index = json.load(f)
+                if (index.get('version') == version and
+                        index.get('size') == stat.st_size and
+                        index.get('mtime_ns') == stat.st_mtime_ns):
+                    return index
+            except (OSError, ValueError):
+                pass
+
+        index = build(path)
+        index['version'] = version
+        index['size'] = stat.st_size
+        index['mtime_ns'] = stat.st_mtime_ns
+
+        if use_cache:
+            try:
+                # DRC and LVS stages may index the same GDS at the same time
+                tmp_file = cache_file.with_name(f".{cache_file.name}.{os.getpid()}.{threading.get_ident()}")
+                with open(tmp_file, 'w') as f:
+                    json.dump(index, f)
+                tmp_file.replace(cache_file)
+            except OSError as e:
+                self.logger.debug(f"Could not cache index for {path}: {str(e)}")
+        return index
+
     def validate_file_exists(self, file_path: Union[str, Path], file_type: str) -> bool:
         """Validate file exists and has correct extension."""
         path = Path(file_path)
@@ -159,11 +690,130 @@ class FileHandler:
             return False
         return True
 
+# GDSII record types (name, expected data type)
+GDS_RECORDS = {
+    0x00: ('HEADER', 2), 0x01: ('BGNLIB', 2), 0x02: ('LIBNAME', 6), 0x03: ('UNITS', 5),
+    0x04: ('ENDLIB', 0), 0x05: ('BGNSTR', 2), 0x06: ('STRNAME', 6), 0x07: ('ENDSTR', 0),
+    0x08: ('BOUNDARY', 0), 0x09: ('PATH', 0), 0x0A: ('SREF', 0), 0x0B: ('AREF', 0),
+    0x0C: ('TEXT', 0), 0x0D: ('LAYER', 2), 0x0E: ('DATATYPE', 2), 0x0F: ('WIDTH', 3),
+    0x10: ('XY', 3), 0x11: ('ENDEL', 0), 0x12: ('SNAME', 6), 0x13: ('COLROW', 2),
+    0x14: ('TEXTNODE', 0), 0x15: ('NODE', 0), 0x16: ('TEXTTYPE', 2), 0x17: ('PRESENTATION', 1),
+    0x18: ('SPACING', None), 0x19: ('STRING', 6), 0x1A: ('STRANS', 1), 0x1B: ('MAG', 5),
+    0x1C: ('ANGLE', 5), 0x1D: ('UINTEGER', None), 0x1E: ('USTRING', None), 0x1F: ('REFLIBS', 6),
+    0x20: ('FONTS', 6), 0x21: ('PATHTYPE', 2), 0x22: ('GENERATIONS', 2), 0x23: ('ATTRTABLE', 6),
+    0x24: ('STYPTABLE', None), 0x25: ('STRTYPE', None), 0x26: ('ELFLAGS', 1), 0x27: ('ELKEY', None),
+    0x28: ('LINKTYPE', None), 0x29: ('LINKKEYS', None), 0x2A: ('NODETYPE', 2), 0x2B: ('PROPATTR', 2),
+    0x2C: ('PROPVALUE', 6), 0x2D: ('BOX', 0), 0x2E: ('BOXTYPE', 2), 0x2F: ('PLEX', 3),
+    0x30: ('BGNEXTN', 3), 0x31: ('ENDEXTN', 3), 0x32: ('TAPENUM', 2), 0x33: ('TAPECODE', 2),
+    0x34: ('STRCLASS', None), 0x35: ('RESERVED', None), 0x36: ('FORMAT', 2), 0x37: ('MASK', 6),
+    0x38: ('ENDMASKS', 0), 0x39: ('LIBDIRSIZE', 2), 0x3A: ('SRFNAME', 6), 0x3B: ('LIBSECUR', 2),
+}
+
+GDS_ELEMENTS = {0x08, 0x09, 0x0A, 0x0B, 0x0C, 0x15, 0x2D}
+GDS_SHAPES = {0x08, 0x09, 0x2D}
+
+# Bump when the layout of cached GDS indexes changes
+GDS_INDEX_VERSION = 1
+
+_GDS_RECORD_HEADER = struct.Struct('>HBB')
+
+def gds_real8(data: bytes) -> float:
+    """Decode a GDSII 8-byte excess-64 base-16 real."""
+    sign = -1.0 if data[0] & 0x80 else 1.0
+    exponent = (data[0] & 0x7F) - 64
+    mantissa = int.from_bytes(data[1:8], 'big')
+    return sign * mantissa / (1 << 56) * 16.0 ** exponent
+
+def gds_real8_bytes(value: float) -> bytes:
+    """Encode a float as a GDSII 8-byte excess-64 base-16 real."""
+    if value == 0:
+        return bytes(8)
+    sign = 0x80 if value < 0 else 0
+    value = abs(value)
+    exponent = 64
+    while value >= 1:
+        value /= 16
+        exponent += 1
+    while value < 1 / 16:
+        value *= 16
+        exponent -= 1
+    mantissa = min(int(round(value * (1 << 56))), (1 << 56) - 1)
+    return bytes([sign | exponent]) + mantissa.to_bytes(7, 'big')
+
+def gds_record(record_type: int, data_type: int, payload: bytes = b'') -> bytes:
+    """Encode one GDSII record, padding ASCII payloads to an even length."""
+    if len(payload) & 1:
+        payload += b'\x00'
+    return _GDS_RECORD_HEADER.pack(4 + len(payload), record_type, data_type) + payload
+
+def gds_string(data: bytes) -> str:
+    """Decode a GDSII ASCII field, dropping the NUL pad byte."""
+    return bytes(data).rstrip(b'\x00').decode('ascii', errors='replace')
+
+class GDSReader:
+    """Record-level reader for GDSII stream files backed by mmap.
+
+    Records are yielded as offsets into the mapping, so nothing but the
+    fields a caller actually decodes is ever copied out of the file.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._file = None
+        self.data: Optional[mmap.mmap] = None
+
+    def __enter__(self) -> 'GDSReader':
+        self._file = open(self.path, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        if size == 0:
+            raise ValueError("empty file")
+        self.data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self
+
+    def __exit__(self, *exc):
+        self.data.close()
+        self._file.close()
+
+    def records(self, start: int = 0, end: Optional[int] = None) -> Iterator[Tuple[int, int, int, int]]:
+        """Yield ``(offset, length, record_type, data_type)`` for each record.
+
+        Iteration stops after ENDLIB. Zero padding after it is allowed,
+        anything else raises ValueError.
+        """
+        data = self.data
+        end = len(data) if end is None else end
+        unpack = _GDS_RECORD_HEADER.unpack_from
+        pos = start
+        while pos < end:
+            if end - pos < 4:
+                raise ValueError(f"truncated record header at offset {pos}")
+            length, rtype, dtype = unpack(data, pos)
+            if length < 4 or length & 1:
+                raise ValueError(f"invalid record length {length} at offset {pos}")
+            if pos + length > end:
+                raise ValueError(f"record at offset {pos} runs past end of file")
+            yield pos, length, rtype, dtype
+            pos += length
+            if rtype == 0x04:
+                if data[pos:end].count(0) != end - pos:
+                    raise ValueError(f"unexpected data after ENDLIB at offset {pos}")
+                return
+
+    def payload(self, offset: int, length: int) -> bytes:
+        return self.data[offset + 4:offset + length]
+
+    def int2(self, offset: int, index: int = 0) -> int:
+        return struct.unpack_from('>h', self.data, offset + 4 + 2 * index)[0]
+
 class GDSFileHandler(FileHandler):
     """GDS-specific file handling utilities."""
     
     def validate_gds(self, gds_file: Union[str, Path]) -> bool:
-        """Validate GDS file format."""
+        """Validate GDS file format.
+
+        The whole record stream is checked while building the cell index, so
+        a file that validated once is only re-read after it changes.
+        """
         try:
             path = Path(gds_file)
             if not path.exists():
@@ -177,19 +827,164 @@ class GDSFileHandler(FileHandler):
                     self.logger.error(f"Invalid GDS file format: {path}")
                     return False
                     
-            return True
+            return self.get_index(path) is not None
             
         except Exception as e:
             self.logger.error(f"Error validating GDS file {gds_file}: {str(e)}")
             return False
 
-    def merge_gds_files(self, input_files: List[Union[str, Path]], output_file: Union[str, Path]) -> bool:
-        """Merge multiple GDS files."""
+    def index_path(self, gds_file: Union[str, Path]) -> Path:
+        """Location of the cached index next to ``gds_file``."""
+        path = Path(gds_file)
+        return path.with_name(path.name + '.index.json')
+
+    def get_index(self, gds_file: Union[str, Path], use_cache: bool = True) -> Optional[Dict]:
+        """Return the cell index of a GDS file, from the cache when it is current."""
+        try:
+            return self.cached_index(gds_file, self.index_path(gds_file), GDS_INDEX_VERSION,
+                                     self.build_index, use_cache)
+        except Exception as e:
+            self.logger.error(f"Invalid GDS file {gds_file}: {str(e)}")
+            return None
+
+    def build_index(self, gds_file: Union[str, Path]) -> Dict:
+        """Validate the record stream and index its cells, references and layers.
+
+        Each cell records the byte range of its BGNSTR..ENDSTR block, the cells
+        it instantiates with instance counts (AREFs count columns x rows) and
+        its shapes per ``layer/datatype``. Raises ValueError on a malformed
+        stream.
+        """
+        index = {'version': GDS_INDEX_VERSION, 'library': None, 'units': None, 'cells': {}}
+        cells = index['cells']
+        cell = None
+        element = None
+        element_info: Dict = {}
+        seen_header = seen_units = ended = False
+
+        with GDSReader(gds_file) as reader:
+            for offset, length, rtype, dtype in reader.records():
+                record = GDS_RECORDS.get(rtype)
+                if record is None:
+                    raise ValueError(f"unknown record type 0x{rtype:02x} at offset {offset}")
+                name, expected = record
+                if expected is not None and dtype != expected and length > 4:
+                    raise ValueError(f"{name} at offset {offset} has data type {dtype}, expected {expected}")
+
+                if not seen_header:
+                    if rtype != 0x00:
+                        raise ValueError("stream does not start with HEADER")
+                    seen_header = True
+                elif rtype == 0x02:
+                    index['library'] = gds_string(reader.payload(offset, length))
+                elif rtype == 0x03:
+                    payload = reader.payload(offset, length)
+                    index['units'] = [gds_real8(payload[0:8]), gds_real8(payload[8:16])]
+                    seen_units = True
+                elif rtype == 0x05:
+                    if not seen_units:
+                        raise ValueError(f"BGNSTR before UNITS at offset {offset}")
+                    if cell is not None:
+                        raise ValueError(f"nested BGNSTR at offset {offset}")
+                    cell = {'offset': offset, 'end': None, 'references': {}, 'layers': {},
+                            'elements': 0, 'labels': 0}
+                elif rtype == 0x06:
+                    if cell is None or 'name' in cell:
+                        raise ValueError(f"STRNAME outside BGNSTR at offset {offset}")
+                    cell['name'] = gds_string(reader.payload(offset, length))
+                    if cell['name'] in cells:
+                        raise ValueError(f"duplicate cell {cell['name']} at offset {offset}")
+                elif rtype == 0x07:
+                    if cell is None or element is not None or 'name' not in cell:
+                        raise ValueError(f"unbalanced ENDSTR at offset {offset}")
+                    cell['end'] = offset + length
+                    cells[cell.pop('name')] = cell
+                    cell = None
+                elif rtype in GDS_ELEMENTS:
+                    if cell is None or 'name' not in cell or element is not None:
+                        raise ValueError(f"{name} outside a cell at offset {offset}")
+                    element = rtype
+                    element_info = {}
+                elif rtype == 0x11:
+                    if element is None:
+                        raise ValueError(f"ENDEL without element at offset {offset}")
+                    self._index_element(cell, element, element_info, offset)
+                    element = None
+                elif element is not None:
+                    if rtype == 0x0D:
+                        element_info['layer'] = reader.int2(offset)
+                    elif rtype in (0x0E, 0x16, 0x2A, 0x2E):
+                        element_info['datatype'] = reader.int2(offset)
+                    elif rtype == 0x12:
+                        element_info['sname'] = gds_string(reader.payload(offset, length))
+                    elif rtype == 0x13:
+                        element_info['colrow'] = (reader.int2(offset), reader.int2(offset, 1))
+                    elif rtype == 0x10:
+                        element_info['xy'] = True
+                elif rtype == 0x04:
+                    if cell is not None:
+                        raise ValueError(f"ENDLIB inside cell at offset {offset}")
+                    ended = True
+
+        if not ended:
+            raise ValueError("missing ENDLIB")
+
+        referenced = set()
+        for entry in cells.values():
+            referenced.update(entry['references'])
+        index['top_cells'] = sorted(set(cells) - referenced)
+        index['unresolved'] = sorted(referenced - set(cells))
+        index['layers'] = sorted({layer for entry in cells.values() for layer in entry['layers']},
+                                 key=lambda l: tuple(int(x) for x in l.split('/')))
+        return index
+
+    def _index_element(self, cell: Dict, element: int, info: Dict, offset: int):
+        """Add a completed element to its cell's index entry."""
+        name = GDS_RECORDS[element][0]
+        if element != 0x15 and 'xy' not in info:
+            raise ValueError(f"{name} without XY ending at offset {offset}")
+        cell['elements'] += 1
+        if element in (0x0A, 0x0B):
+            if 'sname' not in info:
+                raise ValueError(f"{name} without SNAME ending at offset {offset}")
+            cols, rows = info.get('colrow', (1, 1))
+            count = cols * rows if element == 0x0B else 1
+            cell['references'][info['sname']] = cell['references'].get(info['sname'], 0) + count
+        elif element in GDS_SHAPES:
+            if 'layer' not in info:
+                raise ValueError(f"{name} without LAYER ending at offset {offset}")
+            key = f"{info['layer']}/{info.get('datatype', 0)}"
+            cell['layers'][key] = cell['layers'].get(key, 0) + 1
+        elif element == 0x0C:
+            cell['labels'] += 1
+
+    def get_top_cells(self, gds_file: Union[str, Path]) -> List[str]:
+        """Cells of a GDS file that no other cell instantiates."""
+        index = self.get_index(gds_file)
+        return index['top_cells'] if index else []
+
+    def merge_gds_files(self, input_files: List[Union[str, Path]], output_file: Union[str, Path],
+                        method: str = 'native', top_cell: Optional[str] = None) -> bool:
+        """Merge multiple GDS files.
+
+        The top cells of the additional files are instantiated at the origin
+        of the first file's top cell (or ``top_cell``). The native method
+        streams cells straight from the inputs; KLayout is used when asked
+        for or when the native merge cannot represent the result.
+        """
         try:
             # Validate input files
             for file in input_files:
                 if not self.validate_gds(file):
                     return False
+
+            if method == 'native':
+                try:
+                    self._merge_gds_native(input_files, output_file, top_cell)
+                    self.logger.info(f"Merged {len(input_files)} GDS files into {output_file}")
+                    return True
+                except ValueError as e:
+                    self.logger.warning(f"Native GDS merge not possible ({str(e)}), falling back to KLayout")
             
             # Use command-line tool for merging
             command = ['klayout', '-z', '-rd', f"input_files={','.join(map(str, input_files))}",
@@ -201,25 +996,496 @@ class GDSFileHandler(FileHandler):
             self.logger.error(f"Error merging GDS files: {str(e)}")
             return False
 
+    def _merge_gds_native(self, input_files: List[Union[str, Path]], output_file: Union[str, Path],
+                          top_cell: Optional[str] = None):
+        """Stream the cells of all inputs into ``output_file``.
+
+        Cell blocks are copied from the memory-mapped inputs in fixed-size
+        chunks, so memory stays flat whatever the input size. Records are only
+        re-encoded where they must change: coordinates of inputs with a
+        coarser database unit, references to renamed cells, and the top cell
+        that gains the instances of the other inputs.
+        """
+        indexes = [self.get_index(f) for f in input_files]
+        if any(index is None for index in indexes):
+            raise ValueError("unreadable input")
+
+        # Finest database unit wins, coarser inputs are scaled up exactly
+        db_unit = min(index['units'][1] for index in indexes)
+        user_unit = indexes[0]['units'][1] / indexes[0]['units'][0]
+        scales = []
+        for f, index in zip(input_files, indexes):
+            ratio = index['units'][1] / db_unit
+            if abs(ratio - round(ratio)) > 1e-6 * ratio:
+                raise ValueError(f"database unit of {f} is not a multiple of {db_unit}")
+            scales.append(int(round(ratio)))
+
+        tops = indexes[0]['top_cells']
+        main_top = top_cell or (tops[0] if tops else None)
+        if main_top not in indexes[0]['cells']:
+            raise ValueError(f"top cell {main_top} not found in {input_files[0]}")
+        if len(tops) > 1 and top_cell is None:
+            self.logger.warning(f"{input_files[0]} has several top cells, merging into {main_top}")
+
+        output_path = Path(output_file)
+        tmp_path = output_path.with_name(output_path.name + '.tmp')
+        written: Dict[str, Tuple[int, Dict]] = {}
+        instances: List[str] = []
+
+        readers = [GDSReader(f) for f in input_files]
+        try:
+            for reader in readers:
+                reader.__enter__()
+
+            # Cell names per input after collision handling, and cells to skip.
+            # Children are planned before their parents, so a parent is only
+            # shared when every cell it references resolves to the same cell
+            # in both inputs.
+            plans = []
+            for i, (reader, index) in enumerate(zip(readers, indexes)):
+                rename: Dict[str, str] = {}
+                skip = set()
+                for name in self._cells_bottom_up(index['cells']):
+                    cell = index['cells'][name]
+                    if name not in written:
+                        written[name] = (i, cell)
+                        continue
+                    j, other = written[name]
+                    if (scales[i] == scales[j] and
+                            all(rename.get(child, child) == plans[j][0].get(child, child)
+                                for child in cell['references']) and
+                            self._same_cell(readers[j], other, reader, cell)):
+                        skip.add(name)
+                        continue
+                    new_name = f"{name}_{index['library'] or i}"
+                    suffix = 1
+                    while new_name in written or new_name in index['cells']:
+                        new_name = f"{name}_{index['library'] or i}_{suffix}"
+                        suffix += 1
+                    self.logger.warning(f"Cell name collision: {name} in {input_files[i]} renamed to {new_name}")
+                    rename[name] = new_name
+                    written[new_name] = (i, cell)
+                plans.append((rename, skip))
+                if i > 0:
+                    instances.extend(rename.get(top, top) for top in index['top_cells'])
+
+            with open(tmp_path, 'wb', buffering=1 << 20) as out:
+                self._write_library_header(readers[0], out, user_unit, db_unit)
+                for i, (reader, index) in enumerate(zip(readers, indexes)):
+                    rename, skip = plans[i]
+                    for name, cell in index['cells'].items():
+                        if name in skip:
+                            continue
+                        extra = b''
+                        if i == 0 and name == main_top:
+                            extra = b''.join(
+                                gds_record(0x0A, 0) + gds_record(0x12, 6, inst.encode('ascii')) +
+                                gds_record(0x10, 3, struct.pack('>2i', 0, 0)) + gds_record(0x11, 0)
+                                for inst in instances)
+                        self._copy_cell(reader, cell, out, rename.get(name), rename, scales[i], extra)
+                out.write(gds_record(0x04, 0))
+            tmp_path.replace(output_path)
+
+        finally:
+            for reader in readers:
+                if reader.data is not None:
+                    reader.__exit__()
+            tmp_path.unlink(missing_ok=True)
+
+    @staticmethod
+    def _cells_bottom_up(cells: Dict[str, Dict]) -> List[str]:
+        """Cell names ordered so every cell comes after the cells it references."""
+        order: List[str] = []
+        done = set()
+        for root in cells:
+            if root in done:
+                continue
+            done.add(root)
+            stack = [(root, iter(cells[root]['references']))]
+            while stack:
+                name, children = stack[-1]
+                child = next(children, None)
+                if child is None:
+                    stack.pop()
+                    order.append(name)
+                elif child in cells and child not in done:
+                    done.add(child)
+                    stack.append((child, iter(cells[child]['references'])))
+        return order
+
+    def _same_cell(self, reader_a: GDSReader, cell_a: Dict, reader_b: GDSReader, cell_b: Dict) -> bool:
+        """True if two cells have identical content, ignoring BGNSTR timestamps."""
+        size_a = cell_a['end'] - cell_a['offset']
+        if size_a != cell_b['end'] - cell_b['offset']:
+            return False
+        # BGNSTR is always 28 bytes: header plus 12 int2 dates
+        with memoryview(reader_a.data) as a, memoryview(reader_b.data) as b:
+            return a[cell_a['offset'] + 28:cell_a['end']] == b[cell_b['offset'] + 28:cell_b['end']]
+
+    def _write_library_header(self, reader: GDSReader, out, user_unit: float, db_unit: float):
+        """Copy the library records of the first input, with merged UNITS."""
+        for offset, length, rtype, dtype in reader.records():
+            if rtype == 0x05 or rtype == 0x04:
+                break
+            if rtype == 0x03:
+                out.write(gds_record(0x03, 5, gds_real8_bytes(db_unit / user_unit) + gds_real8_bytes(db_unit)))
+            else:
+                out.write(reader.data[offset:offset + length])
+
+    def _copy_cell(self, reader: GDSReader, cell: Dict, out, new_name: Optional[str],
+                   rename: Dict[str, str], scale: int, extra: bytes, chunk: int = 8 << 20):
+        """Write one cell block, re-encoding only the records that change."""
+        start, end = cell['offset'], cell['end']
+        if new_name is None and scale == 1 and not extra and not rename.keys() & cell['references'].keys():
+            with memoryview(reader.data) as view:
+                for pos in range(start, end, chunk):
+                    out.write(view[pos:min(pos + chunk, end)])
+            return
+
+        for offset, length, rtype, dtype in reader.records(start, end):
+            if rtype == 0x06 and new_name is not None:
+                out.write(gds_record(0x06, 6, new_name.encode('ascii')))
+            elif rtype == 0x12 and rename:
+                name = gds_string(reader.payload(offset, length))
+                if name in rename:
+                    out.write(gds_record(0x12, 6, rename[name].encode('ascii')))
+                else:
+                    out.write(reader.data[offset:offset + length])
+            elif scale != 1 and rtype in (0x0F, 0x10, 0x30, 0x31):
+                values = array.array('i', reader.payload(offset, length))
+                if sys.byteorder == 'little':
+                    values.byteswap()
+                if any(abs(v) * scale >= 1 << 31 for v in values):
+                    raise ValueError(f"coordinates at offset {offset} overflow after scaling")
+                values = array.array('i', (v * scale for v in values))
+                if sys.byteorder == 'little':
+                    values.byteswap()
+                out.write(gds_record(rtype, dtype, values.tobytes()))
+            elif rtype == 0x07 and extra:
+                out.write(extra)
+                out.write(reader.data[offset:offset + length])
+            else:
+                out.write(reader.data[offset:offset + length])
+
+# LEF blocks opened by a keyword in a given enclosing block, with
+# whether the block carries a name that its END must repeat
+LEF_BLOCKS = {
+    None: {'MACRO': True, 'SITE': True, 'LAYER': True, 'VIA': True, 'VIARULE': True,
+           'NONDEFAULTRULE': True, 'ARRAY': True, 'UNITS': False,
+           'PROPERTYDEFINITIONS': False, 'SPACING': False},
+    'MACRO': {'PIN': True, 'OBS': False, 'DENSITY': False},
+    'PIN': {'PORT': False},
+    'NONDEFAULTRULE': {'LAYER': True, 'VIA': True, 'SPACING': False},
+    'ARRAY': {'FLOORPLAN': True},
+}
+
+# Bump when the layout of cached LEF indexes changes
+LEF_INDEX_VERSION = 1
+
+_LEF_TOKEN = re.compile(r'"[^"]*"|#.*|[^\s;"#]+|;')
+
+def lef_lines(path: Union[str, Path], start: int = 0,
+              end: Optional[int] = None) -> Iterator[Tuple[int, int, List[str]]]:
+    """Yield ``(offset, line_number, tokens)`` for each non-empty LEF line.
+
+    The file is read one line at a time, so memory does not grow with its
+    size. Comments are dropped and ``;`` is always its own token.
+    """
+    with open(path, 'rb') as f:
+        f.seek(start)
+        offset = start
+        for line_number, raw in enumerate(f, 1):
+            if end is not None and offset >= end:
+                break
+            tokens = _LEF_TOKEN.findall(raw.decode('utf-8', errors='replace'))
+            for position, token in enumerate(tokens):
+                if token[0] == '#':
+                    del tokens[position:]
+                    break
+            if tokens:
+                yield offset, line_number, tokens
+            offset += len(raw)
+
+def lef_shape(tokens: List[str], where: str) -> Tuple[str, List[float]]:
+    """Parse a RECT or POLYGON statement into its kind and coordinates."""
+    kind = tokens[0]
+    values = tokens[1:-1]
+    if values[:1] == ['MASK']:
+        values = values[2:]
+    if values[:1] == ['ITERATE']:
+        raise ValueError(f"ITERATE shapes are not supported {where}")
+    try:
+        coords = [float(v) for v in values]
+    except ValueError:
+        raise ValueError(f"non-numeric {kind} coordinates {where}")
+    if kind == 'RECT':
+        if len(coords) != 4:
+            raise ValueError(f"RECT needs 4 coordinates {where}")
+        x1, y1, x2, y2 = coords
+        coords = [min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2)]
+    elif len(coords) < 6 or len(coords) % 2:
+        raise ValueError(f"POLYGON needs at least 3 points {where}")
+    return kind, coords
+
 class LEFFileHandler(FileHandler):
     """LEF-specific file handling utilities."""
     
-    def validate_lef(self, lef_file: Union[str, Path]) -> bool:
-        """Validate LEF file format."""
+    def validate_lef(self, lef_file: Union[str, Path], require_macros: bool = True) -> bool:
+        """Validate LEF file structure, building the index on the way."""
         try:
-            content = self.read_file(lef_file)
-            if not content:
+            index = self.get_index(lef_file)
+            if index is None:
                 return False
-                
-            # Check for required LEF keywords
-            required_keywords = ['VERSION', 'BUSBITCHARS', 'DIVIDERCHAR', 'MACRO']
-            for keyword in required_keywords:
-                if keyword not in content:
-                    self.logger.error(f"Missing required LEF keyword {keyword} in {lef_file}")
+
+            # Check for required LEF statements
+            for field, keyword in (('lef_version', 'VERSION'), ('busbitchars', 'BUSBITCHARS'),
+                                   ('dividerchar', 'DIVIDERCHAR')):
+                if index.get(field) is None:
+                    self.logger.error(f"Missing required LEF statement {keyword} in {lef_file}")
                     return False
-                    
+            if require_macros and not index['macros']:
+                self.logger.error(f"No MACRO defined in {lef_file}")
+                return False
+
             return True
             
         except Exception as e:
             self.logger.error(f"Error validating LEF file {lef_file}: {str(e)}")
-            return False
\ No newline at end of file
+            return False
+
+    def index_path(self, lef_file: Union[str, Path]) -> Path:
+        """Location of the cached index next to ``lef_file``."""
+        path = Path(lef_file)
+        return path.with_name(path.name + '.index.json')
+
+    def get_index(self, lef_file: Union[str, Path], use_cache: bool = True) -> Optional[Dict]:
+        """Return the index of a LEF file, from the cache when it is current."""
+        try:
+            return self.cached_index(lef_file, self.index_path(lef_file), LEF_INDEX_VERSION,
+                                     self.build_index, use_cache)
+        except Exception as e:
+            self.logger.error(f"Invalid LEF file {lef_file}: {str(e)}")
+            return None
+
+    def build_index(self, lef_file: Union[str, Path]) -> Dict:
+        """Parse a LEF file in one streaming pass and index its definitions.
+
+        Macros record their byte range, class, size, site and foreign cell,
+        and every pin its direction, use and port geometry per layer.
+        Obstructions are summarized per layer with their byte range so the
+        shapes can be read back on demand. Raises ValueError on unbalanced
+        blocks, unterminated statements and malformed geometry.
+        """
+        index = {'lef_version': None, 'busbitchars': None, 'dividerchar': None,
+                 'database_microns': None, 'sites': {}, 'layers': [], 'macros': {}}
+        stack: List[Dict] = []
+        statement: List[str] = []
+        statement_line = 0
+        ended = False
+
+        for offset, line_number, tokens in lef_lines(lef_file):
+            if ended:
+                continue
+            # Fast path for the common one-statement line
+            if (not statement and tokens[-1] == ';' and tokens[0] != 'END' and
+                    tokens[0] not in LEF_BLOCKS.get(stack[-1]['kind'] if stack else None, ()) and
+                    tokens.count(';') == 1):
+                self._lef_statement(index, stack, tokens, f"at line {line_number}")
+                continue
+            where = f"at line {line_number}"
+            position = 0
+            while position < len(tokens):
+                token = tokens[position]
+                context = stack[-1]['kind'] if stack else None
+
+                if not statement and token == 'END':
+                    if not stack:
+                        if tokens[position + 1:position + 2] != ['LIBRARY']:
+                            raise ValueError(f"END outside any block {where}")
+                        ended = True
+                        break
+                    block = stack.pop()
+                    name = tokens[position + 1] if position + 1 < len(tokens) else None
+                    expected = block.get('name')
+                    if expected is not None and name != expected:
+                        raise ValueError(f"END {name} does not close {block['kind']} {expected} {where}")
+                    # Unnamed blocks close with a bare END or END <kind>
+                    position += 2 if expected is not None or name == block['kind'] else 1
+                    self._close_lef_block(index, stack, block, offset, where)
+                    continue
+
+                named = LEF_BLOCKS.get(context, {}).get(token)
+                if not statement and named is not None:
+                    rest = tokens[position + 1:]
+                    if ';' not in rest:
+                        if named and not rest:
+                            raise ValueError(f"{token} without a name {where}")
+                        block = {'kind': token, 'offset': offset, 'line': line_number}
+                        if named:
+                            block['name'] = rest[0]
+                        self._open_lef_block(index, stack, block, where)
+                        stack.append(block)
+                        break
+
+                if statement and (token == 'END' or (position == 0 and named is not None and ';' not in tokens)):
+                    raise ValueError(f"missing ';' after {' '.join(statement)} at line {statement_line}")
+                if not statement:
+                    statement_line = line_number
+                statement.append(token)
+                position += 1
+                if token == ';':
+                    self._lef_statement(index, stack, statement, f"at line {statement_line}")
+                    statement = []
+
+        if statement:
+            raise ValueError(f"unterminated statement {' '.join(statement)} at line {statement_line}")
+        if stack:
+            block = stack[-1]
+            raise ValueError(f"{block['kind']} {block.get('name', '')} at line {block['line']} is never closed")
+        return index
+
+    def _open_lef_block(self, index: Dict, stack: List[Dict], block: Dict, where: str):
+        kind, name = block['kind'], block.get('name')
+        parent = stack[-1] if stack else None
+        if kind == 'MACRO':
+            if name in index['macros']:
+                raise ValueError(f"duplicate MACRO {name} {where}")
+            block['entry'] = {'offset': block['offset'], 'end': None, 'line': block['line'],
+                              'class': None, 'origin': [0.0, 0.0], 'size': None, 'site': None,
+                              'foreign': None, 'symmetry': [], 'pins': {}, 'obs': None}
+        elif kind == 'PIN':
+            pins = parent['entry']['pins']
+            if name in pins:
+                raise ValueError(f"duplicate PIN {name} in MACRO {parent['name']} {where}")
+            block['entry'] = pins[name] = {'direction': None, 'use': None, 'shape': None, 'ports': []}
+        elif kind == 'PORT':
+            block['entry'] = {}
+            parent['entry']['ports'].append(block['entry'])
+        elif kind == 'OBS':
+            macro = parent['entry']
+            if macro['obs'] is not None:
+                raise ValueError(f"second OBS in MACRO {parent['name']} {where}")
+            macro['obs'] = block['entry'] = {'offset': block['offset'], 'end': None, 'layers': {}}
+        elif kind == 'SITE':
+            block['entry'] = index['sites'][name] = {'class': None, 'size': None, 'symmetry': []}
+        elif kind == 'LAYER' and parent is None:
+            index['layers'].append(name)
+
+    def _close_lef_block(self, index: Dict, stack: List[Dict], block: Dict, offset: int, where: str):
+        kind = block['kind']
+        if kind == 'MACRO':
+            macro = block['entry']
+            if macro['size'] is None:
+                raise ValueError(f"MACRO {block['name']} has no SIZE {where}")
+            macro['end'] = offset
+            index['macros'][block['name']] = macro
+        elif kind == 'PORT':
+            if not block['entry'] and not block.get('vias'):
+                raise ValueError(f"empty PORT {where}")
+        elif kind == 'OBS':
+            block['entry']['end'] = offset
+
+    def _lef_statement(self, index: Dict, stack: List[Dict], tokens: List[str], where: str):
+        """Apply one ``;``-terminated statement to the block it appears in."""
+        keyword = tokens[0]
+        args = tokens[1:-1]
+        block = stack[-1] if stack else None
+        context = block['kind'] if block else None
+
+        if context is None:
+            if keyword == 'VERSION':
+                index['lef_version'] = args[0] if args else None
+            elif keyword == 'BUSBITCHARS':
+                index['busbitchars'] = args[0].strip('"') if args else None
+            elif keyword == 'DIVIDERCHAR':
+                index['dividerchar'] = args[0].strip('"') if args else None
+        elif context == 'UNITS':
+            if keyword == 'DATABASE' and len(args) == 2:
+                index['database_microns'] = int(float(args[1]))
+        elif context in ('MACRO', 'SITE'):
+            entry = block['entry']
+            if keyword == 'CLASS':
+                entry['class'] = ' '.join(args)
+            elif keyword == 'SIZE':
+                if len(args) != 3 or args[1] != 'BY':
+                    raise ValueError(f"malformed SIZE {where}")
+                entry['size'] = [float(args[0]), float(args[2])]
+            elif keyword == 'SYMMETRY':
+                entry['symmetry'] = args
+            elif context == 'MACRO':
+                if keyword == 'ORIGIN' and len(args) == 2:
+                    entry['origin'] = [float(args[0]), float(args[1])]
+                elif keyword == 'SITE' and args:
+                    entry['site'] = args[0]
+                elif keyword == 'FOREIGN' and args:
+                    entry['foreign'] = args[0]
+        elif context == 'PIN':
+            if keyword in ('DIRECTION', 'USE', 'SHAPE') and args:
+                block['entry'][keyword.lower()] = args[0]
+        elif context in ('PORT', 'OBS'):
+            if keyword == 'LAYER':
+                if not args:
+                    raise ValueError(f"LAYER without a name {where}")
+                block['layer'] = args[0]
+            elif keyword in ('RECT', 'POLYGON'):
+                layer = block.get('layer')
+                if layer is None:
+                    raise ValueError(f"{keyword} before LAYER {where}")
+                kind, coords = lef_shape(tokens, where)
+                if context == 'PORT':
+                    shapes = block['entry'].setdefault(layer, {'rects': [], 'polygons': []})
+                    shapes['rects' if kind == 'RECT' else 'polygons'].append(coords)
+                else:
+                    counts = block['entry']['layers']
+                    counts[layer] = counts.get(layer, 0) + 1
+            elif keyword == 'VIA':
+                block['vias'] = block.get('vias', 0) + 1
+
+    def get_macro(self, lef_file: Union[str, Path], macro: str) -> Optional[Dict]:
+        """Indexed definition of ``macro``, or None if the file does not define it."""
+        index = self.get_index(lef_file)
+        if index is None:
+            return None
+        return index['macros'].get(macro)
+
+    def get_pin_geometry(self, lef_file: Union[str, Path], macro: str,
+                         pin: str) -> Optional[Dict[str, List[List[float]]]]:
+        """Rectangles of ``pin`` per layer across all its ports, in microns.
+
+        Polygons are reported as their bounding rectangle.
+        """
+        entry = self.get_macro(lef_file, macro)
+        if entry is None or pin not in entry['pins']:
+            return None
+        geometry: Dict[str, List[List[float]]] = {}
+        for port in entry['pins'][pin]['ports']:
+            for layer, shapes in port.items():
+                rects = geometry.setdefault(layer, [])
+                rects.extend(shapes['rects'])
+                for points in shapes['polygons']:
+                    xs, ys = points[0::2], points[1::2]
+                    rects.append([min(xs), min(ys), max(xs), max(ys)])
+        return geometry
+
+    def get_obstructions(self, lef_file: Union[str, Path], macro: str) -> Optional[Dict[str, List]]:
+        """Read back the OBS shapes of ``macro`` per layer from its indexed byte range."""
+        entry = self.get_macro(lef_file, macro)
+        if entry is None:
+            return None
+        obs = entry['obs']
+        shapes: Dict[str, List] = {}
+        if obs is None:
+            return shapes
+        layer = None
+        statement: List[str] = []
+        for offset, line_number, tokens in lef_lines(lef_file, obs['offset'], obs['end']):
+            for token in tokens[1:] if tokens[0] == 'OBS' and not statement else tokens:
+                statement.append(token)
+                if token != ';':
+                    continue
+                if statement[0] == 'LAYER':
+                    layer = statement[1]
+                elif statement[0] in ('RECT', 'POLYGON'):
+                    shapes.setdefault(layer, []).append(lef_shape(statement, f"at offset {offset}")[1])
+                statement = []
+        return shapes
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# -----------------------------------------------------------------------------
+# File: gds_analysis.py
+# Project: SimpleARM - A Simplified ARM Cortex-M0 Processor Core
+# Purpose: Area, layer and hierarchy statistics of GDS layouts
+# -----------------------------------------------------------------------------
+
+import math
+import struct
+from pathlib import Path
+from typing import Dict, List, Tuple, Union
+import numpy as np
+from file_handlers import GDSFileHandler, GDSReader, gds_real8, gds_string
+
+def polygon_areas(xy: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """Shoelace areas of many closed polygons stored back to back.
+
+    ``xy`` holds all vertices as an (N, 2) array and ``lengths`` the vertex
+    count of each polygon, in order.
+    """
+    if len(lengths) == 0:
+        return np.zeros(0)
+    x = xy[:, 0].astype(np.float64)
+    y = xy[:, 1].astype(np.float64)
+    cross = np.empty_like(x)
+    cross[:-1] = x[:-1] * y[1:] - x[1:] * y[:-1]
+    ends = np.cumsum(lengths) - 1
+    # Drop the terms that would join one polygon to the next; GDS
+    # boundaries repeat their first vertex, so each polygon is closed
+    cross[ends] = 0.0
+    starts = ends - lengths + 1
+    return np.abs(np.add.reduceat(cross, starts)) / 2.0
+
+def path_areas(xy: np.ndarray, lengths: np.ndarray, widths: np.ndarray) -> np.ndarray:
+    """Approximate path areas as centerline length times width."""
+    if len(lengths) == 0:
+        return np.zeros(0)
+    segments = np.hypot(*np.diff(xy.astype(np.float64), axis=0).T)
+    ends = np.cumsum(lengths) - 1
+    segments = np.append(segments, 0.0)
+    segments[ends] = 0.0
+    starts = ends - lengths + 1
+    return np.add.reduceat(segments, starts) * widths
+
+def transform_bbox(bbox: List[float], origin: Tuple[float, float], angle: float,
+                   mag: float, reflect: bool) -> np.ndarray:
+    """Bounding box corners of a child after a GDS reference transform."""
+    corners = np.array([[bbox[0], bbox[1]], [bbox[2], bbox[1]],
+                        [bbox[2], bbox[3]], [bbox[0], bbox[3]]], dtype=np.float64)
+    if reflect:
+        corners[:, 1] = -corners[:, 1]
+    theta = math.radians(angle)
+    rotation = np.array([[math.cos(theta), -math.sin(theta)],
+                         [math.sin(theta), math.cos(theta)]])
+    return corners @ rotation.T * mag + np.asarray(origin, dtype=np.float64)
+
+class GDSAnalyzer:
+    """Area, layer and hierarchy statistics read directly from a GDS file."""
+
+    def __init__(self, gds_handler: GDSFileHandler):
+        self.gds_handler = gds_handler
+
+    def _read_cell(self, reader: GDSReader, cell: Dict) -> Dict:
+        """Collect shape coordinates per layer and reference transforms of one cell."""
+        shapes: Dict[str, Dict[str, list]] = {}
+        references = []
+        element = None
+        info: Dict = {}
+        for offset, length, rtype, dtype in reader.records(cell['offset'], cell['end']):
+            if rtype in (0x08, 0x09, 0x0A, 0x0B, 0x2D):
+                element = rtype
+                info = {}
+            elif rtype in (0x0C, 0x15):
+                element = None
+            elif element is None:
+                continue
+            elif rtype == 0x0D:
+                info['layer'] = reader.int2(offset)
+            elif rtype in (0x0E, 0x2E):
+                info['datatype'] = reader.int2(offset)
+            elif rtype == 0x0F:
+                info['width'] = abs(struct.unpack_from('>i', reader.data, offset + 4)[0])
+            elif rtype == 0x10:
+                info['xy'] = reader.payload(offset, length)
+            elif rtype == 0x12:
+                info['sname'] = gds_string(reader.payload(offset, length))
+            elif rtype == 0x13:
+                info['colrow'] = (reader.int2(offset), reader.int2(offset, 1))
+            elif rtype == 0x1A:
+                info['reflect'] = bool(reader.data[offset + 4] & 0x80)
+            elif rtype == 0x1B:
+                info['mag'] = gds_real8(reader.payload(offset, length))
+            elif rtype == 0x1C:
+                info['angle'] = gds_real8(reader.payload(offset, length))
+            elif rtype == 0x11:
+                if element in (0x0A, 0x0B):
+                    references.append((element, info))
+                else:
+                    layer = shapes.setdefault(f"{info.get('layer', 0)}/{info.get('datatype', 0)}",
+                                              {'polygons': [], 'paths': [], 'widths': []})
+                    if element == 0x09:
+                        layer['paths'].append(info['xy'])
+                        layer['widths'].append(info.get('width', 0))
+                    else:
+                        layer['polygons'].append(info['xy'])
+                element = None
+        return {'shapes': shapes, 'references': references}
+
+    def _cell_stats(self, raw: Dict) -> Dict:
+        """Per-layer polygon counts, areas and the bounding box of local shapes."""
+        layers = {}
+        mins, maxs = [], []
+        for key, shapes in raw['shapes'].items():
+            area = 0.0
+            count = len(shapes['polygons']) + len(shapes['paths'])
+            for kind in ('polygons', 'paths'):
+                chunks = shapes[kind]
+                if not chunks:
+                    continue
+                xy = np.frombuffer(b''.join(chunks), dtype='>i4').reshape(-1, 2)
+                lengths = np.fromiter((len(c) // 8 for c in chunks), dtype=np.int64, count=len(chunks))
+                if kind == 'polygons':
+                    area += float(polygon_areas(xy, lengths).sum())
+                else:
+                    widths = np.asarray(shapes['widths'], dtype=np.float64)
+                    area += float(path_areas(xy, lengths, widths).sum())
+                    # Widen the path bbox by half its largest width
+                    half = widths.max() / 2
+                    mins.append(xy.min(axis=0) - half)
+                    maxs.append(xy.max(axis=0) + half)
+                    continue
+                mins.append(xy.min(axis=0))
+                maxs.append(xy.max(axis=0))
+            layers[key] = {'polygons': count, 'area': area}
+        bbox = None
+        if mins:
+            lo = np.min(mins, axis=0)
+            hi = np.max(maxs, axis=0)
+            bbox = [float(lo[0]), float(lo[1]), float(hi[0]), float(hi[1])]
+        return {'layers': layers, 'bbox': bbox}
+
+    def analyze(self, gds_file: Union[str, Path]) -> Dict:
+        """Build the full report for ``gds_file``."""
+        index = self.gds_handler.get_index(gds_file)
+        if index is None:
+            raise ValueError(f"invalid GDS file {gds_file}")
+        cells = index['cells']
+        db_unit = index['units'][1]
+        um = db_unit / 1e-6
+        um2 = um * um
+
+        # Children before parents, so each bbox can use its children's
+        order: List[str] = []
+        state: Dict[str, int] = {}
+        for root in cells:
+            stack = [(root, False)]
+            while stack:
+                name, done = stack.pop()
+                if done:
+                    state[name] = 2
+                    order.append(name)
+                    continue
+                if state.get(name) or name not in cells:
+                    continue
+                state[name] = 1
+                stack.append((name, True))
+                stack.extend((child, False) for child in cells[name]['references'] if not state.get(child))
+
+        stats: Dict[str, Dict] = {}
+        refs: Dict[str, List] = {}
+        with GDSReader(gds_file) as reader:
+            for name in order:
+                raw = self._read_cell(reader, cells[name])
+                stats[name] = self._cell_stats(raw)
+                refs[name] = raw['references']
+                corners = []
+                if stats[name]['bbox']:
+                    b = stats[name]['bbox']
+                    corners.append(np.array([[b[0], b[1]], [b[2], b[3]]]))
+                for element, info in refs[name]:
+                    child = stats.get(info.get('sname'), {}).get('bbox')
+                    if child is None:
+                        continue
+                    xy = np.frombuffer(info['xy'], dtype='>i4').reshape(-1, 2).astype(np.float64)
+                    placed = transform_bbox(child, xy[0], info.get('angle', 0.0),
+                                            info.get('mag', 1.0), info.get('reflect', False))
+                    corners.append(placed)
+                    if element == 0x0B:
+                        # Far corners of the array span
+                        cols, rows = info.get('colrow', (1, 1))
+                        col_step = (xy[1] - xy[0]) / max(cols, 1)
+                        row_step = (xy[2] - xy[0]) / max(rows, 1)
+                        corners.append(placed + col_step * (cols - 1) + row_step * (rows - 1))
+                if corners:
+                    pts = np.vstack(corners)
+                    lo, hi = pts.min(axis=0), pts.max(axis=0)
+                    stats[name]['bbox'] = [float(lo[0]), float(lo[1]), float(hi[0]), float(hi[1])]
+
+        # Flattened instance counts and area weights, parents before children
+        instances = {name: 0 for name in cells}
+        weights = {name: 0.0 for name in cells}
+        for top in index['top_cells']:
+            instances[top] = 1
+            weights[top] = 1.0
+        for name in reversed(order):
+            for element, info in refs[name]:
+                child = info.get('sname')
+                if child not in cells:
+                    continue
+                cols, rows = info.get('colrow', (1, 1)) if element == 0x0B else (1, 1)
+                count = cols * rows
+                instances[child] += instances[name] * count
+                weights[child] += weights[name] * count * info.get('mag', 1.0) ** 2
+
+        layers: Dict[str, Dict] = {}
+        for name, cell_stats in stats.items():
+            for key, layer in cell_stats['layers'].items():
+                total = layers.setdefault(key, {'polygons': 0, 'area_um2': 0.0})
+                total['polygons'] += instances[name] * layer['polygons']
+                total['area_um2'] += weights[name] * layer['area'] * um2
+
+        def bbox_um(bbox):
+            return [round(v * um, 4) for v in bbox] if bbox else None
+
+        def tree(name: str, depth: int = 0) -> Dict:
+            node = {'cell': name}
+            children = cells[name]['references'] if name in cells else {}
+            if children and depth < 64:
+                node['children'] = [dict(tree(child, depth + 1), count=count)
+                                    for child, count in sorted(children.items())]
+            return node
+
+        report = {
+            'file': str(gds_file),
+            'library': index['library'],
+            'units': {'user': index['units'][0], 'database_m': db_unit},
+            'top_cells': {},
+            'layers': {key: {'polygons': v['polygons'], 'area_um2': round(v['area_um2'], 6)}
+                       for key, v in sorted(layers.items(),
+                                            key=lambda kv: tuple(int(x) for x in kv[0].split('/')))},
+            'cells': {},
+            'hierarchy': [tree(top) for top in index['top_cells']],
+        }
+        for top in index['top_cells']:
+            bbox = bbox_um(stats[top]['bbox'])
+            report['top_cells'][top] = {
+                'bbox_um': bbox,
+                'area_um2': round((bbox[2] - bbox[0]) * (bbox[3] - bbox[1]), 6) if bbox else 0.0,
+            }
+        for name in sorted(cells):
+            report['cells'][name] = {
+                'bbox_um': bbox_um(stats[name]['bbox']),
+                'instances': instances[name],
+                'polygons': sum(layer['polygons'] for layer in stats[name]['layers'].values()),
+                'children': cells[name]['references'],
+            }
+        if index['unresolved']:
+            report['unresolved'] = index['unresolved']
+        return report
@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+# -----------------------------------------------------------------------------
+# File: signoff_reports.py
+# Project: SimpleARM - A Simplified ARM Cortex-M0 Processor Core
+# Purpose: Streaming DRC/LVS report parsers and an indexed violation store
+# -----------------------------------------------------------------------------
+
+import sqlite3
+import logging
+import itertools
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+# Bump when the schema or the parsers change
+SIGNOFF_DB_VERSION = 1
+
+# Rows handed to SQLite per executemany call while loading a report
+_BATCH = 10000
+
+_SEPARATOR = '-' * 40
+
+def parse_drc_report(report: Union[str, Path]) -> Iterator[Tuple[str, str, List[float]]]:
+    """Stream ``(cell, rule, box)`` from a Magic DRC report, box in microns.
+
+    The report is the flow's drc.log: a cell name, a separator, then per
+    rule its name, a separator, one ``x0 y0 x1 y1`` line per violation and
+    a closing separator, ended by ``COUNT: n``. Several such sections may
+    follow each other, one per checked cell.
+    """
+    cell = None
+    rule = None
+    in_boxes = False
+    with open(report, 'r', errors='replace') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if cell is None:
+                cell = line
+                next(f, None)
+                continue
+            if line.startswith(_SEPARATOR):
+                # Opens the box list after a rule name, closes it after the boxes
+                in_boxes = not in_boxes
+            elif in_boxes:
+                fields = line.split()
+                if len(fields) == 4:
+                    try:
+                        yield cell, rule, [float(v) for v in fields]
+                    except ValueError:
+                        pass
+            elif line.startswith('COUNT:'):
+                cell = None
+            else:
+                rule = line
+
+# Kinds of records produced by parse_lvs_report
+LVS_NET = 'net'
+LVS_DEVICE = 'device'
+LVS_PROPERTY = 'property'
+LVS_COUNT = 'count'
+LVS_RESULT = 'result'
+
+_LVS_SECTIONS = (
+    ('NET mismatches', LVS_NET),
+    ('DEVICE mismatches', LVS_DEVICE),
+    ('Property errors', LVS_PROPERTY),
+)
+
+def parse_lvs_report(report: Union[str, Path]) -> Iterator[Dict]:
+    """Stream mismatch records from a Netgen LVS report.
+
+    Yields dicts with ``kind`` (net, device, property, count or result),
+    ``name``, ``circuit`` (1 for the layout, 2 for the reference, 0 when
+    both), ``cell`` and ``detail``. Net and device records come from the
+    class fragments of the mismatch sections, one per side an entry
+    appears on; their indented pin or property lines form the detail.
+    """
+    cells = ['', '']
+    section = None
+    entries: List[Optional[Dict]] = [None, None]
+
+    def flush():
+        for side in (0, 1):
+            if entries[side] is not None:
+                entries[side]['detail'] = '; '.join(entries[side]['detail'])
+                yield entries[side]
+                entries[side] = None
+
+    with open(report, 'r', errors='replace') as f:
+        for raw in f:
+            line = raw.rstrip('\n')
+            stripped = line.strip()
+
+            if stripped.startswith('---'):
+                yield from flush()
+                continue
+            if stripped.startswith('Subcircuit summary') or stripped.startswith('Subcircuit pins'):
+                yield from flush()
+                section = None
+                continue
+            heading = next((kind for text, kind in _LVS_SECTIONS if stripped.startswith(text)), None)
+            if heading is not None:
+                yield from flush()
+                section = heading
+                continue
+            lowered = stripped.lower()
+            if ('netlists' in lowered or 'circuits' in lowered or 'final result' in lowered) and \
+                    ('match' in lowered or 'mismatch' in lowered):
+                yield from flush()
+                yield {'kind': LVS_RESULT, 'name': stripped, 'circuit': 0,
+                       'cell': cells[0], 'detail': ''}
+                continue
+
+            left, bar, right = line.partition('|')
+            raw_columns = (left, right) if bar else (line, '')
+            columns = tuple(text.strip() for text in raw_columns)
+
+            if columns[0].startswith('Circuit 1:') and columns[1].startswith('Circuit 2:'):
+                cells = [columns[0][len('Circuit 1:'):].strip(), columns[1][len('Circuit 2:'):].strip()]
+                continue
+            if '**Mismatch**' in line and columns[0].startswith('Number of'):
+                name = columns[0].split(':')[0][len('Number of'):].strip()
+                yield {'kind': LVS_COUNT, 'name': name, 'circuit': 0, 'cell': cells[0],
+                       'detail': f"{columns[0]} | {columns[1].replace('**Mismatch**', '').strip()}"}
+                continue
+            if section is None:
+                continue
+
+            for side, text in enumerate(columns):
+                if not text or text.startswith('(no matching'):
+                    continue
+                label, colon, name = text.partition(':')
+                # Entries start at the column edge, their pins or properties are indented
+                if colon and label in ('Net', 'Instance') and not raw_columns[side][:1].isspace():
+                    if entries[side] is not None:
+                        entries[side]['detail'] = '; '.join(entries[side]['detail'])
+                        yield entries[side]
+                    entries[side] = {'kind': section, 'name': name.strip(), 'circuit': side + 1,
+                                     'cell': cells[side], 'detail': []}
+                elif entries[side] is not None and len(entries[side]['detail']) < 64:
+                    entries[side]['detail'].append(text)
+        yield from flush()
+
+class SignoffStore:
+    """Indexed SQLite store of DRC violations and LVS mismatches.
+
+    Reports are streamed in batches, so memory stays flat regardless of
+    report size. Violations are indexed by rule, by cell and by spatial bin
+    of ``bin_um`` microns; boxes are kept in integer nanometres so two runs
+    compare exactly. A loaded report is reused while its size and mtime are
+    unchanged.
+    """
+
+    def __init__(self, db_file: Union[str, Path], bin_um: float = 50.0):
+        self.db_file = Path(db_file)
+        self.bin_um = bin_um
+        self.logger = logging.getLogger(__name__)
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = self._connect()
+        self._init_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database the same way wherever the store (re)connects."""
+        conn = sqlite3.connect(str(self.db_file), check_same_thread=False)
+        # The store is rebuilt from the reports, so trade durability for load speed
+        conn.execute("PRAGMA synchronous = OFF")
+        return conn
+
+    def _init_schema(self):
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, SIGNOFF_DB_VERSION):
+            self.conn.close()
+            self.db_file.unlink()
+            self.conn = self._connect()
+        self.conn.executescript(f"""
+            PRAGMA user_version = {SIGNOFF_DB_VERSION};
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS rules (id INTEGER PRIMARY KEY, name TEXT UNIQUE);
+            CREATE TABLE IF NOT EXISTS cells (id INTEGER PRIMARY KEY, name TEXT UNIQUE);
+            CREATE TABLE IF NOT EXISTS drc (
+                rule INTEGER, cell INTEGER,
+                x0 INTEGER, y0 INTEGER, x1 INTEGER, y1 INTEGER,
+                bx INTEGER, by INTEGER);
+            CREATE TABLE IF NOT EXISTS lvs (
+                kind TEXT, name TEXT, circuit INTEGER, cell TEXT, detail TEXT);
+            CREATE INDEX IF NOT EXISTS lvs_name ON lvs (kind, name);
+        """)
+        self._index_drc()
+        self.conn.commit()
+
+    def _index_drc(self):
+        self.conn.executescript("""
+            CREATE INDEX IF NOT EXISTS drc_rule ON drc (rule);
+            CREATE INDEX IF NOT EXISTS drc_cell ON drc (cell);
+            CREATE INDEX IF NOT EXISTS drc_bin ON drc (bx, by);
+        """)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self) -> 'SignoffStore':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _meta(self, key: str) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _fresh(self, key: str, report: Path, extra: str = '') -> Tuple[bool, str]:
+        stat = report.stat()
+        stamp = f"{report.resolve()}:{stat.st_size}:{stat.st_mtime_ns}:{extra}"
+        return self._meta(key) == stamp, stamp
+
+    def _id(self, table: str, name: str, cache: Dict[str, int]) -> int:
+        if name not in cache:
+            self.conn.execute(f"INSERT OR IGNORE INTO {table} (name) VALUES (?)", (name,))
+            cache[name] = self.conn.execute(f"SELECT id FROM {table} WHERE name = ?", (name,)).fetchone()[0]
+        return cache[name]
+
+    def load_drc(self, report: Union[str, Path], force: bool = False) -> int:
+        """Index a Magic DRC report, replacing any earlier one. Returns the violation count."""
+        report = Path(report)
+        fresh, stamp = self._fresh('drc_source', report, str(self.bin_um))
+        if fresh and not force:
+            return self.drc_count()
+
+        rules: Dict[str, int] = {}
+        cells: Dict[str, int] = {}
+
+        def rows():
+            size = 2000 * self.bin_um
+            for cell, rule, box in parse_drc_report(report):
+                x0, y0, x1, y1 = [round(v * 1000) for v in box]
+                yield (rules.get(rule) or self._id('rules', rule, rules),
+                       cells.get(cell) or self._id('cells', cell, cells),
+                       x0, y0, x1, y1, int((x0 + x1) // size), int((y0 + y1) // size))
+
+        with self.conn:
+            # Bulk load without the indexes and build them once at the end
+            for index in ('drc_rule', 'drc_cell', 'drc_bin'):
+                self.conn.execute(f"DROP INDEX IF EXISTS {index}")
+            self.conn.execute("DELETE FROM drc")
+            self.conn.execute("DELETE FROM rules")
+            self.conn.execute("DELETE FROM cells")
+            iterator = rows()
+            while True:
+                batch = list(itertools.islice(iterator, _BATCH))
+                if not batch:
+                    break
+                self.conn.executemany("INSERT INTO drc VALUES (?, ?, ?, ?, ?, ?, ?, ?)", batch)
+            self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('drc_source', ?)", (stamp,))
+            self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('bin_um', ?)", (str(self.bin_um),))
+        self._index_drc()
+        count = self.drc_count()
+        self.logger.info(f"Indexed {count} DRC violations from {report}")
+        return count
+
+    def load_lvs(self, report: Union[str, Path], force: bool = False) -> int:
+        """Index a Netgen LVS report, replacing any earlier one. Returns the record count."""
+        report = Path(report)
+        fresh, stamp = self._fresh('lvs_source', report)
+        if not (fresh and not force):
+            with self.conn:
+                self.conn.execute("DELETE FROM lvs")
+                iterator = ((r['kind'], r['name'], r['circuit'], r['cell'], r['detail'])
+                            for r in parse_lvs_report(report))
+                while True:
+                    batch = list(itertools.islice(iterator, _BATCH))
+                    if not batch:
+                        break
+                    self.conn.executemany("INSERT INTO lvs VALUES (?, ?, ?, ?, ?)", batch)
+                self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('lvs_source', ?)", (stamp,))
+            self.logger.info(f"Indexed LVS report {report}")
+        return self.conn.execute("SELECT COUNT(*) FROM lvs").fetchone()[0]
+
+    # DRC queries
+
+    def drc_count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM drc").fetchone()[0]
+
+    def drc_by_rule(self) -> Dict[str, int]:
+        return dict(self.conn.execute(
+            "SELECT rules.name, COUNT(*) FROM drc JOIN rules ON rules.id = drc.rule "
+            "GROUP BY drc.rule ORDER BY COUNT(*) DESC"))
+
+    def drc_by_cell(self) -> Dict[str, int]:
+        return dict(self.conn.execute(
+            "SELECT cells.name, COUNT(*) FROM drc JOIN cells ON cells.id = drc.cell "
+            "GROUP BY drc.cell ORDER BY COUNT(*) DESC"))
+
+    def hotspots(self, limit: int = 10) -> List[Dict]:
+        """Spatial bins with the most violations, bounds in microns."""
+        return [{'bbox_um': [bx * self.bin_um, by * self.bin_um, (bx + 1) * self.bin_um, (by + 1) * self.bin_um],
+                 'count': count}
+                for bx, by, count in self.conn.execute(
+                    "SELECT bx, by, COUNT(*) FROM drc GROUP BY bx, by ORDER BY COUNT(*) DESC LIMIT ?",
+                    (limit,))]
+
+    def violations(self, rule: Optional[str] = None, cell: Optional[str] = None,
+                   region: Optional[List[float]] = None,
+                   limit: Optional[int] = None) -> Iterator[Tuple[str, str, List[float]]]:
+        """Stream ``(cell, rule, box)`` matching every given filter.
+
+        ``region`` is ``[x0, y0, x1, y1]`` in microns; violations whose
+        centre lies inside it match. Only the spatial bins it covers are read.
+        """
+        query = ("SELECT cells.name, rules.name, x0, y0, x1, y1 FROM drc "
+                 "JOIN rules ON rules.id = drc.rule JOIN cells ON cells.id = drc.cell WHERE 1")
+        args: List = []
+        if rule is not None:
+            query += " AND rules.name = ?"
+            args.append(rule)
+        if cell is not None:
+            query += " AND cells.name = ?"
+            args.append(cell)
+        if region is not None:
+            x0, y0, x1, y1 = (round(v * 1000) for v in region)
+            size = 1000 * self.bin_um
+            query += (" AND bx BETWEEN ? AND ? AND by BETWEEN ? AND ?"
+                      " AND x0 + x1 BETWEEN ? AND ? AND y0 + y1 BETWEEN ? AND ?")
+            args += [int(x0 // size), int(x1 // size), int(y0 // size), int(y1 // size),
+                     2 * x0, 2 * x1, 2 * y0, 2 * y1]
+        if limit is not None:
+            query += " LIMIT ?"
+            args.append(limit)
+        for cell_name, rule_name, *box in self.conn.execute(query, args):
+            yield cell_name, rule_name, [v / 1000 for v in box]
+
+    # LVS queries
+
+    def lvs_mismatches(self, kind: Optional[str] = None, name: Optional[str] = None) -> List[Dict]:
+        query = "SELECT kind, name, circuit, cell, detail FROM lvs WHERE kind != 'result'"
+        args: List = []
+        if kind is not None:
+            query += " AND kind = ?"
+            args.append(kind)
+        if name is not None:
+            query += " AND name = ?"
+            args.append(name)
+        return [dict(zip(('kind', 'name', 'circuit', 'cell', 'detail'), row))
+                for row in self.conn.execute(query, args)]
+
+    def lvs_result(self) -> Optional[str]:
+        row = self.conn.execute("SELECT name FROM lvs WHERE kind = 'result' ORDER BY rowid DESC LIMIT 1").fetchone()
+        return row[0] if row else None
+
+    def lvs_by_kind(self) -> Dict[str, int]:
+        return dict(self.conn.execute(
+            "SELECT kind, COUNT(DISTINCT name) FROM lvs WHERE kind != 'result' GROUP BY kind"))
+
+    def summary(self, hotspots: int = 5) -> Dict:
+        return {
+            'drc': {
+                'count': self.drc_count(),
+                'by_rule': self.drc_by_rule(),
+                'by_cell': self.drc_by_cell(),
+                'hotspots': self.hotspots(hotspots),
+            },
+            'lvs': {
+                'result': self.lvs_result(),
+                'by_kind': self.lvs_by_kind(),
+            },
+        }
+
+    def diff(self, baseline: Union[str, Path, 'SignoffStore']) -> Dict:
+        """Compare with an earlier store: violations and mismatches added and fixed since.
+
+        DRC changes are counted per rule; LVS changes list the nets and
+        devices that appeared or disappeared.
+        """
+        baseline_file = baseline.db_file if isinstance(baseline, SignoffStore) else Path(baseline)
+        self.conn.execute("ATTACH DATABASE ? AS base", (str(baseline_file),))
+        try:
+            drc = ("SELECT r.name AS rule, c.name AS cell, x0, y0, x1, y1 FROM {db}.drc d "
+                   "JOIN {db}.rules r ON r.id = d.rule JOIN {db}.cells c ON c.id = d.cell")
+            current, previous = drc.format(db='main'), drc.format(db='base')
+            lvs = "SELECT DISTINCT kind, name, circuit FROM {db}.lvs WHERE kind IN ('net', 'device', 'property')"
+
+            def per_rule(newer: str, older: str) -> Dict[str, int]:
+                return dict(self.conn.execute(
+                    f"SELECT rule, COUNT(*) FROM ({newer} EXCEPT {older}) GROUP BY rule"))
+
+            def entries(newer: str, older: str) -> List[Dict]:
+                return [dict(zip(('kind', 'name', 'circuit'), row))
+                        for row in self.conn.execute(f"{newer} EXCEPT {older}")]
+
+            return {
+                'drc': {'new': per_rule(current, previous), 'fixed': per_rule(previous, current)},
+                'lvs': {'new': entries(lvs.format(db='main'), lvs.format(db='base')),
+                        'fixed': entries(lvs.format(db='base'), lvs.format(db='main'))},
+            }
+        finally:
+            self.conn.execute("DETACH DATABASE base")
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# -----------------------------------------------------------------------------
+# File: task_graph.py
+# Project: SimpleARM - A Simplified ARM Cortex-M0 Processor Core
+# Purpose: Dependency-graph executor with up-to-date checks for tool flows
+# -----------------------------------------------------------------------------
+
+import os
+import json
+import hashlib
+import logging
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
+
+from file_handlers import hash_file
+
+# Task states reported by TaskGraph.run
+DONE = 'done'
+SKIPPED = 'skipped'
+FAILED = 'failed'
+BLOCKED = 'blocked'
+
+def _hash_code(digest, code):
+    digest.update(code.co_code)
+    for const in code.co_consts:
+        # Nested functions, lambdas and comprehensions are code objects
+        # whose repr holds a memory address, so hash their contents instead
+        if hasattr(const, 'co_code'):
+            _hash_code(digest, const)
+        else:
+            digest.update(repr(const).encode())
+    digest.update(repr(code.co_names).encode())
+
+def code_digest(func: Callable) -> str:
+    """Digest of a function's bytecode and constants, so edits invalidate its results.
+
+    The digest only depends on the code itself, so it is the same in every process.
+    """
+    code = getattr(func, '__code__', None) or getattr(getattr(func, '__func__', None), '__code__', None)
+    if code is None:
+        return ''
+    digest = hashlib.sha256()
+    _hash_code(digest, code)
+    return digest.hexdigest()
+
+class Task:
+    """One node of a TaskGraph.
+
+    ``func(*args)`` returns a truthy value on success; returning False or
+    raising marks the task failed. ``inputs`` and ``params`` make up its
+    fingerprint, ``outputs`` must exist for it to count as up to date.
+    """
+
+    def __init__(self, name: str, func: Callable[..., bool], args: tuple = (),
+                 deps: Optional[List[str]] = None,
+                 inputs: Optional[List[Union[str, Path]]] = None,
+                 outputs: Optional[List[Union[str, Path]]] = None,
+                 params: Optional[Dict] = None, always_run: bool = False):
+        self.name = name
+        self.func = func
+        self.args = tuple(args)
+        self.deps = list(deps or [])
+        self.inputs = [Path(p) for p in inputs or []]
+        self.outputs = [Path(p) for p in outputs or []]
+        self.params = params or {}
+        self.always_run = always_run
+
+class TaskGraph:
+    """Run tasks concurrently in dependency order, skipping up-to-date ones.
+
+    A task starts once all its dependencies are done or skipped. If one
+    fails, everything downstream of it is blocked while independent tasks
+    carry on. Fingerprints of inputs, parameters and code are kept in
+    ``state_file`` so a later run skips tasks whose fingerprint and outputs
+    are unchanged. ``digest`` hashes input files; pass a stat-cached one such
+    as ``ArtifactStore.digest`` for large layouts.
+    """
+
+    def __init__(self, state_file: Optional[Union[str, Path]] = None, jobs: int = 4,
+                 digest: Callable[[Path], str] = hash_file):
+        self.state_file = Path(state_file) if state_file else None
+        self.jobs = max(1, jobs)
+        self.digest = digest
+        self.tasks: Dict[str, Task] = {}
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._state: Dict[str, Dict] = {}
+        if self.state_file is not None and self.state_file.exists():
+            try:
+                with open(self.state_file, 'r') as f:
+                    self._state = json.load(f)
+            except (OSError, ValueError):
+                self._state = {}
+
+    def add(self, name: str, func: Callable[..., bool], *args, **kwargs) -> Task:
+        if name in self.tasks:
+            raise ValueError(f"Duplicate task {name}")
+        task = Task(name, func, args, **kwargs)
+        self.tasks[name] = task
+        return task
+
+    def _check(self):
+        for task in self.tasks.values():
+            for dep in task.deps:
+                if dep not in self.tasks:
+                    raise ValueError(f"Task {task.name} depends on unknown task {dep}")
+        # Kahn's algorithm; anything left over sits on a cycle
+        pending = {name: len(task.deps) for name, task in self.tasks.items()}
+        ready = [name for name, count in pending.items() if count == 0]
+        seen = 0
+        while ready:
+            name = ready.pop()
+            seen += 1
+            for other in self.tasks.values():
+                if name in other.deps:
+                    pending[other.name] -= 1
+                    if pending[other.name] == 0:
+                        ready.append(other.name)
+        if seen != len(self.tasks):
+            raise ValueError("Task graph has a dependency cycle")
+
+    def fingerprint(self, task: Task) -> Optional[str]:
+        """Hash of the task's parameters, code and input contents; None if an input is missing."""
+        digest = hashlib.sha256()
+        digest.update(json.dumps([task.params, [str(arg) for arg in task.args]],
+                                 sort_keys=True, default=str).encode())
+        digest.update(code_digest(task.func).encode())
+        for path in task.inputs:
+            if not path.exists():
+                return None
+            digest.update(str(path).encode())
+            digest.update(self.digest(path).encode())
+        return digest.hexdigest()
+
+    def _outputs_stamp(self, task: Task) -> Optional[List]:
+        stamp = []
+        for path in task.outputs:
+            try:
+                stat = path.stat()
+            except OSError:
+                return None
+            stamp.append([str(path), stat.st_size, stat.st_mtime_ns])
+        return stamp
+
+    def up_to_date(self, task: Task, fingerprint: Optional[str]) -> bool:
+        if task.always_run or fingerprint is None:
+            return False
+        previous = self._state.get(task.name)
+        return (previous is not None and previous.get('fingerprint') == fingerprint and
+                previous.get('outputs') == self._outputs_stamp(task))
+
+    def _save_state(self):
+        # Caller holds the lock
+        if self.state_file is None:
+            return
+        tmp_file = self.state_file.with_name(f".{self.state_file.name}.{os.getpid()}")
+        with open(tmp_file, 'w') as f:
+            json.dump(self._state, f, indent=2)
+        tmp_file.replace(self.state_file)
+
+    def _execute(self, task: Task, fingerprint: Optional[str]) -> str:
+        if self.up_to_date(task, fingerprint):
+            self.logger.info(f"Task {task.name} is up to date")
+            return SKIPPED
+        self.logger.info(f"Running task {task.name}")
+        try:
+            ok = task.func(*task.args)
+        except Exception as e:
+            self.logger.error(f"Task {task.name} raised: {str(e)}")
+            ok = False
+        outputs = self._outputs_stamp(task)
+        if ok and outputs is None:
+            missing = [str(path) for path in task.outputs if not path.exists()]
+            self.logger.error(f"Task {task.name} did not produce {', '.join(missing)}")
+            ok = False
+        with self._lock:
+            if ok:
+                self._state[task.name] = {'fingerprint': fingerprint, 'outputs': outputs}
+            else:
+                self._state.pop(task.name, None)
+            self._save_state()
+        if not ok:
+            self.logger.error(f"Task {task.name} failed")
+            return FAILED
+        return DONE
+
+    def run(self) -> Dict[str, str]:
+        """Run the graph and return the final state of every task."""
+        self._check()
+        status: Dict[str, str] = {}
+        running: Dict[Future, str] = {}
+
+        def blocked(name: str) -> bool:
+            return any(status.get(dep) in (FAILED, BLOCKED) for dep in self.tasks[name].deps)
+
+        with ThreadPoolExecutor(max_workers=self.jobs, thread_name_prefix='task') as pool:
+            while len(status) < len(self.tasks):
+                for name, task in self.tasks.items():
+                    if name in status or name in running.values():
+                        continue
+                    if blocked(name):
+                        status[name] = BLOCKED
+                        self.logger.error(f"Task {name} blocked by a failed dependency")
+                    elif all(status.get(dep) in (DONE, SKIPPED) for dep in task.deps):
+                        # Inputs are final once every dependency has finished
+                        running[pool.submit(lambda t=task: self._execute(t, self.fingerprint(t)))] = name
+                if not running:
+                    continue
+                finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    try:
+                        status[name] = future.result()
+                    except Exception as e:
+                        self.logger.error(f"Task {name} failed: {str(e)}")
+                        status[name] = FAILED
+        return status
+
+    @staticmethod
+    def succeeded(status: Dict[str, str]) -> bool:
+        return all(state in (DONE, SKIPPED) for state in status.values())
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -----------------------------------------------------------------------------
+# File: coverage_merge.py
+# Project: SimpleARM - A Simplified ARM Cortex-M0 Processor Core
+# Purpose: Streaming tree-reduction merge of Verilator coverage data
+# -----------------------------------------------------------------------------
+
+import os
+import shutil
+import logging
+import itertools
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+COVERAGE_HEADER = "# SystemC::Coverage-3\n"
+
+def read_coverage(path: Path, points: Dict[str, int]):
+    """Add the points of a Verilator coverage file to ``points``.
+
+    Data lines look like ``C '<key>' <count>``, where the key is a list of
+    ``\\x01<name>\\x02<value>`` fields identifying one coverage point.
+    """
+    with open(path, 'r', errors='replace') as f:
+        for line in f:
+            if not line.startswith("C '"):
+                continue
+            key, _, count = line.rstrip("\n").rpartition(" ")
+            points[key[3:-1]] = points.get(key[3:-1], 0) + int(count)
+
+def write_coverage(points: Dict[str, int], path: Path):
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, 'w') as f:
+        f.write(COVERAGE_HEADER)
+        for key, count in points.items():
+            f.write(f"C '{key}' {count}\n")
+    tmp_path.replace(path)
+
+def merge_coverage_files(inputs: List[Path], output: Path) -> Path:
+    """Sum the point counts of ``inputs`` into ``output``.
+
+    Memory is bounded by the number of distinct points in the design, not by
+    the number or size of the inputs.
+    """
+    points: Dict[str, int] = {}
+    for path in inputs:
+        read_coverage(path, points)
+    write_coverage(points, output)
+    return output
+
+def parse_point(key: str) -> Dict[str, str]:
+    fields = {}
+    for field in key.split("\x01"):
+        name, _, value = field.partition("\x02")
+        if name:
+            fields[name] = value
+    return fields
+
+def summarize_coverage(path: Path, dir_name: str = "rtl") -> Dict[str, Dict]:
+    """Per-module line and toggle coverage for modules defined under ``dir_name``."""
+    summary: Dict[str, Dict] = {}
+    with open(path, 'r', errors='replace') as f:
+        for line in f:
+            if not line.startswith("C '"):
+                continue
+            key, _, count = line.rstrip("\n").rpartition(" ")
+            point = parse_point(key[3:-1])
+            if dir_name not in Path(point.get("f", "")).parts:
+                continue
+            kind, _, module = point.get("page", "").partition("/")
+            kind = kind[2:] if kind.startswith("v_") else kind
+            if kind not in ("line", "toggle") or not module:
+                continue
+            stats = summary.setdefault(module, {
+                "file": point["f"],
+                "line": {"covered": 0, "total": 0},
+                "toggle": {"covered": 0, "total": 0},
+            })[kind]
+            stats["total"] += 1
+            stats["covered"] += int(count) > 0
+
+    for module in summary.values():
+        for kind in ("line", "toggle"):
+            stats = module[kind]
+            stats["percent"] = round(100.0 * stats["covered"] / stats["total"], 2) if stats["total"] else None
+    return dict(sorted(summary.items()))
+
+class CoverageMerger:
+    """Merge coverage files in a parallel tree reduction as they arrive.
+
+    Every ``fanout`` ready files are merged into one partial file on a process
+    pool, and the partial goes back into the ready list. By the time the last
+    test finishes only a few partials remain, so the final merge is short.
+    """
+
+    def __init__(self, work_dir: Path, jobs: int = 2, fanout: int = 8):
+        self.work_dir = Path(work_dir)
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        self.fanout = max(2, fanout)
+        # Workers must not be forked from a process whose test threads may
+        # hold locks at that moment, so start them from a clean server
+        context = multiprocessing.get_context(
+            "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn")
+        self._pool = ProcessPoolExecutor(max_workers=max(1, jobs), mp_context=context)
+        # Reentrant: a merge that finishes before its callback is attached
+        # runs the callback on the dispatching thread, which holds the lock
+        self._lock = threading.RLock()
+        self._changed = threading.Condition(self._lock)
+        self._ready: List[Path] = []
+        self._inflight = 0
+        self._finishing = False
+        self._seq = itertools.count()
+        self.errors = 0
+
+    def add(self, path: Path):
+        """Queue a finished test's coverage file for merging."""
+        with self._lock:
+            self._ready.append(Path(path))
+            self._dispatch()
+
+    def _is_partial(self, path: Path) -> bool:
+        return path.parent == self.work_dir
+
+    def _dispatch(self):
+        # Caller holds the lock
+        while len(self._ready) >= self.fanout or (self._finishing and len(self._ready) > 1):
+            batch, self._ready = self._ready[:self.fanout], self._ready[self.fanout:]
+            output = self.work_dir / f"partial_{next(self._seq)}.dat"
+            self._inflight += 1
+            future = self._pool.submit(merge_coverage_files, batch, output)
+            future.add_done_callback(lambda f, batch=batch: self._merged(f, batch))
+
+    def _merged(self, future: Future, batch: List[Path]):
+        with self._lock:
+            self._inflight -= 1
+            try:
+                self._ready.append(future.result())
+                for path in batch:
+                    if self._is_partial(path):
+                        path.unlink(missing_ok=True)
+            except Exception as e:
+                logging.error(f"Coverage merge failed for {len(batch)} files: {str(e)}")
+                self.errors += 1
+            self._dispatch()
+            self._changed.notify_all()
+
+    def finish(self, output: Path) -> Optional[Path]:
+        """Wait for all merges, write the final result to ``output`` and shut down."""
+        with self._lock:
+            self._finishing = True
+            self._dispatch()
+            while self._inflight or len(self._ready) > 1:
+                self._changed.wait()
+            result = self._ready[0] if self._ready else None
+        self._pool.shutdown()
+
+        if result is None:
+            return None
+        output = Path(output)
+        if self._is_partial(result):
+            os.replace(result, output)
+        else:
+            shutil.copy2(result, output)
+        return output
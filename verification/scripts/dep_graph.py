@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -----------------------------------------------------------------------------
+# File: dep_graph.py
+# Project: SimpleARM - A Simplified ARM Cortex-M0 Processor Core
+# Purpose: RTL module dependency graph for incremental regressions
+# -----------------------------------------------------------------------------
+
+import re
+import json
+import hashlib
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+HDL_SUFFIXES = {".v", ".sv", ".vh", ".svh"}
+# C++ testbench sources are compiled into every simulation
+TESTBENCH_SUFFIXES = {".c", ".cc", ".cpp", ".h", ".hpp"}
+
+COMMENT_RE = re.compile(r'//[^\n]*|/\*.*?\*/', re.S)
+DEFINITION_RE = re.compile(r'^\s*(?:module|interface|program|package)\s+(?:automatic\s+|static\s+)?([A-Za-z_]\w*)', re.M)
+INCLUDE_RE = re.compile(r'`include\s+"([^"]+)"')
+# <type> [#(params)] <instance> (  -- only kept when <type> is a known module
+INSTANCE_RE = re.compile(r'\b([A-Za-z_]\w*)\s*(?:#\s*\((?:[^()]|\([^()]*\))*\)\s*)?([A-Za-z_]\w*)\s*\(')
+IMPORT_RE = re.compile(r'\bimport\s+([A-Za-z_]\w*)\s*::')
+
+class DependencyGraph:
+    """Map each test to the HDL files it transitively reaches.
+
+    C++ testbench sources found under the source directories are part of
+    every simulation, so they count as inputs of every test. Parsed
+    per-file facts are persisted to ``state_file`` together with their
+    mtime/size, so a rescan only re-parses files that actually changed.
+    """
+
+    def __init__(self, source_dirs: Iterable[Path], state_file: Path):
+        self.source_dirs = [Path(d).resolve() for d in source_dirs]
+        self.state_file = Path(state_file)
+        self.files: Dict[str, Dict] = {}
+        self.tests: Dict[str, Dict] = {}
+        self._definers: Dict[str, str] = {}
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.state_file, 'r') as f:
+                state = json.load(f)
+            self.files = state.get("files", {})
+            self.tests = state.get("tests", {})
+        except FileNotFoundError:
+            pass
+        except (json.JSONDecodeError, OSError) as e:
+            logging.warning(f"Discarding unreadable dependency graph {self.state_file}: {str(e)}")
+
+    def save(self):
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.state_file.with_suffix(".tmp")
+        with open(tmp_file, 'w') as f:
+            json.dump({"files": self.files, "tests": self.tests}, f)
+        tmp_file.replace(self.state_file)
+
+    def update(self) -> Set[str]:
+        """Rescan the source tree and return the paths whose content changed."""
+        seen: Set[str] = set()
+        changed: Set[str] = set()
+        for directory in self.source_dirs:
+            for path in directory.rglob("*"):
+                if path.suffix not in HDL_SUFFIXES | TESTBENCH_SUFFIXES or not path.is_file():
+                    continue
+                key = str(path)
+                seen.add(key)
+                if self._refresh(path):
+                    changed.add(key)
+
+        for key in set(self.files) - seen:
+            del self.files[key]
+            changed.add(key)
+
+        self._definers = {}
+        for key, entry in self.files.items():
+            for module in entry["modules"]:
+                self._definers.setdefault(module, key)
+
+        if changed:
+            logging.info(f"Dependency graph: {len(changed)} changed files")
+        return changed
+
+    def _refresh(self, path: Path) -> bool:
+        """Re-parse ``path`` if its stat changed; True if its content changed."""
+        stat = path.stat()
+        entry = self.files.get(str(path))
+        if entry and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+            return False
+
+        data = path.read_bytes()
+        digest = hashlib.sha1(data).hexdigest()
+        if entry and entry["sha1"] == digest:
+            entry["mtime_ns"] = stat.st_mtime_ns
+            return False
+
+        if path.suffix in TESTBENCH_SUFFIXES:
+            self.files[str(path)] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha1": digest,
+                                     "modules": [], "references": [], "includes": [], "testbench": True}
+            return True
+
+        text = COMMENT_RE.sub('', data.decode('utf-8', errors='replace'))
+        self.files[str(path)] = {
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "sha1": digest,
+            "modules": DEFINITION_RE.findall(text),
+            "references": sorted({m.group(1) for m in INSTANCE_RE.finditer(text)} |
+                                 set(IMPORT_RE.findall(text))),
+            "includes": INCLUDE_RE.findall(text),
+        }
+        return True
+
+    def _resolve_include(self, name: str) -> Optional[str]:
+        for key in self.files:
+            if key.endswith("/" + name) or Path(key).name == name:
+                return key
+        return None
+
+    def closure(self, roots: Iterable[str]) -> Set[str]:
+        """All files reachable from ``roots`` through instances and includes."""
+        pending = [str(Path(r).resolve()) for r in roots]
+        reached: Set[str] = set()
+        while pending:
+            key = pending.pop()
+            if key in reached or key not in self.files:
+                continue
+            reached.add(key)
+            entry = self.files[key]
+            for ref in entry["references"]:
+                definer = self._definers.get(ref)
+                if definer and definer not in reached:
+                    pending.append(definer)
+            for name in entry["includes"]:
+                resolved = self._resolve_include(name)
+                if resolved and resolved not in reached:
+                    pending.append(resolved)
+        return reached
+
+    def fingerprint(self, test_file: Path, top: str) -> str:
+        """Hash of every file the test reaches, the simulation top and the C++ testbench."""
+        roots = [str(test_file)]
+        if top in self._definers:
+            roots.append(self._definers[top])
+        testbench = {key for key, entry in self.files.items() if entry.get("testbench")}
+        digest = hashlib.sha1()
+        for key in sorted(self.closure(roots) | testbench):
+            digest.update(f"{key}:{self.files[key]['sha1']}\n".encode())
+        return digest.hexdigest()
+
+    def select_tests(self, tests: List[Path], top: str) -> List[Path]:
+        """Tests whose inputs changed since their last recorded run, or that failed."""
+        selected = []
+        for test in tests:
+            record = self.tests.get(str(test))
+            if (record is None or not record["passed"] or
+                    record["fingerprint"] != self.fingerprint(test, top)):
+                selected.append(test)
+        return selected
+
+    def record(self, results: Dict[Path, bool], top: str):
+        """Remember the fingerprint each test was run against."""
+        for test, passed in results.items():
+            self.tests[str(test)] = {
+                "fingerprint": self.fingerprint(test, top),
+                "passed": passed,
+            }
+        self.save()
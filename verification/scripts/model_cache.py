@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -----------------------------------------------------------------------------
+# File: model_cache.py
+# Project: SimpleARM - A Simplified ARM Cortex-M0 Processor Core
+# Purpose: Compile-once Verilator model cache for regression runs
+# -----------------------------------------------------------------------------
+
+import os
+import shutil
+import hashlib
+import logging
+import tempfile
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Repository root, two levels above verification/scripts
+ROOT_DIR = Path(__file__).resolve().parents[2]
+
+# Same source set as scripts/run_verilator.sh
+DEFAULT_SOURCES = [
+    "rtl/core/alu.v",
+    "rtl/core/fetch_unit.v",
+    "rtl/core/decode_unit.v",
+    "rtl/core/execute_unit.v",
+    "rtl/core/register_file.v",
+    "rtl/memory/memory_controller.v",
+    "rtl/memory/sram_wrapper.v",
+    "verification/testbench/verilator_sram_stub.v",
+    "rtl/debug/jtag_controller.v",
+    "rtl/top/simple_arm_top.v",
+    "verification/testbench/verilator_tb.cpp",
+]
+
+DEFAULT_FLAGS = [
+    "-Wno-IMPLICIT",
+    "-Wno-WIDTH",
+    "-Wno-UNSIGNED",
+    "-Wno-CMPCONST",
+    "-Wno-CASEINCOMPLETE",
+]
+
+class ModelCache:
+    """Build the Verilator model once per unique RTL/define/flag hash.
+
+    Each entry lives in ``<cache_dir>/<hash>/obj_dir``. Entries are touched on
+    every use and the least recently used ones are evicted once the cache
+    holds more than ``max_entries`` models. A savable model also keeps its
+    post-reset checkpoint in the entry, so a snapshot is only ever restored
+    into the exact model that wrote it. Coverage and savable builds add
+    their flags, and so their own cache key.
+    """
+
+    def __init__(self, cache_dir: Path, top_module: str = "simple_arm_top",
+                 sources: Optional[List[str]] = None, flags: Optional[List[str]] = None,
+                 defines: Optional[Dict[str, str]] = None, max_entries: int = 8,
+                 verilator: str = "verilator", jobs: int = 0, savable: bool = False,
+                 coverage: bool = False):
+        self.cache_dir = Path(cache_dir)
+        self.top_module = top_module
+        self.sources = [ROOT_DIR / src for src in (sources or DEFAULT_SOURCES)]
+        self.flags = list(flags if flags is not None else DEFAULT_FLAGS)
+        if savable:
+            self.flags.extend(["--savable", "-CFLAGS", "-DSIMPLE_ARM_SAVABLE"])
+        if coverage:
+            # Sets VM_COVERAGE, without which the testbench writes no coverage
+            self.flags.append("--coverage")
+        self.defines = dict(defines or {})
+        self.max_entries = max_entries
+        self.verilator = verilator
+        self.jobs = jobs or os.cpu_count() or 1
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._key: Optional[str] = None
+
+    @property
+    def key(self) -> str:
+        """Content hash of every input that affects the compiled model."""
+        if self._key is None:
+            self._key = self._compute_key()
+        return self._key
+
+    def _compute_key(self) -> str:
+        digest = hashlib.sha256()
+        for src in sorted(self.sources):
+            digest.update(str(src.relative_to(ROOT_DIR)).encode())
+            with open(src, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(chunk)
+        for name, value in sorted(self.defines.items()):
+            digest.update(f"+define+{name}={value}".encode())
+        digest.update("\0".join(self.flags).encode())
+        digest.update(self.top_module.encode())
+        digest.update(self._verilator_version().encode())
+        return digest.hexdigest()[:16]
+
+    def _verilator_version(self) -> str:
+        try:
+            result = subprocess.run([self.verilator, "--version"],
+                                    capture_output=True, text=True)
+            return result.stdout.strip()
+        except OSError:
+            return "unknown"
+
+    def entry_dir(self) -> Path:
+        return self.cache_dir / self.key
+
+    def binary(self) -> Path:
+        return self.entry_dir() / "obj_dir" / f"V{self.top_module}"
+
+    def get(self) -> Optional[Path]:
+        """Return the cached model binary, building it on a miss."""
+        binary = self.binary()
+        if binary.exists():
+            logging.info(f"Model cache hit: {self.key}")
+        else:
+            logging.info(f"Model cache miss: {self.key}, compiling {self.top_module}")
+            if not self._build():
+                return None
+        self._touch()
+        self.evict()
+        return binary
+
+    def checkpoint(self) -> Optional[Path]:
+        """Post-reset snapshot of the cached model, created on first use."""
+        snapshot = self.entry_dir() / "reset.chk"
+        if snapshot.exists():
+            return snapshot
+        if not self.binary().exists():
+            return None
+
+        # Written under a scratch name, then published atomically
+        run_dir = Path(tempfile.mkdtemp(dir=self.cache_dir, prefix=".checkpoint."))
+        try:
+            staging = run_dir / "reset.chk"
+            result = subprocess.run([str(self.binary()), f"+checkpoint_save={staging}"],
+                                    cwd=run_dir, capture_output=True, text=True)
+            if result.returncode != 0 or not staging.exists():
+                logging.error(f"Checkpoint creation failed:\n{result.stdout}{result.stderr}")
+                return None
+            os.replace(staging, snapshot)
+            logging.info(f"Created post-reset checkpoint for model {self.key}")
+            return snapshot
+        except Exception as e:
+            logging.error(f"Error creating checkpoint: {str(e)}")
+            return None
+        finally:
+            shutil.rmtree(run_dir, ignore_errors=True)
+
+    def _build_command(self, obj_dir: Path) -> List[str]:
+        cmd = [self.verilator, "--cc", "--exe", "--build", "--trace",
+               "-j", str(self.jobs), "--Mdir", str(obj_dir),
+               "--top-module", self.top_module]
+        cmd.extend(self.flags)
+        cmd.extend(f"+define+{name}={value}" for name, value in sorted(self.defines.items()))
+        cmd.extend(str(src) for src in self.sources)
+        return cmd
+
+    def _build(self) -> bool:
+        """Compile into a scratch directory and publish it atomically."""
+        staging = self.cache_dir / f".{self.key}.{os.getpid()}"
+        shutil.rmtree(staging, ignore_errors=True)
+        try:
+            staging.mkdir(parents=True)
+            result = subprocess.run(self._build_command(staging / "obj_dir"),
+                                    cwd=staging, capture_output=True, text=True)
+            if result.returncode != 0:
+                logging.error(f"Model compilation failed:\n{result.stderr}")
+                return False
+            try:
+                os.rename(staging, self.entry_dir())
+            except OSError:
+                # Another runner published the same model first
+                if not self.binary().exists():
+                    raise
+            return True
+        except Exception as e:
+            logging.error(f"Error building model: {str(e)}")
+            return False
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def _touch(self):
+        (self.entry_dir() / ".last_used").touch()
+
+    def evict(self):
+        """Drop least recently used models beyond ``max_entries``."""
+        entries = [d for d in self.cache_dir.iterdir()
+                   if d.is_dir() and not d.name.startswith('.')]
+        if len(entries) <= self.max_entries:
+            return
+
+        def last_used(entry: Path) -> float:
+            stamp = entry / ".last_used"
+            return stamp.stat().st_mtime if stamp.exists() else 0.0
+
+        entries.sort(key=last_used, reverse=True)
+        for entry in entries[self.max_entries:]:
+            logging.info(f"Evicting cached model {entry.name}")
+            shutil.rmtree(entry, ignore_errors=True)
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -----------------------------------------------------------------------------
+# File: results_db.py
+# Project: SimpleARM - A Simplified ARM Cortex-M0 Processor Core
+# Purpose: SQLite-backed history of regression results
+# -----------------------------------------------------------------------------
+
+import sqlite3
+import datetime
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id        INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id    TEXT NOT NULL,
+    test      TEXT NOT NULL,
+    status    TEXT NOT NULL,
+    duration  REAL NOT NULL,
+    simulator TEXT,
+    seed      INTEGER,
+    rtl_hash  TEXT,
+    timestamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_test ON results (test, timestamp);
+CREATE INDEX IF NOT EXISTS results_run ON results (run_id);
+"""
+
+class ResultsStore:
+    """Per-test history of runtime, status, simulator, seed and RTL hash."""
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # Results arrive from the worker threads of a parallel run
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.executescript(SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def record(self, run_id: str, test: str, status: str, duration: float,
+               simulator: Optional[str] = None, seed: Optional[int] = None,
+               rtl_hash: Optional[str] = None):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO results (run_id, test, status, duration, simulator, seed, rtl_hash, timestamp) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (run_id, test, status, duration, simulator, seed, rtl_hash,
+                 datetime.datetime.now().isoformat())
+            )
+
+    def merge_from(self, other_db: Path) -> int:
+        """Import the results of another store, skipping rows already present."""
+        with self._lock, self._conn:
+            self._conn.execute("ATTACH DATABASE ? AS other", (str(other_db),))
+            try:
+                cursor = self._conn.execute(
+                    "INSERT INTO results (run_id, test, status, duration, simulator, seed, rtl_hash, timestamp) "
+                    "SELECT o.run_id, o.test, o.status, o.duration, o.simulator, o.seed, o.rtl_hash, o.timestamp "
+                    "FROM other.results o WHERE NOT EXISTS ("
+                    "  SELECT 1 FROM results r WHERE r.run_id = o.run_id "
+                    "  AND r.test = o.test AND r.timestamp = o.timestamp)"
+                )
+                return cursor.rowcount
+            finally:
+                self._conn.commit()
+                self._conn.execute("DETACH DATABASE other")
+
+    def expected_durations(self, window: int = 5) -> Dict[str, float]:
+        """Mean runtime of each test over its last ``window`` runs."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT test, AVG(duration) AS duration FROM ("
+                "  SELECT test, duration, ROW_NUMBER() OVER "
+                "    (PARTITION BY test ORDER BY timestamp DESC) AS n FROM results"
+                ") WHERE n <= ? GROUP BY test",
+                (window,)
+            ).fetchall()
+        return {row["test"]: row["duration"] for row in rows}
+
+    def history(self, test: Optional[str] = None, limit: int = 20) -> List[Dict]:
+        """Most recent results, optionally for a single test."""
+        query = "SELECT * FROM results"
+        params: list = []
+        if test:
+            query += " WHERE test = ?"
+            params.append(test)
+        query += " ORDER BY timestamp DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(query, params)]
+
+    def stats(self) -> List[Dict]:
+        """Run count, pass rate and runtime statistics per test."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT test, COUNT(*) AS runs, "
+                "  AVG(status = 'PASS') AS pass_rate, "
+                "  AVG(duration) AS avg_duration, MAX(duration) AS max_duration, "
+                "  MAX(timestamp) AS last_run "
+                "FROM results GROUP BY test ORDER BY avg_duration DESC"
+            ).fetchall()
+        return [dict(row) for row in rows]
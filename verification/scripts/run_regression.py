@@ -12,9 +12,24 @@ import subprocess
 import datetime
 import json
 import logging
+import random
+import re
+import shutil
+import signal
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+from queue import Queue
 from typing import List, Dict, Optional
 
+from coverage_merge import CoverageMerger, summarize_coverage
+from dep_graph import DependencyGraph
+from model_cache import ModelCache, ROOT_DIR
+from results_db import ResultsStore
+from sim_worker import SimWorker
+
 # Configuration
 class Config:
     def __init__(self, config_file: str):
@@ -26,6 +41,34 @@ class Config:
         self.coverage = True
         self.waves = False
         self.timeout = 3600  # 1 hour default timeout
+        self.jobs = os.cpu_count() or 1
+        self.work_dir = Path("work")
+        self.test_pattern = "test_*.sv"
+        self.model_cache = True
+        self.cache_dir = Path("build_cache")
+        self.cache_max_entries = 8
+        self.defines = {}
+        self.verilator_flags = None
+        self.top = "simple_arm_tb"
+        self.incremental = False
+        self.source_dirs = [ROOT_DIR / "rtl", ROOT_DIR / "verification"]
+        # Output lines that end a simulation early
+        self.fatal_patterns = [r"\$fatal", r"\bERROR\b", r"%Error", r"%Fatal",
+                               r"[Aa]ssertion (failed|failure)"]
+        self.tail_lines = 50  # Output lines kept in the result file
+        self.seed = None  # Random per run unless fixed
+        self.history = True
+        self.history_db = None  # Defaults to <result_dir>/history.db
+        self.shard_index = 0
+        self.shard_count = 1
+        self.shard_durations = None  # JSON of test runtimes every shard splits on
+        self.waves_on_failure = False  # Trace only re-runs of failing tests
+        self.coverage_jobs = 2  # Processes merging coverage while tests run
+        self.coverage_fanout = 8  # Files combined per merge step
+        self.warm_workers = False  # Keep one serving simulator per slot
+        self.worker_max_tests = 50  # Tests before a worker is recycled
+        self.worker_max_rss_mb = None  # RSS before a worker is recycled
+        self.checkpoint = False  # Start tests from a post-reset snapshot
         self.load_config()
 
     def load_config(self):
@@ -39,16 +82,39 @@ class Config:
             logging.error(f"Invalid JSON in config file {self.config_file}")
             sys.exit(1)
 
+        # JSON only carries strings, normalize directory settings to Paths
+        for key in ("test_dir", "log_dir", "result_dir", "work_dir", "cache_dir"):
+            setattr(self, key, Path(getattr(self, key)).resolve())
+        self.source_dirs = [Path(d).resolve() for d in self.source_dirs]
+        self.history_db = Path(self.history_db).resolve() if self.history_db \
+            else self.result_dir / "history.db"
+        if self.shard_durations:
+            self.shard_durations = Path(self.shard_durations).resolve()
+
 # Test Runner
 class TestRunner:
     def __init__(self, config: Config):
         self.config = config
         self.prepare_directories()
         self.setup_logging()
+        self._slots: Queue = Queue()
+        self._results_lock = threading.Lock()
+        self.model: Optional[Path] = None
+        self.checkpoint: Optional[Path] = None
+        self.rtl_hash: Optional[str] = None
+        self.run_id = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.seed = self.config.seed if self.config.seed is not None else random.randrange(2**31)
+        self.store = ResultsStore(self.config.history_db) if self.config.history else None
+        self._workers: Dict[int, SimWorker] = {}
+        self.graph: Optional[DependencyGraph] = None
+        self.shard_plan: Optional[Dict[str, List[str]]] = None
+        self.fatal_re = re.compile("|".join(f"(?:{p})" for p in self.config.fatal_patterns)) \
+            if self.config.fatal_patterns else None
 
     def prepare_directories(self):
         """Create necessary directories if they don't exist."""
-        for directory in [self.config.log_dir, self.config.result_dir]:
+        for directory in [self.config.log_dir, self.config.result_dir, self.config.work_dir,
+                          self.config.result_dir / "coverage"]:
             os.makedirs(directory, exist_ok=True)
 
     def setup_logging(self):
@@ -62,48 +128,666 @@ class TestRunner:
             handlers=[
                 logging.FileHandler(log_file),
                 logging.StreamHandler(sys.stdout)
-            ]
+            ],
+            force=True
+        )
+
+    def prepare_model(self) -> Optional[Path]:
+        """Compile the simulation model once, or reuse a cached build."""
+        cache = ModelCache(
+            self.config.cache_dir,
+            flags=self.config.verilator_flags,
+            defines=self.config.defines,
+            max_entries=self.config.cache_max_entries,
+            jobs=self.config.jobs,
+            savable=self.config.checkpoint,
+            coverage=self.config.coverage
         )
+        self.rtl_hash = cache.key
+        if not self.config.model_cache:
+            if self.config.checkpoint:
+                logging.warning("Checkpoints need the model cache, tests will run the full reset")
+            return None
+        self.model = cache.get()
+        if self.model is None:
+            logging.warning("Model cache unavailable, each test will compile its own model")
+        elif self.config.checkpoint:
+            self.checkpoint = cache.checkpoint()
+            if self.checkpoint is None:
+                logging.warning("No checkpoint available, tests will run the full reset")
+        return self.model
+
+    def discover_tests(self) -> List[Path]:
+        """Find all test files below the configured test directory."""
+        if not self.config.test_dir.exists():
+            logging.error(f"Test directory not found: {self.config.test_dir}")
+            return []
+        return sorted(self.config.test_dir.rglob(self.config.test_pattern))
+
+    def select_changed_tests(self, tests: List[Path]) -> List[Path]:
+        """Keep only tests whose HDL or testbench inputs changed since their last run."""
+        source_dirs = list(self.config.source_dirs)
+        if not any(self.config.test_dir.is_relative_to(d) for d in source_dirs):
+            source_dirs.append(self.config.test_dir)
+        self.graph = DependencyGraph(source_dirs, self.config.cache_dir / "dep_graph.json")
+        self.graph.update()
 
-    def run_test(self, test_file: Path) -> bool:
-        """Run a single test and return True if it passes."""
+        selected = self.graph.select_tests(tests, self.config.top)
+        logging.info(f"Incremental mode: {len(selected)}/{len(tests)} tests affected by changes")
+        return selected
+
+    def run_test(self, test_file: Path, slot: int = 0) -> bool:
+        """Run a single test and return True if it passes.
+
+        Each slot owns a private working directory so concurrently running
+        simulators never write their scratch files into the same place.
+        """
+        start = time.monotonic()
         try:
-            cmd = self._build_command(test_file)
-            logging.info(f"Running test: {test_file.name}")
-            logging.debug(f"Command: {' '.join(cmd)}")
-            
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=self.config.timeout
-            )
+            waves = self.config.waves and not self.config.waves_on_failure
+            slot_dir = self.config.work_dir / f"slot_{slot}"
+            slot_dir.mkdir(parents=True, exist_ok=True)
+            console_log = self.config.log_dir / f"{test_file.stem}.console.log"
+            logging.info(f"Running test: {test_file.name} (slot {slot})")
+
+            if self.config.warm_workers and self.model is not None:
+                outcome = self._worker(slot).run(
+                    self._worker_request(test_file, waves),
+                    console_log,
+                    self.config.timeout,
+                    self.fatal_re,
+                    self.config.tail_lines
+                )
+            else:
+                cmd = self._build_command(test_file, waves=waves)
+                logging.debug(f"Command: {' '.join(cmd)}")
+                outcome = self._stream_process(cmd, slot_dir, console_log)
             
-            success = result.returncode == 0
-            self._save_test_results(test_file, result, success)
+            success = outcome["returncode"] == 0 and outcome["reason"] is None
+            if outcome["reason"]:
+                logging.error(f"Test {test_file.name} aborted: {outcome['reason']}")
+            self._save_test_results(test_file, outcome, success, time.monotonic() - start)
             return success
             
-        except subprocess.TimeoutExpired:
-            logging.error(f"Test {test_file.name} timed out")
-            self._save_test_results(test_file, None, False)
-            return False
         except Exception as e:
             logging.error(f"Error running test {test_file.name}: {str(e)}")
-            self._save_test_results(test_file, None, False)
+            self._save_test_results(test_file, None, False, time.monotonic() - start)
             return False
 
-    def _build_command(self, test_file: Path) -> List[str]:
-        """Build the command to run the test."""
+    def _worker(self, slot: int) -> SimWorker:
+        """The warm simulator owned by ``slot``, created on first use.
+
+        Workers run the cached model binary, whose testbench serves test
+        requests on stdin when started with ``--serve``.
+        """
+        if slot not in self._workers:
+            self._workers[slot] = SimWorker(
+                [str(self.model)],
+                self.config.work_dir / f"slot_{slot}",
+                self.config.worker_max_tests,
+                self.config.worker_max_rss_mb
+            )
+        return self._workers[slot]
+
+    def _worker_request(self, test_file: Path, waves: bool) -> Dict:
+        """Per-test arguments sent to a warm worker, mirroring _build_command."""
+        request = {
+            "test": str(test_file),
+            "seed": self.seed,
+            "log": str(self.config.log_dir / f"{test_file.stem}.log"),
+        }
+        if self.config.coverage:
+            request["coverage_file"] = str(self._coverage_file(test_file))
+        if self.checkpoint is not None:
+            request["restore"] = str(self.checkpoint)
+        if waves:
+            request["wave_file"] = str(self.config.log_dir / "waves" / f"{test_file.stem}.vcd")
+        return request
+
+    def close_workers(self):
+        for worker in self._workers.values():
+            worker.stop()
+        self._workers.clear()
+
+    def _stream_process(self, cmd: List[str], cwd: Path, log_file: Path) -> Dict:
+        """Run ``cmd``, streaming its output to ``log_file`` line by line.
+
+        The process is killed as soon as a line matches one of the fatal
+        patterns or the timeout expires. Only the last ``tail_lines`` lines
+        are kept in memory, however long the simulation log grows.
+        """
+        tail = deque(maxlen=self.config.tail_lines)
+        outcome = {"returncode": None, "reason": None, "tail": tail}
+
+        with open(log_file, 'w') as log:
+            proc = subprocess.Popen(
+                cmd,
+                cwd=cwd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                errors='replace',
+                bufsize=1,
+                start_new_session=True
+            )
+
+            def kill(reason: str):
+                if outcome["reason"] is None:
+                    outcome["reason"] = reason
+                try:
+                    os.killpg(proc.pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+
+            watchdog = threading.Timer(self.config.timeout, kill,
+                                       args=(f"timed out after {self.config.timeout}s",))
+            watchdog.daemon = True
+            watchdog.start()
+            try:
+                for line in proc.stdout:
+                    log.write(line)
+                    tail.append(line.rstrip("\n"))
+                    if self.fatal_re is not None and outcome["reason"] is None \
+                            and self.fatal_re.search(line):
+                        kill(f"fatal output: {line.strip()}")
+                outcome["returncode"] = proc.wait()
+            finally:
+                watchdog.cancel()
+                if proc.poll() is None:
+                    kill("runner interrupted")
+                    proc.wait()
+                proc.stdout.close()
+
+        return outcome
+
+    def rerun_with_waves(self, test_file: Path, slot: int = 0) -> Optional[Path]:
+        """Re-run a failed test with tracing on, using the same seed and arguments.
+
+        The outcome is added to the test's existing result file, whose status
+        stays that of the first run. Returns the trace file if one was written.
+        """
+        wave_file = self.config.log_dir / "waves" / f"{test_file.stem}.vcd"
+        try:
+            wave_file.parent.mkdir(parents=True, exist_ok=True)
+            slot_dir = self.config.work_dir / f"slot_{slot}"
+            slot_dir.mkdir(parents=True, exist_ok=True)
+            logging.info(f"Re-running {test_file.name} with waves (slot {slot})")
+
+            outcome = self._stream_process(
+                self._build_command(test_file, waves=True, tag=".waves"),
+                slot_dir,
+                self.config.log_dir / f"{test_file.stem}.waves.console.log"
+            )
+            rerun = {
+                "returncode": outcome["returncode"],
+                "reason": outcome["reason"],
+                "trace": str(wave_file) if wave_file.exists() else None,
+            }
+            if outcome["returncode"] == 0 and outcome["reason"] is None:
+                logging.warning(f"Test {test_file.name} passed when re-run with waves, possibly flaky")
+        except Exception as e:
+            logging.error(f"Error re-running test {test_file.name} with waves: {str(e)}")
+            rerun = {"returncode": None, "reason": str(e), "trace": None}
+
+        result_file = self.config.result_dir / f"{test_file.stem}.json"
+        with self._results_lock:
+            with open(result_file, 'r') as f:
+                data = json.load(f)
+            data["waves_rerun"] = rerun
+            with open(result_file, 'w') as f:
+                json.dump(data, f, indent=2)
+
+        return wave_file if rerun["trace"] else None
+
+    def _run_in_slot(self, test_file: Path, task=None):
+        """Borrow a free slot, run the test in it and give the slot back."""
+        slot = self._slots.get()
+        try:
+            return (task or self.run_test)(test_file, slot)
+        finally:
+            self._slots.put(slot)
+
+    def run_all(self, tests: Optional[List[Path]] = None, jobs: Optional[int] = None) -> Dict:
+        """Run tests on a worker pool and return the aggregated summary."""
+        tests = self.discover_tests() if tests is None else tests
+        if self.config.shard_count > 1:
+            tests = self.select_shard(tests, self.config.shard_index, self.config.shard_count)
+        if self.config.incremental:
+            tests = self.select_changed_tests(tests)
+        tests = self.schedule(tests)
+        jobs = max(1, min(jobs or self.config.jobs, len(tests) or 1))
+
+        # Simulators are separate processes, so threads are enough to keep
+        # every core busy while the GIL stays out of the way.
+        self._slots = Queue()
+        for slot in range(jobs):
+            self._slots.put(slot)
+
+        if self.rtl_hash is None:
+            self.prepare_model()
+        if self.config.warm_workers and self.model is None:
+            logging.warning("Warm workers need the cached model binary, running each test in its own simulator")
+
+        logging.info(f"Running {len(tests)} tests with {jobs} parallel jobs (seed {self.seed})")
+        start = time.monotonic()
+        merger = CoverageMerger(self.config.work_dir / "coverage", self.config.coverage_jobs,
+                                self.config.coverage_fanout) if self.config.coverage else None
+        results: Dict[Path, bool] = {}
+        coverage_files: List[str] = []
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            futures = {pool.submit(self._run_in_slot, test): test for test in tests}
+            for future in as_completed(futures):
+                test = futures[future]
+                results[test] = future.result()
+                status = "PASS" if results[test] else "FAIL"
+                logging.info(f"[{len(results)}/{len(tests)}] {test.name}: {status}")
+                coverage_file = self._coverage_file(test)
+                if merger is not None and coverage_file.exists():
+                    merger.add(coverage_file)
+                    coverage_files.append(coverage_file.name)
+
+        if self.graph is not None:
+            self.graph.record(results, self.config.top)
+
+        traces: Dict[str, Optional[str]] = {}
+        failed = [test for test, passed in results.items() if not passed]
+        if self.config.waves_on_failure and failed:
+            logging.info(f"Re-running {len(failed)} failed tests with waves enabled")
+            with ThreadPoolExecutor(max_workers=jobs) as pool:
+                futures = {pool.submit(self._run_in_slot, test, self.rerun_with_waves): test
+                           for test in failed}
+                for future in as_completed(futures):
+                    trace = future.result()
+                    traces[futures[future].stem] = str(trace) if trace else None
+
+        self.close_workers()
+        summary = self._summarize(results, time.monotonic() - start, jobs)
+        if traces:
+            summary["traces"] = traces
+        if merger is not None:
+            summary["coverage"] = self.finish_coverage(merger)
+            # The first-run files only; merging shards must skip wave re-runs
+            summary["coverage_files"] = sorted(coverage_files)
+        self._save_summary(summary)
+        return summary
+
+    def select_shard(self, tests: List[Path], index: int, count: int) -> List[Path]:
+        """Return this shard's share of ``tests``, balanced by recorded runtime.
+
+        Tests are assigned longest first to the least loaded shard, ties broken
+        by name. The runtimes come from the ``shard_durations`` file, never
+        from the history database the shards are writing to, so every host
+        computes the same split whenever it starts. Without that file all
+        tests weigh the same; tests missing from it get the median runtime.
+        """
+        durations = load_durations(self.config.shard_durations) if self.config.shard_durations else {}
+        known = sorted(durations.values())
+        default = known[len(known) // 2] if known else 1.0
+
+        weighted = sorted(((durations.get(t.stem, default), t.stem, t) for t in tests),
+                          key=lambda w: (-w[0], w[1]))
+        loads = [0.0] * count
+        shards: List[List[Path]] = [[] for _ in range(count)]
+        for duration, _, test in weighted:
+            target = min(range(count), key=lambda i: (loads[i], i))
+            loads[target] += duration
+            shards[target].append(test)
+        self.shard_plan = {"tests": sorted(t.stem for t in tests),
+                           "assigned": sorted(t.stem for t in shards[index])}
+
+        logging.info(f"Shard {index}/{count}: {len(shards[index])} tests, "
+                     f"expected {loads[index]:.1f}s (max shard {max(loads):.1f}s)")
+        return shards[index]
+
+    def _coverage_file(self, test_file: Path, tag: str = "") -> Path:
+        return self.config.result_dir / "coverage" / f"{test_file.stem}{tag}.dat"
+
+    def finish_coverage(self, merger: CoverageMerger) -> Optional[str]:
+        """Complete the coverage merge and write the per-module summary."""
+        merged = merger.finish(self.config.result_dir / "coverage_merged.dat")
+        if merged is None:
+            logging.warning("No coverage data was produced")
+            return None
+        write_coverage_summary(merged, self.config.result_dir / "coverage_summary.json")
+        return str(merged)
+
+    def schedule(self, tests: List[Path]) -> List[Path]:
+        """Order tests longest first using their recorded runtimes.
+
+        Tests without history go first since they may well be the long ones.
+        The pool then never ends a run waiting on a long test started last.
+        """
+        if self.store is None:
+            return tests
+        durations = self.store.expected_durations()
+        return sorted(tests, key=lambda t: durations.get(t.stem, float("inf")), reverse=True)
+
+    def _summarize(self, results: Dict[Path, bool], elapsed: float, jobs: int) -> Dict:
+        """Build the aggregated summary for a regression run."""
+        failed = sorted(test.stem for test, passed in results.items() if not passed)
+        return {
+            "timestamp": datetime.datetime.now().isoformat(),
+            "run_id": self.run_id,
+            "simulator": self.config.simulator,
+            "seed": self.seed,
+            "rtl_hash": self.rtl_hash,
+            "jobs": jobs,
+            "shard": [self.config.shard_index, self.config.shard_count],
+            "tests": sorted(test.stem for test in results),
+            "total": len(results),
+            "passed": len(results) - len(failed),
+            "failed": len(failed),
+            "failures": failed,
+            "elapsed": round(elapsed, 3),
+            **({"shard_plan": self.shard_plan} if self.shard_plan is not None else {}),
+        }
+
+    def _save_summary(self, summary: Dict):
+        """Write the summary to the result directory and the log."""
+        summary_file = self.config.result_dir / "summary.json"
+        with open(summary_file, 'w') as f:
+            json.dump(summary, f, indent=2)
+
+        logging.info("=" * 60)
+        logging.info(f"Regression complete in {summary['elapsed']:.1f}s")
+        logging.info(f"Passed: {summary['passed']}/{summary['total']}")
+        for name in summary["failures"]:
+            logging.info(f"  FAILED: {name}")
+        logging.info("=" * 60)
+
+    def _build_command(self, test_file: Path, waves: Optional[bool] = None, tag: str = "") -> List[str]:
+        """Build the command to run the test.
+
+        With a cached model the binary itself runs, taking the test options
+        as the plusargs verilator_tb.cpp parses. Otherwise the configured
+        simulator compiles and runs the test. ``tag`` is appended to the log
+        name so re-runs keep the original log.
+        """
+        if self.model is not None:
+            cmd = [str(self.model), f"+test={test_file}", f"+verilator+seed+{self.seed}"]
+            if self.config.coverage:
+                cmd.append(f"+coverage_file={self._coverage_file(test_file, tag)}")
+            if self.checkpoint is not None:
+                cmd.append(f"+checkpoint_restore={self.checkpoint}")
+            if self.config.waves if waves is None else waves:
+                cmd.append(f"+wave_file={self.config.log_dir / 'waves' / f'{test_file.stem}.vcd'}")
+            return cmd
+
         cmd = [self.config.simulator]
+        waves = self.config.waves if waves is None else waves
         
         if self.config.coverage:
-            cmd.extend(["--coverage", "true"])
+            cmd.extend(["--coverage", "true",
+                        "--coverage-file", str(self._coverage_file(test_file, tag))])
         
-        if self.config.waves:
-            cmd.extend(["--waves", "true"])
+        if waves:
+            cmd.extend(["--waves", "true",
+                        "--wave-file", str(self.config.log_dir / "waves" / f"{test_file.stem}.vcd")])
         
         cmd.extend([
+            "--seed", str(self.seed),
             "--test", str(test_file),
-            "--log", str(self.config.log_dir / f"{test_file.stem}.log"),
-            "--top", "simple_arm_tb"
-        ])
\ No newline at end of file
+            "--log", str(self.config.log_dir / f"{test_file.stem}{tag}.log"),
+            "--top", self.config.top
+        ])
+        
+        return cmd
+
+    def _save_test_results(self, test_file: Path, outcome: Optional[Dict],
+                           success: bool, duration: float = 0.0):
+        """Save the outcome of a single test to its own result file."""
+        data = {
+            "test": test_file.stem,
+            "file": str(test_file),
+            "status": "PASS" if success else "FAIL",
+            "returncode": outcome["returncode"] if outcome is not None else None,
+            "duration": round(duration, 3),
+            "timestamp": datetime.datetime.now().isoformat(),
+        }
+        if outcome is not None:
+            data["reason"] = outcome["reason"]
+            data["log"] = str(self.config.log_dir / f"{test_file.stem}.console.log")
+            data["tail"] = list(outcome["tail"])
+
+        result_file = self.config.result_dir / f"{test_file.stem}.json"
+        with self._results_lock:
+            with open(result_file, 'w') as f:
+                json.dump(data, f, indent=2)
+
+        if self.store is not None:
+            self.store.record(self.run_id, test_file.stem, data["status"], duration,
+                              self.config.simulator, self.seed, self.rtl_hash)
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="SimpleARM regression runner")
+    parser.add_argument("--config", default="regression_config.json", help="Configuration file (JSON)")
+    parser.add_argument("--test", action="append", help="Run only this test file (repeatable)")
+    parser.add_argument("-j", "--jobs", type=int, help="Number of parallel jobs (default: nproc)")
+    parser.add_argument("--timeout", type=int, help="Per-test timeout in seconds")
+    parser.add_argument("--simulator", help="Override simulator")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Run only tests whose RTL dependencies changed since their last run")
+    parser.add_argument("--seed", type=int, help="Simulation seed (default: random per run)")
+    parser.add_argument("--history", type=int, nargs="?", const=20, metavar="N",
+                        help="Show the last N recorded results (filter with --test) and exit")
+    parser.add_argument("--stats", action="store_true", help="Show per-test runtime statistics and exit")
+    parser.add_argument("--result-dir", help="Override result directory")
+    parser.add_argument("--history-db", help="History database (default: <result-dir>/history.db)")
+    parser.add_argument("--shard-index", type=int, help="Index of this shard (0-based, default: from config)")
+    parser.add_argument("--shard-count", type=int, help="Total number of shards (default: from config)")
+    parser.add_argument("--shard-durations", metavar="FILE",
+                        help="Test runtimes (JSON) to balance the shards on, shared by every shard")
+    parser.add_argument("--save-durations", metavar="FILE",
+                        help="Write the expected test runtimes from the history database and exit")
+    parser.add_argument("--merge", nargs="+", metavar="SHARD_DIR",
+                        help="Merge shard result directories into --result-dir and exit")
+    parser.add_argument("--waves-on-failure", action="store_true",
+                        help="Run without waves, then re-run failing tests with waves enabled")
+    parser.add_argument("--warm-workers", action="store_true",
+                        help="Feed tests to long-lived simulator processes, one per job")
+    parser.add_argument("--checkpoint", action="store_true",
+                        help="Build a savable model and start every test from a post-reset snapshot")
+    parser.add_argument("--no-model-cache", action="store_true", help="Compile the model per test")
+    return parser.parse_args()
+
+def write_coverage_summary(merged: Path, summary_file: Path) -> Dict:
+    """Summarize merged coverage per rtl/ module into JSON and the log."""
+    modules = summarize_coverage(merged)
+    with open(summary_file, 'w') as f:
+        json.dump(modules, f, indent=2)
+
+    def fmt(stats: Dict) -> str:
+        if not stats["total"]:
+            return f"{'-':>18}"
+        return f"{stats['covered']:>6}/{stats['total']:<6} {stats['percent']:5.1f}%"
+
+    logging.info(f"{'MODULE':24} {'LINE':>18} {'TOGGLE':>18}")
+    for name, module in modules.items():
+        logging.info(f"{name:24} {fmt(module['line'])} {fmt(module['toggle'])}")
+    return modules
+
+def load_durations(durations_file: Path) -> Dict[str, float]:
+    """Read the test runtimes a sharded run is split on."""
+    with open(durations_file, 'r') as f:
+        return {test: float(duration) for test, duration in json.load(f).items()}
+
+def save_durations(store: ResultsStore, durations_file: Path) -> Dict[str, float]:
+    """Snapshot the expected runtimes from the history store for ``--shard-durations``."""
+    durations = store.expected_durations()
+    with open(durations_file, 'w') as f:
+        json.dump(dict(sorted(durations.items())), f, indent=2)
+    return durations
+
+def check_shards(shards: Dict[Path, Dict]):
+    """Raise ValueError unless the shards together ran every planned test exactly once."""
+    counts = {shard["shard"][1] for shard in shards.values()}
+    if len(counts) != 1:
+        raise ValueError(f"Shards disagree on the shard count: {sorted(counts)}")
+    count = counts.pop()
+    indices = sorted(shard["shard"][0] for shard in shards.values())
+    if indices != list(range(count)):
+        raise ValueError(f"Expected shards 0..{count - 1} once each, got {indices}")
+    if count == 1:
+        return
+
+    plans = {tuple(shard["shard_plan"]["tests"]) for shard in shards.values()}
+    if len(plans) != 1:
+        raise ValueError("Shards were split from different test lists")
+    planned = set(plans.pop())
+
+    # Each shard may only run its own tests, so duplicates show up here
+    assigned: Dict[str, int] = {}
+    for shard_dir, shard in shards.items():
+        own = set(shard["shard_plan"]["assigned"])
+        stray = sorted(set(shard["tests"]) - own)
+        if stray:
+            raise ValueError(f"Shard {shard_dir} ran tests it was not assigned: {', '.join(stray)}")
+        for test in own:
+            assigned[test] = assigned.get(test, 0) + 1
+
+    duplicates = sorted(test for test, n in assigned.items() if n > 1)
+    if duplicates:
+        raise ValueError(f"Tests assigned to more than one shard: {', '.join(duplicates)}")
+    missing = sorted(planned - set(assigned))
+    if missing:
+        raise ValueError(f"Tests assigned to no shard: {', '.join(missing)}")
+
+def merge_shards(shard_dirs: List[Path], output_dir: Path) -> Dict:
+    """Combine per-shard result directories into one report in ``output_dir``.
+
+    The shards are first checked to have run every planned test exactly once;
+    a ValueError is raised otherwise. The merged totals are then counted from
+    the per-test lists, the first-run coverage files each shard summary lists
+    are merged, and each shard's history database is imported.
+    """
+    shards: Dict[Path, Dict] = {}
+    for shard_dir in shard_dirs:
+        summary_file = shard_dir / "summary.json"
+        if not summary_file.exists():
+            raise ValueError(f"No summary found in shard directory {shard_dir}")
+        with open(summary_file, 'r') as f:
+            shards[shard_dir] = json.load(f)
+    check_shards(shards)
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    coverage_dir = output_dir / "coverage"
+    merger = CoverageMerger(output_dir / "coverage_partial")
+    store = ResultsStore(output_dir / "history.db")
+    tests = sorted(test for shard in shards.values() for test in shard["tests"])
+    failures = sorted(test for shard in shards.values() for test in shard["failures"])
+    summary = {"timestamp": datetime.datetime.now().isoformat(), "shards": [str(d) for d in shards],
+               "tests": tests, "total": len(tests), "passed": len(tests) - len(failures),
+               "failed": len(failures), "failures": failures,
+               "elapsed": max(shard["elapsed"] for shard in shards.values())}
+
+    for shard_dir in shards:
+        for result_file in shard_dir.glob("*.json"):
+            if result_file.name != "summary.json":
+                shutil.copy2(result_file, output_dir / result_file.name)
+        for name in shards[shard_dir].get("coverage_files", []):
+            coverage_file = shard_dir / "coverage" / name
+            if not coverage_file.exists():
+                logging.warning(f"Coverage file {coverage_file} listed by its shard is missing")
+                continue
+            coverage_dir.mkdir(exist_ok=True)
+            shutil.copy2(coverage_file, coverage_dir / name)
+            merger.add(coverage_dir / name)
+
+        shard_db = shard_dir / "history.db"
+        if shard_db.exists() and shard_db.resolve() != store.db_path.resolve():
+            store.merge_from(shard_db)
+
+    merged = merger.finish(output_dir / "coverage_merged.dat")
+    if merged is not None:
+        write_coverage_summary(merged, output_dir / "coverage_summary.json")
+        summary["coverage"] = str(merged)
+
+    with open(output_dir / "summary.json", 'w') as f:
+        json.dump(summary, f, indent=2)
+    store.close()
+    return summary
+
+def show_history(store: ResultsStore, args: argparse.Namespace):
+    """Print recorded results or per-test statistics from the history store."""
+    if args.stats:
+        print(f"{'TEST':40} {'RUNS':>5} {'PASS%':>6} {'AVG(s)':>9} {'MAX(s)':>9}  LAST RUN")
+        for row in store.stats():
+            print(f"{row['test']:40} {row['runs']:>5} {100 * row['pass_rate']:>6.1f} "
+                  f"{row['avg_duration']:>9.2f} {row['max_duration']:>9.2f}  {row['last_run']}")
+        return
+
+    tests = [Path(t).stem for t in args.test] if args.test else [None]
+    print(f"{'TIMESTAMP':26} {'TEST':40} {'STATUS':6} {'TIME(s)':>9} {'SEED':>10}  RTL HASH")
+    for test in tests:
+        for row in store.history(test, args.history):
+            print(f"{row['timestamp']:26} {row['test']:40} {row['status']:6} {row['duration']:>9.2f} "
+                  f"{row['seed'] if row['seed'] is not None else '-':>10}  {row['rtl_hash'] or '-'}")
+
+def main():
+    args = parse_args()
+    config = Config(args.config)
+
+    if args.result_dir:
+        config.result_dir = Path(args.result_dir).resolve()
+        if not args.history_db:
+            config.history_db = config.result_dir / "history.db"
+    if args.history_db:
+        config.history_db = Path(args.history_db).resolve()
+
+    if args.merge:
+        logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+        try:
+            summary = merge_shards([Path(d).resolve() for d in args.merge], config.result_dir)
+        except ValueError as e:
+            logging.error(f"Cannot merge shards: {str(e)}")
+            sys.exit(2)
+        print(f"Merged {len(summary['shards'])} shards: {summary['passed']}/{summary['total']} passed")
+        sys.exit(0 if summary["failed"] == 0 else 1)
+
+    if args.shard_index is not None:
+        config.shard_index = args.shard_index
+    if args.shard_count is not None:
+        config.shard_count = args.shard_count
+    if not 0 <= config.shard_index < config.shard_count:
+        logging.error(f"Invalid shard {config.shard_index} of {config.shard_count}")
+        sys.exit(2)
+    if args.shard_durations:
+        config.shard_durations = Path(args.shard_durations).resolve()
+
+    if args.save_durations:
+        durations = save_durations(ResultsStore(config.history_db), Path(args.save_durations))
+        print(f"Saved runtimes of {len(durations)} tests to {args.save_durations}")
+        sys.exit(0)
+
+    if args.history is not None or args.stats:
+        show_history(ResultsStore(config.history_db), args)
+        sys.exit(0)
+
+    # Override configuration with command line arguments
+    if args.jobs:
+        config.jobs = args.jobs
+    if args.timeout:
+        config.timeout = args.timeout
+    if args.simulator:
+        config.simulator = args.simulator
+    if args.no_model_cache:
+        config.model_cache = False
+    if args.incremental:
+        config.incremental = True
+    if args.seed is not None:
+        config.seed = args.seed
+    if args.waves_on_failure:
+        config.waves_on_failure = True
+    if args.warm_workers:
+        config.warm_workers = True
+    if args.checkpoint:
+        config.checkpoint = True
+
+    runner = TestRunner(config)
+    tests = [Path(t).resolve() for t in args.test] if args.test else None
+    summary = runner.run_all(tests)
+
+    sys.exit(0 if summary["failed"] == 0 else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -----------------------------------------------------------------------------
+# File: sim_worker.py
+# Project: SimpleARM - A Simplified ARM Cortex-M0 Processor Core
+# Purpose: Long-lived simulator worker processes for the regression runner
+# -----------------------------------------------------------------------------
+
+import os
+import json
+import signal
+import logging
+import threading
+import subprocess
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Optional, Pattern
+
+# Line a serving simulator prints once a test is done, followed by JSON
+RESULT_MARKER = "@@RESULT "
+
+class SimWorker:
+    """A simulator kept warm across tests and fed over its stdin pipe.
+
+    The simulator is started once with ``--serve``; verilator_tb.cpp
+    implements this mode. For every test it reads one JSON request line,
+    starts from a fresh model, runs the test, and prints its
+    output followed by ``@@RESULT {"returncode": N}``. The worker is restarted
+    after ``max_tests`` tests, when its RSS exceeds ``max_rss_mb``, or when a
+    test had to be killed.
+    """
+
+    def __init__(self, command: List[str], cwd: Path, max_tests: int = 50,
+                 max_rss_mb: Optional[int] = None):
+        self.command = list(command) + ["--serve"]
+        self.cwd = Path(cwd)
+        self.max_tests = max_tests
+        self.max_rss_mb = max_rss_mb
+        self.proc: Optional[subprocess.Popen] = None
+        self.tests_run = 0
+
+    def start(self):
+        self.cwd.mkdir(parents=True, exist_ok=True)
+        self.proc = subprocess.Popen(
+            self.command,
+            cwd=self.cwd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            errors='replace',
+            bufsize=1,
+            start_new_session=True
+        )
+        self.tests_run = 0
+        logging.debug(f"Started simulator worker {self.proc.pid} in {self.cwd}")
+
+    def alive(self) -> bool:
+        return self.proc is not None and self.proc.poll() is None
+
+    def kill(self):
+        if self.proc is not None:
+            try:
+                os.killpg(self.proc.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+    def stop(self):
+        """Ask the worker to exit, killing it if it does not."""
+        if self.proc is None:
+            return
+        try:
+            self.proc.stdin.close()
+            self.proc.wait(timeout=10)
+        except (OSError, subprocess.TimeoutExpired):
+            self.kill()
+            self.proc.wait()
+        self.proc.stdout.close()
+        self.proc = None
+
+    def rss_mb(self) -> Optional[float]:
+        """Resident memory of the worker from /proc, where available."""
+        try:
+            with open(f"/proc/{self.proc.pid}/status", 'r') as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1]) / 1024
+        except (OSError, ValueError, AttributeError):
+            pass
+        return None
+
+    def run(self, request: Dict, log_file: Path, timeout: float,
+            fatal_re: Optional[Pattern] = None, tail_lines: int = 50) -> Dict:
+        """Run one test on the worker, streaming its output to ``log_file``.
+
+        Returns the same outcome dict as a one-shot simulator run.
+        """
+        if not self.alive():
+            self.start()
+
+        tail = deque(maxlen=tail_lines)
+        outcome = {"returncode": None, "reason": None, "tail": tail}
+
+        def abort(reason: str):
+            if outcome["reason"] is None:
+                outcome["reason"] = reason
+            self.kill()
+
+        watchdog = threading.Timer(timeout, abort, args=(f"timed out after {timeout}s",))
+        watchdog.daemon = True
+        with open(log_file, 'w') as log:
+            watchdog.start()
+            try:
+                self.proc.stdin.write(json.dumps(dict(request, reset=True)) + "\n")
+                self.proc.stdin.flush()
+                for line in self.proc.stdout:
+                    if line.startswith(RESULT_MARKER):
+                        outcome["returncode"] = json.loads(line[len(RESULT_MARKER):]).get("returncode", 1)
+                        break
+                    log.write(line)
+                    tail.append(line.rstrip("\n"))
+                    if fatal_re is not None and outcome["reason"] is None and fatal_re.search(line):
+                        abort(f"fatal output: {line.strip()}")
+                else:
+                    outcome["returncode"] = self.proc.wait()
+                    if outcome["reason"] is None:
+                        outcome["reason"] = "simulator worker exited"
+            except (OSError, ValueError) as e:
+                abort(f"simulator worker failed: {str(e)}")
+            finally:
+                watchdog.cancel()
+
+        self.tests_run += 1
+        if outcome["reason"] is not None or not self.alive():
+            self.stop()
+        elif self.tests_run >= self.max_tests:
+            logging.debug(f"Recycling worker {self.proc.pid} after {self.tests_run} tests")
+            self.stop()
+        elif self.max_rss_mb is not None and (self.rss_mb() or 0) > self.max_rss_mb:
+            logging.debug(f"Recycling worker {self.proc.pid} above {self.max_rss_mb} MB RSS")
+            self.stop()
+        return outcome
@@ -0,0 +1,12 @@
+# -----------------------------------------------------------------------------
+# File: conftest.py
+# Project: SimpleARM - A Simplified ARM Cortex-M0 Processor Core
+# Purpose: Make the verification scripts importable from their tests
+# -----------------------------------------------------------------------------
+
+import sys
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parents[1]
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
@@ -0,0 +1,39 @@
+# -----------------------------------------------------------------------------
+# File: test_dep_graph.py
+# Project: SimpleARM - A Simplified ARM Cortex-M0 Processor Core
+# Purpose: Tests for the incremental regression dependency graph
+# -----------------------------------------------------------------------------
+
+import os
+
+from dep_graph import DependencyGraph
+
+def _tree(tmp_path):
+    (tmp_path / "rtl").mkdir()
+    (tmp_path / "tb").mkdir()
+    (tmp_path / "rtl" / "top.v").write_text("module top(); alu u_alu(); endmodule\n")
+    (tmp_path / "rtl" / "alu.v").write_text("module alu(); endmodule\n")
+    (tmp_path / "rtl" / "spare.v").write_text("module spare(); endmodule\n")
+    (tmp_path / "tb" / "test_a.sv").write_text("module test_a(); top dut(); endmodule\n")
+    (tmp_path / "tb" / "verilator_tb.cpp").write_text("int main() { return 0; }\n")
+    return tmp_path / "tb" / "test_a.sv"
+
+def _selected(tmp_path, test):
+    graph = DependencyGraph([tmp_path / "rtl", tmp_path / "tb"], tmp_path / "graph.json")
+    graph.update()
+    return graph, graph.select_tests([test], "top")
+
+def _edit(path, text):
+    path.write_text(text)
+    os.utime(path, ns=(path.stat().st_mtime_ns + 10**9,) * 2)
+
+def test_testbench_source_change_reruns_tests(tmp_path):
+    test = _tree(tmp_path)
+    graph, _ = _selected(tmp_path, test)
+    graph.record({test: True}, "top")
+
+    _edit(tmp_path / "rtl" / "spare.v", "module spare(); wire w; endmodule\n")
+    assert _selected(tmp_path, test)[1] == []
+
+    _edit(tmp_path / "tb" / "verilator_tb.cpp", "int main() { return 1; }\n")
+    assert _selected(tmp_path, test)[1] == [test]
@@ -0,0 +1,78 @@
+# -----------------------------------------------------------------------------
+# File: test_model_runs.py
+# Project: SimpleARM - A Simplified ARM Cortex-M0 Processor Core
+# Purpose: Tests for running tests directly on the cached model binary
+# -----------------------------------------------------------------------------
+
+import json
+import sys
+
+import run_regression
+from model_cache import ModelCache
+from run_regression import Config
+
+# Stand-in model binary reporting the plusargs it was started with
+MODEL = f'''#!{sys.executable}
+import os, sys
+args = dict(arg[1:].split("=", 1) for arg in sys.argv[1:] if arg.startswith("+") and "=" in arg)
+print("Test: " + args.get("test", ""))
+if os.path.exists(args.get("checkpoint_restore", "")):
+    print("Restored checkpoint at time 40")
+if args.get("coverage_file"):
+    open(args["coverage_file"], "w").write("# SystemC::Coverage-3\\n")
+print("argv: " + " ".join(sys.argv[1:]))
+'''
+
+def _runner(tmp_path, **settings):
+    config_file = tmp_path / "config.json"
+    config_file.write_text(json.dumps(dict({
+        "log_dir": str(tmp_path / "logs"), "result_dir": str(tmp_path / "results"),
+        "work_dir": str(tmp_path / "work"), "cache_dir": str(tmp_path / "cache"),
+        "history": False, "coverage": False}, **settings)))
+    runner = run_regression.TestRunner(Config(str(config_file)))
+    runner.model = tmp_path / "Vsimple_arm_top"
+    runner.model.write_text(MODEL)
+    runner.model.chmod(0o755)
+    return runner
+
+def test_cached_model_runs_directly(tmp_path):
+    runner = _runner(tmp_path)
+    test = tmp_path / "test_alu.sv"
+
+    assert runner.run_test(test)
+
+    log = (tmp_path / "logs" / "test_alu.console.log").read_text()
+    assert f"Test: {test}" in log
+    assert f"+verilator+seed+{runner.seed}" in log
+
+def test_one_shot_run_restores_checkpoint(tmp_path):
+    runner = _runner(tmp_path)
+    runner.checkpoint = tmp_path / "reset.chk"
+    runner.checkpoint.write_bytes(b"snapshot")
+
+    assert runner.run_test(tmp_path / "test_alu.sv")
+
+    log = (tmp_path / "logs" / "test_alu.console.log").read_text()
+    assert "Restored checkpoint at time 40" in log
+
+def test_coverage_runs_use_a_coverage_model(tmp_path):
+    plain = ModelCache(tmp_path / "cache", verilator="/nonexistent/verilator")
+    covered = ModelCache(tmp_path / "cache", verilator="/nonexistent/verilator", coverage=True)
+    assert "--coverage" in covered._build_command(tmp_path / "obj_dir")
+    assert covered.key != plain.key
+
+    runner = _runner(tmp_path, coverage=True)
+    assert runner.run_test(tmp_path / "test_alu.sv")
+    assert (tmp_path / "results" / "coverage" / "test_alu.dat").exists()
+
+def test_only_the_failure_rerun_traces(tmp_path):
+    runner = _runner(tmp_path, waves=True, waves_on_failure=True)
+    test = tmp_path / "test_alu.sv"
+
+    assert runner.run_test(test)
+    runner.rerun_with_waves(test)
+
+    first = (tmp_path / "logs" / "test_alu.console.log").read_text()
+    rerun = (tmp_path / "logs" / "test_alu.waves.console.log").read_text()
+    assert "+wave_file=" not in first
+    assert f"+wave_file={tmp_path / 'logs' / 'waves' / 'test_alu.vcd'}" in rerun
@@ -0,0 +1,130 @@
+# -----------------------------------------------------------------------------
+# File: test_sharding.py
+# Project: SimpleARM - A Simplified ARM Cortex-M0 Processor Core
+# Purpose: Tests for splitting a regression into shards and merging them back
+# -----------------------------------------------------------------------------
+
+import json
+from pathlib import Path
+
+import pytest
+
+from coverage_merge import COVERAGE_HEADER, read_coverage
+from results_db import ResultsStore
+import run_regression
+from run_regression import Config, merge_shards, save_durations
+
+TESTS = [Path(f"/tests/test_{name}.sv") for name in "abcdefg"]
+
+def _runner(tmp_path, index, durations_file=None):
+    shard_dir = tmp_path / f"shard_{index}"
+    config_file = tmp_path / f"config_{index}.json"
+    config_file.write_text(json.dumps({
+        "log_dir": str(shard_dir / "logs"), "result_dir": str(shard_dir),
+        "work_dir": str(shard_dir / "work"), "cache_dir": str(tmp_path / "cache"),
+        "history_db": str(tmp_path / "history.db"), "shard_index": index, "shard_count": 2,
+        "shard_durations": str(durations_file) if durations_file else None}))
+    return run_regression.TestRunner(Config(str(config_file)))
+
+def _write_shard(shard_dir, index, assigned, ran, failures=(), coverage_files=()):
+    shard_dir.mkdir(parents=True)
+    (shard_dir / "summary.json").write_text(json.dumps({
+        "shard": [index, 2], "tests": sorted(ran), "failures": sorted(failures), "elapsed": 1.0,
+        "shard_plan": {"tests": [t.stem for t in TESTS], "assigned": sorted(assigned)},
+        "coverage_files": sorted(coverage_files)}))
+
+def _write_coverage(path, count):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(f"{COVERAGE_HEADER}C '\x01f\x02rtl/alu.v\x01page\x02v_line/alu' {count}\n")
+
+def test_split_ignores_history_written_by_other_shards(tmp_path):
+    history = ResultsStore(tmp_path / "history.db")
+    for i, test in enumerate(TESTS):
+        history.record("run0", test.stem, "PASS", float(i + 1), "verilator", 1, "h")
+    durations_file = tmp_path / "durations.json"
+    save_durations(history, durations_file)
+    history.close()
+
+    first = _runner(tmp_path, 0, durations_file)
+    second = _runner(tmp_path, 1, durations_file)
+    shard_0 = first.select_shard(TESTS, 0, 2)
+    # Both shards share one history, and the first one's results land in it
+    # before the second shard starts
+    for test in shard_0:
+        first.store.record("run1", test.stem, "PASS", 100.0, "verilator", 1, "h")
+    shard_1 = second.select_shard(TESTS, 1, 2)
+
+    assert sorted(shard_0 + shard_1) == sorted(TESTS)
+    assert not set(shard_0) & set(shard_1)
+    assert first.shard_plan["tests"] == second.shard_plan["tests"]
+
+def test_merge_counts_each_test_once(tmp_path):
+    _write_shard(tmp_path / "s0", 0, ["test_a", "test_b", "test_c"], ["test_a", "test_b", "test_c"],
+                 failures=["test_b"])
+    _write_shard(tmp_path / "s1", 1, ["test_d", "test_e", "test_f", "test_g"],
+                 ["test_d", "test_e", "test_f", "test_g"])
+
+    summary = merge_shards([tmp_path / "s0", tmp_path / "s1"], tmp_path / "merged")
+
+    assert (summary["total"], summary["passed"], summary["failed"]) == (7, 6, 1)
+    assert summary["failures"] == ["test_b"]
+
+def test_merge_takes_only_listed_first_run_coverage(tmp_path):
+    first, second = ["test_a", "test_b", "test_c"], ["test_d", "test_e", "test_f", "test_g"]
+    _write_shard(tmp_path / "s0", 0, first, first, failures=["test_b"],
+                 coverage_files=["test_a.dat", "test_b.dat", "test_c.dat"])
+    _write_shard(tmp_path / "s1", 1, second, second, coverage_files=["test_d.dat"])
+    for test in first + ["test_d"]:
+        _write_coverage(tmp_path / ("s0" if test in first else "s1") / "coverage" / f"{test}.dat", 1)
+    # A wave re-run of the failing test and a file left over from an older run
+    _write_coverage(tmp_path / "s0" / "coverage" / "test_b.waves.dat", 1)
+    _write_coverage(tmp_path / "s1" / "coverage" / "test_old.dat", 1)
+
+    summary = merge_shards([tmp_path / "s0", tmp_path / "s1"], tmp_path / "merged")
+
+    points = {}
+    read_coverage(Path(summary["coverage"]), points)
+    assert list(points.values()) == [4]
+    assert sorted(p.name for p in (tmp_path / "merged" / "coverage").iterdir()) == \
+        ["test_a.dat", "test_b.dat", "test_c.dat", "test_d.dat"]
+
+@pytest.mark.parametrize("second, message", [
+    (["test_c", "test_d", "test_e", "test_f", "test_g"], "more than one shard"),
+    (["test_e", "test_f", "test_g"], "no shard"),
+])
+def test_merge_rejects_overlapping_or_incomplete_shards(tmp_path, second, message):
+    _write_shard(tmp_path / "s0", 0, ["test_a", "test_b", "test_c"], ["test_a", "test_b", "test_c"])
+    _write_shard(tmp_path / "s1", 1, second, second)
+
+    with pytest.raises(ValueError, match=message):
+        merge_shards([tmp_path / "s0", tmp_path / "s1"], tmp_path / "merged")
+
+def test_merge_rejects_missing_shard(tmp_path):
+    _write_shard(tmp_path / "s0", 0, ["test_a", "test_b", "test_c"], ["test_a", "test_b", "test_c"])
+
+    with pytest.raises(ValueError, match="Expected shards"):
+        merge_shards([tmp_path / "s0"], tmp_path / "merged")
+
+@pytest.mark.parametrize("argv, shard", [
+    ([], (1, 3)),
+    (["--shard-index", "0"], (0, 3)),
+    (["--shard-index", "1", "--shard-count", "2"], (1, 2)),
+])
+def test_shard_flags_override_config_only_when_given(tmp_path, monkeypatch, argv, shard):
+    config_file = tmp_path / "config.json"
+    config_file.write_text(json.dumps({"result_dir": str(tmp_path), "shard_index": 1, "shard_count": 3}))
+    seen = {}
+
+    class Runner:
+        def __init__(self, config):
+            seen["shard"] = (config.shard_index, config.shard_count)
+
+        def run_all(self, tests):
+            return {"failed": 0}
+
+    monkeypatch.setattr(run_regression, "TestRunner", Runner)
+    monkeypatch.setattr("sys.argv", ["run_regression.py", "--config", str(config_file)] + argv)
+    with pytest.raises(SystemExit):
+        run_regression.main()
+
+    assert seen["shard"] == shard
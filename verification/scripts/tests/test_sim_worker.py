@@ -0,0 +1,63 @@
+# -----------------------------------------------------------------------------
+# File: test_sim_worker.py
+# Project: SimpleARM - A Simplified ARM Cortex-M0 Processor Core
+# Purpose: Tests for warm simulator workers and the testbench --serve mode
+# -----------------------------------------------------------------------------
+
+import shutil
+import sys
+
+import pytest
+
+from model_cache import ModelCache
+from sim_worker import SimWorker
+
+# Stand-in speaking the same protocol as verilator_tb.cpp --serve
+SERVER = r'''
+import json, os, sys
+assert sys.argv[-1] == "--serve"
+for line in sys.stdin:
+    request = json.loads(line)
+    print(f"pid {os.getpid()} running {request['test']}", flush=True)
+    print("@@RESULT " + json.dumps({"returncode": 1 if "fail" in request["test"] else 0}), flush=True)
+'''
+
+def _pid(log_file):
+    return log_file.read_text().split()[1]
+
+def test_worker_runs_several_tests_in_one_process(tmp_path):
+    server = tmp_path / 'server.py'
+    server.write_text(SERVER)
+    worker = SimWorker([sys.executable, str(server)], tmp_path / 'slot_0', max_tests=2)
+    try:
+        first = worker.run({"test": "test_a.sv"}, tmp_path / 'a.log', timeout=30)
+        second = worker.run({"test": "test_fail.sv"}, tmp_path / 'b.log', timeout=30)
+        third = worker.run({"test": "test_c.sv"}, tmp_path / 'c.log', timeout=30)
+    finally:
+        worker.stop()
+
+    assert (first["returncode"], first["reason"]) == (0, None)
+    assert (second["returncode"], second["reason"]) == (1, None)
+    assert third["returncode"] == 0
+    assert "running test_a.sv" in (tmp_path / 'a.log').read_text()
+    assert _pid(tmp_path / 'a.log') == _pid(tmp_path / 'b.log')
+    # Recycled after max_tests
+    assert _pid(tmp_path / 'c.log') != _pid(tmp_path / 'a.log')
+
+@pytest.mark.skipif(shutil.which("verilator") is None, reason="needs Verilator")
+def test_testbench_serves_tests(tmp_path):
+    binary = ModelCache(tmp_path / 'cache').get()
+    assert binary is not None
+    worker = SimWorker([str(binary)], tmp_path / 'slot_0')
+    try:
+        outcomes = [worker.run({"test": name}, tmp_path / f'{name}.log', timeout=300)
+                    for name in ("test_a.sv", "test_b.sv")]
+    finally:
+        worker.stop()
+
+    for name, outcome in zip(("test_a.sv", "test_b.sv"), outcomes):
+        assert (outcome["returncode"], outcome["reason"]) == (0, None)
+        log = (tmp_path / f'{name}.log').read_text()
+        assert f"Test: {name}" in log
+        # Each test starts from a new model
+        assert "Simulation completed at time 1000" in log
@@ -5,24 +5,79 @@
 // -----------------------------------------------------------------------------
 
 #include <stdlib.h>
+#include <string.h>
 #include <iostream>
+#include <string>
 #include <verilated.h>
 #include <verilated_vcd_c.h>
+#ifdef SIMPLE_ARM_SAVABLE
+#include <verilated_save.h>
+#endif
+#if VM_COVERAGE
+#include <verilated_cov.h>
+#endif
 #include "Vsimple_arm_top.h"
 
 #define MAX_SIM_TIME 1000
+#define RESET_TIME 20        // Reset released from here on
+#define CHECKPOINT_TIME 40   // Post-reset state saved by +checkpoint_save
+#define RESULT_MARKER "@@RESULT "  // Ends each test in --serve mode
 vluint64_t sim_time = 0;
 
-int main(int argc, char** argv) {
-    Verilated::commandArgs(argc, argv);
+// Value of a +name=value plusarg, empty if absent
+static std::string plusarg(const char* name) {
+    const char* match = Verilated::commandArgsPlusMatch(name);
+    std::string arg(match ? match : "");
+    size_t eq = arg.find('=');
+    return eq == std::string::npos ? "" : arg.substr(eq + 1);
+}
+
+// String value of "key" in a flat one-line JSON object, empty if absent
+static std::string json_field(const std::string& line, const char* key) {
+    std::string quoted = std::string("\"") + key + "\"";
+    size_t pos = line.find(quoted);
+    if (pos == std::string::npos) return "";
+    pos = line.find(':', pos + quoted.size());
+    if (pos == std::string::npos) return "";
+    pos = line.find_first_not_of(" \t", pos + 1);
+    if (pos == std::string::npos) return "";
+    if (line[pos] != '"') {
+        size_t end = line.find_first_of(",}", pos);
+        return line.substr(pos, end == std::string::npos ? std::string::npos : end - pos);
+    }
+    std::string value;
+    for (size_t i = pos + 1; i < line.size() && line[i] != '"'; i++) {
+        if (line[i] == '\\' && i + 1 < line.size()) i++;
+        value += line[i];
+    }
+    return value;
+}
+
+// Settings of one simulation run
+struct TestRequest {
+    std::string test;
+    std::string wave_file;
+    std::string coverage_file;
+    std::string checkpoint_save;
+    std::string checkpoint_restore;
+};
+
+// Run one simulation on a freshly constructed model; returns the exit code
+static int run_simulation(const TestRequest& req) {
+    sim_time = 0;
     Vsimple_arm_top* dut = new Vsimple_arm_top;
-    
+#if VM_COVERAGE
+    VerilatedCov::zero();
+#endif
+
     // Enable VCD trace
-    Verilated::traceEverOn(true);
-    VerilatedVcdC* tfp = new VerilatedVcdC;
-    dut->trace(tfp, 99);
-    tfp->open("simple_arm_trace.vcd");
-    
+    VerilatedVcdC* tfp = NULL;
+    if (!req.wave_file.empty()) {
+        tfp = new VerilatedVcdC;
+        dut->trace(tfp, 99);
+        tfp->open(req.wave_file.c_str());
+    }
+
     // Initialize inputs
     dut->clk = 0;
     dut->rst_n = 0;
@@ -32,27 +87,52 @@ int main(int argc, char** argv) {
     dut->trst_n = 0;
     dut->ext_rdata = 0;
     dut->ext_ready = 0;
-    
+
     std::cout << "========================================" << std::endl;
     std::cout << "SimpleARM Verilator Simulation Starting" << std::endl;
+    if (!req.test.empty()) {
+        std::cout << "Test: " << req.test << std::endl;
+    }
     std::cout << "========================================" << std::endl;
-    
+
+#ifdef SIMPLE_ARM_SAVABLE
+    // Skip the reset sequence by restoring a post-reset snapshot
+    if (!req.checkpoint_restore.empty()) {
+        VerilatedRestore os;
+        os.open(req.checkpoint_restore.c_str());
+        os >> sim_time;
+        os >> *dut;
+        os.close();
+        std::cout << "Restored checkpoint at time " << sim_time << std::endl;
+    }
+#else
+    if (!req.checkpoint_save.empty() || !req.checkpoint_restore.empty()) {
+        std::cerr << "Checkpoints need a model built with --savable" << std::endl;
+        if (tfp) {
+            tfp->close();
+            delete tfp;
+        }
+        delete dut;
+        return 1;
+    }
+#endif
+
     // Simulation loop
     while (sim_time < MAX_SIM_TIME) {
         // Toggle clock
         dut->clk = !dut->clk;
-        
+
         // Toggle JTAG clock (slower)
         if (sim_time % 10 == 0) {
             dut->tck = !dut->tck;
         }
-        
+
         // Release reset after some time
-        if (sim_time >= 20) {
+        if (sim_time >= RESET_TIME) {
             dut->rst_n = 1;
             dut->trst_n = 1;
         }
-        
+
         // External memory ready signal
         if (dut->ext_rd_en || dut->ext_wr_en) {
             dut->ext_ready = 1;
@@ -60,22 +140,84 @@ int main(int argc, char** argv) {
         } else {
             dut->ext_ready = 0;
         }
-        
+
         // Evaluate the design
         dut->eval();
-        tfp->dump(sim_time);
-        
+        if (tfp) tfp->dump(sim_time);
+
         sim_time++;
+
+#ifdef SIMPLE_ARM_SAVABLE
+        // Snapshot the state once reset and boot are done, then stop
+        if (!req.checkpoint_save.empty() && sim_time == CHECKPOINT_TIME) {
+            VerilatedSave os;
+            os.open(req.checkpoint_save.c_str());
+            os << sim_time;
+            os << *dut;
+            os.close();
+            std::cout << "Saved checkpoint at time " << sim_time << std::endl;
+            break;
+        }
+#endif
     }
-    
+
     std::cout << "========================================" << std::endl;
     std::cout << "Simulation completed at time " << sim_time << std::endl;
-    std::cout << "VCD file: simple_arm_trace.vcd" << std::endl;
+    if (tfp) {
+        std::cout << "VCD file: " << req.wave_file << std::endl;
+    }
     std::cout << "========================================" << std::endl;
-    
-    tfp->close();
-    delete tfp;
+
+#if VM_COVERAGE
+    if (!req.coverage_file.empty()) {
+        VerilatedCov::write(req.coverage_file.c_str());
+    }
+#endif
+
+    dut->final();
+    if (tfp) {
+        tfp->close();
+        delete tfp;
+    }
     delete dut;
-    
+
     return 0;
 }
+
+// Run one test per JSON request line on stdin until it closes. Every test
+// starts from a new model, so no state leaks between tests, and ends with
+// RESULT_MARKER followed by {"returncode": N}.
+static int serve() {
+    std::string line;
+    while (std::getline(std::cin, line)) {
+        if (line.empty()) continue;
+        TestRequest req;
+        req.test = json_field(line, "test");
+        req.wave_file = json_field(line, "wave_file");
+        req.coverage_file = json_field(line, "coverage_file");
+        req.checkpoint_restore = json_field(line, "restore");
+        int returncode = run_simulation(req);
+        std::cout << RESULT_MARKER << "{\"returncode\": " << returncode << "}" << std::endl;
+    }
+    return 0;
+}
+
+int main(int argc, char** argv) {
+    Verilated::commandArgs(argc, argv);
+    Verilated::traceEverOn(true);
+
+    for (int i = 1; i < argc; i++) {
+        if (strcmp(argv[i], "--serve") == 0) {
+            return serve();
+        }
+    }
+
+    // One-shot runs take their settings as +name=value plusargs
+    TestRequest req;
+    req.test = plusarg("test=");
+    req.wave_file = plusarg("wave_file=");  // No trace unless asked for
+    req.coverage_file = plusarg("coverage_file=");
+    req.checkpoint_save = plusarg("checkpoint_save=");
+    req.checkpoint_restore = plusarg("checkpoint_restore=");
+    return run_simulation(req);
+}